@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ArConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.ar'
+
+    def ready(self):
+        from apps.ar import signals  # noqa: F401
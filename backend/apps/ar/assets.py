@@ -0,0 +1,82 @@
+# apps/ar/assets.py
+"""
+Content-addressed URLs for AR scene files (.glb models, marker images and patterns).
+
+ARScene and ARObject store a hash of each file next to it (see
+HashedAssetsMixin and ``manage.py hash_ar_assets``), and the API hands out
+``/ar/assets/<hash>/<name>`` instead of the plain MEDIA_URL. The content
+behind such a URL never changes, so it is served with a strong ETag and
+``Cache-Control: immutable``; a new upload gets a new hash and a new URL.
+Downloads support Range so an interrupted model download resumes, and with
+settings.FILE_OFFLOAD set the web server sends the bytes instead of Django.
+"""
+import hashlib
+import mimetypes
+
+from django.urls import reverse
+from django.utils.encoding import filepath_to_uri
+
+ASSET_HASH_LENGTH = 16
+CONTENT_TYPES = {".glb": "model/gltf-binary", ".gltf": "model/gltf+json", ".patt": "text/plain"}
+
+
+def file_hash(field_file):
+    """Truncated SHA-256 of a FieldFile's content, whether just uploaded or already stored."""
+    digest = hashlib.sha256()
+    # An upload not yet saved to storage must stay open for the save.
+    stored = field_file._committed
+    if stored:
+        field_file.open("rb")
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    finally:
+        if stored:
+            field_file.close()
+    return digest.hexdigest()[:ASSET_HASH_LENGTH]
+
+
+class HashedAssetsMixin:
+    """
+    For models with file fields listed in ``asset_fields`` as
+    ``(file field, hash field)`` pairs: save() hashes a file when it is
+    uploaded, replaced, or not hashed yet.
+    """
+
+    asset_fields = []
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored file names, to tell in save() whether a file was replaced
+        instance._asset_names = {name: instance.__dict__.get(name) for name, _ in cls.asset_fields}
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_asset_names", {})
+        for file_field, hash_field in self.asset_fields:
+            field_file = getattr(self, file_field)
+            if not field_file:
+                setattr(self, hash_field, "")
+            elif not field_file._committed or not getattr(self, hash_field) or field_file.name != loaded.get(file_field):
+                try:
+                    setattr(self, hash_field, file_hash(field_file))
+                except OSError:  # the stored file is missing
+                    setattr(self, hash_field, "")
+        super().save(*args, **kwargs)
+        self._asset_names = {name: getattr(self, name).name for name, _ in self.asset_fields}
+
+
+def content_type_for(name):
+    extension = name[name.rfind("."):].lower() if "." in name else ""
+    return CONTENT_TYPES.get(extension) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def asset_url_builder(request):
+    """
+    ``(name, digest) -> absolute asset URL``. The route is reversed once, not
+    per row, since the list endpoints build two URLs for every scene.
+    """
+    probe = "0" * ASSET_HASH_LENGTH
+    prefix = request.build_absolute_uri(reverse("ar:asset", args=[probe, "x"])[:-len(f"{probe}/x")])
+    return lambda name, digest: f"{prefix}{digest}/{filepath_to_uri(name)}"
@@ -0,0 +1,124 @@
+# apps/ar/bundles.py
+"""
+Everything needed to open one AR scene, for /ar/api/scenes/<id>/bundle/.
+
+The manifest holds the scene (in the /ar/api/scenes/ row format), its
+ARObjects, and every file the scene uses (model, marker, AR.js pattern
+and object images) with its immutable /ar/assets/ URL, byte size and content hash.
+Its version is a hash of all of that, so it changes whenever the scene,
+an object, or any file does.
+
+The packed bundle is the same manifest plus the files in one uncompressed
+zip (models and images are already compressed), for clients that want a
+single download. It is built on first request into settings.AR_BUNDLE_DIR
+as ``scene-<id>-<version>.zip`` and served from an immutable URL; older
+versions of the same scene are removed.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import reverse
+
+from apps.ar.assets import asset_url_builder, content_type_for
+from apps.ar.serializers import ARObjectSerializer, scene_list_data
+
+BUNDLE_FORMAT = 1
+PACKED_NAME = "scene-{scene_id}-{version}.zip"
+
+
+def bundle_dir():
+    return Path(settings.AR_BUNDLE_DIR)
+
+
+def scene_files(scene):
+    """``(role, object id, FieldFile, hash)`` for each hashed file the scene and its objects use."""
+    files = [
+        ("model", None, scene.model_file, scene.model_hash),
+        ("marker", None, scene.marker_image, scene.marker_hash),
+        ("pattern", None, scene.marker_pattern, scene.pattern_hash),
+    ]
+    files += [("object_image", obj.pk, obj.image, obj.image_hash) for obj in scene.ar_objects.all()]
+    return [entry for entry in files if entry[2] and entry[3]]
+
+
+def scene_manifest(scene, request):
+    """
+    The bundle manifest of ``scene``, which must come with its ar_objects
+    prefetched. Files missing from storage are left out.
+    """
+    row = {field: getattr(scene, field) for field in ("id", "name", "description", "latitude", "longitude")}
+    row.update(marker_image=scene.marker_image.name, marker_hash=scene.marker_hash,
+               marker_pattern=scene.marker_pattern.name, pattern_hash=scene.pattern_hash,
+               model_file=scene.model_file.name, model_hash=scene.model_hash)
+    asset_url = asset_url_builder(request)
+
+    assets = []
+    for role, object_id, field_file, digest in scene_files(scene):
+        try:
+            size = field_file.size
+        except OSError:
+            continue
+        extension = os.path.splitext(field_file.name)[1].lower()
+        assets.append({
+            "role": role,
+            "object": object_id,
+            "name": field_file.name,
+            "url": asset_url(field_file.name, digest),
+            "path": f"files/{digest}{extension}",
+            "content_type": content_type_for(field_file.name),
+            "size": size,
+            "hash": digest,
+        })
+
+    objects = ARObjectSerializer(scene.ar_objects.all(), many=True, context={"request": request}).data
+    image_urls = {asset["object"]: asset["url"] for asset in assets if asset["role"] == "object_image"}
+    for obj in objects:
+        obj["image"] = image_urls.get(obj["id"], obj["image"])
+
+    content = {"format": BUNDLE_FORMAT, "scene": scene_list_data([row], request)[0], "objects": objects, "assets": assets}
+    # Hash the content independent of the host the URLs were built for.
+    fingerprint = json.dumps([
+        row,
+        [(obj.pk, obj.name, obj.info, obj.offset_x, obj.offset_y, obj.offset_z) for obj in scene.ar_objects.all()],
+        [(asset["role"], asset["object"], asset["name"], asset["hash"], asset["size"]) for asset in assets],
+    ], default=str)
+    version = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+    packed_url = request.build_absolute_uri(reverse("ar:scene_bundle_packed", args=[scene.pk, version]))
+    return {**content, "version": version, "packed_url": packed_url}
+
+
+def packed_bundle(scene, manifest):
+    """Path of the packed bundle for ``manifest``, building it if it is not on disk yet."""
+    directory = bundle_dir()
+    path = directory / PACKED_NAME.format(scene_id=scene.pk, version=manifest["version"])
+    if path.exists():
+        return path
+
+    directory.mkdir(parents=True, exist_ok=True)
+    files = {file.name: file for _, _, file, _ in scene_files(scene)}
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out, zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as bundle:
+            bundle.writestr("manifest.json", json.dumps(manifest, indent=2))
+            written = set()
+            for asset in manifest["assets"]:
+                if asset["path"] in written:
+                    continue  # the same file used twice
+                written.add(asset["path"])
+                with files[asset["name"]].open("rb") as f, bundle.open(asset["path"], "w") as entry:
+                    for chunk in f.chunks():
+                        entry.write(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    for old in directory.glob(PACKED_NAME.format(scene_id=scene.pk, version="*")):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path
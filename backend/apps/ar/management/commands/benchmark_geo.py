@@ -0,0 +1,82 @@
+# apps/ar/management/commands/benchmark_geo.py
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bicoltravelguide.geo import PointIndex, haversine_distance
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the vectorized distance engine (bicoltravelguide/geo.py) against the scalar haversine loop '
+        'on random points around Bicol. No database access.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--points', type=int, nargs='+', default=[1_000, 10_000, 100_000], help='Set sizes to time')
+        parser.add_argument('--queries', type=int, default=50, help='Query points per timing (default 50)')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of N runs (default 3)')
+
+    def handle(self, *args, **options):
+        if min(options['points']) < 1 or options['queries'] < 1 or options['repeat'] < 1:
+            raise CommandError('--points, --queries and --repeat must be at least 1')
+
+        rng = random.Random(0)
+        queries = [(rng.uniform(12.5, 14.5), rng.uniform(122.5, 125)) for _ in range(options['queries'])]
+        self.stdout.write(f"{'operation':<26}{'points':>9}{'loop':>12}{'numpy':>12}{'speedup':>10}")
+
+        for size in options['points']:
+            rows = [(pk, rng.uniform(12.5, 14.5), rng.uniform(122.5, 125)) for pk in range(size)]
+            index = PointIndex.from_rows(rows)
+
+            def loop_radius():
+                for lat, lon in queries:
+                    hits = []
+                    for pk, scene_lat, scene_lon in rows:
+                        distance = haversine_distance(lat, lon, scene_lat, scene_lon)
+                        if distance <= 10:
+                            hits.append((distance, pk))
+                    hits.sort()
+
+            def loop_nearest():
+                for lat, lon in queries:
+                    sorted((haversine_distance(lat, lon, scene_lat, scene_lon), pk) for pk, scene_lat, scene_lon in rows)[:10]
+
+            cases = [
+                ('radius 10 km', loop_radius, lambda: [index.within(lat, lon, 10) for lat, lon in queries]),
+                ('10 nearest', loop_nearest, lambda: [index.nearest(lat, lon, 10) for lat, lon in queries]),
+            ]
+            subset = rows[:2_000]
+            subset_index = PointIndex.from_rows(subset)
+            cases.append((
+                f'{len(subset)}x{len(subset)} matrix',
+                lambda: [[haversine_distance(a[1], a[2], b[1], b[2]) for b in subset] for a in subset],
+                lambda: subset_index.distance_matrix(subset_index),
+            ))
+
+            self._check(index, rows, queries[0])
+            for name, loop, vectorized in cases:
+                loop_s, numpy_s = self._best(loop, options['repeat']), self._best(vectorized, options['repeat'])
+                self.stdout.write(f'{name:<26}{size:>9}{loop_s:>11.3f}s{numpy_s:>11.4f}s{loop_s / numpy_s:>9.1f}x')
+
+        self.stdout.write(self.style.SUCCESS('Vectorized results match the scalar loop'))
+
+    @staticmethod
+    def _check(index, rows, query):
+        lat, lon = query
+        expected = sorted((haversine_distance(lat, lon, r_lat, r_lon), pk) for pk, r_lat, r_lon in rows)[:10]
+        got = index.nearest(lat, lon, 10)
+        if [pk for _, pk in got] != [pk for _, pk in expected] or any(
+            abs(a - b) > 1e-6 for (a, _), (b, _) in zip(got, expected)
+        ):
+            raise CommandError('Vectorized results differ from the scalar loop')
+
+    @staticmethod
+    def _best(func, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
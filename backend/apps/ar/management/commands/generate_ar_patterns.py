@@ -0,0 +1,21 @@
+# apps/ar/management/commands/generate_ar_patterns.py
+from django.core.management.base import BaseCommand
+
+from apps.ar.models import ARScene
+from apps.ar.patterns import generate_pattern, needs_pattern
+
+
+class Command(BaseCommand):
+    help = 'Generate missing or stale AR.js pattern files from ARScene marker images (run hash_ar_assets first)'
+
+    def handle(self, *args, **options):
+        generated, failed = 0, 0
+        for scene in ARScene.objects.order_by('pk'):
+            if not needs_pattern(scene):
+                continue
+            if generate_pattern(scene.pk):
+                generated += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Could not read the marker of #{scene.pk} {scene.name}'))
+        self.stdout.write(self.style.SUCCESS(f'Generated patterns for {generated} scenes; {failed} failed'))
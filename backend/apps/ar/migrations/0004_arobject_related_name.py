@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ar', '0003_alter_arscene_model_file'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='arobject',
+            name='scene',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ar_objects', to='ar.arscene'),
+        ),
+    ]
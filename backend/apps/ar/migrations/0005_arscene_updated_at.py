@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ar', '0004_arobject_related_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arscene',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
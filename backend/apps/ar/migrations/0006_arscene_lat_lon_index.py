@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ar', '0005_arscene_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='arscene',
+            index=models.Index(fields=['latitude', 'longitude'], name='ar_scene_lat_lon_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ar', '0006_arscene_lat_lon_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arscene',
+            name='marker_hash',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='arscene',
+            name='model_hash',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+    ]
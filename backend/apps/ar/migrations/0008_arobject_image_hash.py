@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ar', '0007_arscene_asset_hashes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arobject',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+    ]
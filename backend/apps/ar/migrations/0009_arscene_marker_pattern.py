@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ar', '0008_arobject_image_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arscene',
+            name='marker_pattern',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='ar/patterns/'),
+        ),
+        migrations.AddField(
+            model_name='arscene',
+            name='pattern_hash',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+    ]
@@ -1,28 +1,51 @@
 # backend/apps/ar/models.py
 from django.db import models
 
-class ARScene(models.Model):
+from apps.ar.assets import HashedAssetsMixin
+from bicoltravelguide.queries import TouchingQuerySet
+
+class ARScene(HashedAssetsMixin, models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     model_file = models.FileField(upload_to='ar/models/', null=True, blank=True)
     marker_image = models.ImageField(upload_to='ar/markers/', blank=True, null=True)
+    # AR.js pattern generated from marker_image (apps/ar/patterns.py)
+    marker_pattern = models.FileField(upload_to='ar/patterns/', blank=True, null=True, editable=False)
+    # Content hashes for the immutable /ar/assets/ URLs (apps/ar/assets.py)
+    model_hash = models.CharField(max_length=16, blank=True, editable=False)
+    marker_hash = models.CharField(max_length=16, blank=True, editable=False)
+    pattern_hash = models.CharField(max_length=16, blank=True, editable=False)
     latitude = models.FloatField()
     longitude = models.FloatField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TouchingQuerySet.as_manager()
+
+    asset_fields = [("model_file", "model_hash"), ("marker_image", "marker_hash"), ("marker_pattern", "pattern_hash")]
+
+    class Meta:
+        indexes = [
+            # Bounding-box prefilter for nearby scenes (apps/ar/spatial.py)
+            models.Index(fields=['latitude', 'longitude'], name='ar_scene_lat_lon_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
-class ARObject(models.Model):
-    scene = models.ForeignKey(ARScene, on_delete=models.CASCADE, related_name='objects')
+class ARObject(HashedAssetsMixin, models.Model):
+    scene = models.ForeignKey(ARScene, on_delete=models.CASCADE, related_name='ar_objects')
     name = models.CharField(max_length=100)
     info = models.TextField(blank=True)
     image = models.ImageField(upload_to='ar/objects/', blank=True, null=True)
+    image_hash = models.CharField(max_length=16, blank=True, editable=False)
     offset_x = models.FloatField(default=0)
     offset_y = models.FloatField(default=0)
     offset_z = models.FloatField(default=0)
     description = models.TextField(blank=True)
     objects = models.Manager()
 
+    asset_fields = [("image", "image_hash")]
+
     def __str__(self):
        return self.name
@@ -0,0 +1,119 @@
+# apps/ar/patterns.py
+"""
+AR.js pattern files (.patt) generated from ARScene.marker_image.
+
+A pattern is what AR.js's marker training page produces: the marker's
+inner image sampled down to PATTERN_SIZE x PATTERN_SIZE, written out for
+four orientations (0, 90, 180 and 270 degrees counter-clockwise), each as
+three PATTERN_SIZE-row blocks of blue, green and red values, with a blank
+line between orientations.
+
+Uploaded markers may be the printable marker with its thick black border
+or just the inner image. The border is cropped (keeping the centre
+PATTERN_RATIO of each side, AR.js's default) when the frame it would
+occupy is mostly dark.
+
+Patterns are written next to the marker's other files as
+``ar/patterns/<marker hash>.patt``, so a scene's pattern is stale exactly
+when its name does not match the current marker hash. Generation runs on a
+background thread once the scene's save commits (apps/ar/signals.py);
+``manage.py generate_ar_patterns`` fills in scenes saved before that.
+"""
+import logging
+
+import numpy as np
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from apps.ar.models import ARScene
+from bicoltravelguide.background import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+PATTERN_SIZE = 16
+PATTERN_RATIO = 0.5
+DARK_BORDER_LEVEL = 64
+PATTERN_DIR = "ar/patterns"
+
+
+def pattern_name(marker_hash):
+    return f"{PATTERN_DIR}/{marker_hash}.patt"
+
+
+def needs_pattern(scene):
+    """Whether ``scene``'s pattern is missing, stale, or left over from a removed marker."""
+    if not scene.marker_hash:
+        return bool(scene.marker_pattern)
+    return scene.marker_pattern.name != pattern_name(scene.marker_hash)
+
+
+def _inner_image(image):
+    """``image`` without its marker border, if it has one."""
+    gray = np.asarray(image.convert("L"), dtype=np.float64)
+    height, width = gray.shape
+    top, left = round(height * (1 - PATTERN_RATIO) / 2), round(width * (1 - PATTERN_RATIO) / 2)
+    frame = np.ones_like(gray, dtype=bool)
+    frame[top:height - top, left:width - left] = False
+    if not frame.any() or gray[frame].mean() >= DARK_BORDER_LEVEL:
+        return image
+    return image.crop((left, top, width - left, height - top))
+
+
+def encode_pattern(image):
+    """The .patt text for a marker image (a PIL image)."""
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        # Transparent pixels read as black, as on the training page's canvas.
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size)
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    image = _inner_image(image.convert("RGB")).resize((PATTERN_SIZE, PATTERN_SIZE), Image.Resampling.BOX)
+
+    pixels = np.asarray(image)
+    blocks = []
+    for turns in range(4):
+        rotated = np.rot90(pixels, turns)
+        # One block per channel, blue first
+        rows = [" ".join(f"{value:3d}" for value in row) for channel in (2, 1, 0) for row in rotated[:, :, channel]]
+        blocks.append("\n".join(rows) + "\n")
+    return "\n".join(blocks)
+
+
+def generate_pattern(scene_id):
+    """
+    Write the pattern of one scene's marker (or remove a pattern whose
+    marker is gone). Returns True if the scene changed.
+    """
+    try:
+        scene = ARScene.objects.get(pk=scene_id)
+    except ARScene.DoesNotExist:
+        return False
+    if not needs_pattern(scene):
+        return False
+
+    if not scene.marker_hash:
+        scene.marker_pattern = None
+    else:
+        try:
+            with scene.marker_image.open("rb") as f, Image.open(f) as image:
+                text = encode_pattern(image)
+        except (OSError, UnidentifiedImageError) as exc:
+            logger.warning("No AR.js pattern for scene %s: cannot read marker %s (%s)",
+                           scene.pk, scene.marker_image.name, exc)
+            return False
+        storage = scene.marker_pattern.storage
+        name = pattern_name(scene.marker_hash)
+        if not storage.exists(name):
+            storage.save(name, ContentFile(text.encode("ascii")))
+        scene.marker_pattern = name
+    # save() hashes the new file; the post_save signal bumps the scene version.
+    scene.save(update_fields=["marker_pattern", "pattern_hash", "updated_at"])
+    return True
+
+
+_pattern_job = BackgroundJob("ar-patterns", generate_pattern)
+
+
+def schedule_pattern_generation(scene_id):
+    """Generate a scene's pattern off the request path; saves while it is queued share the run."""
+    return _pattern_job.schedule(scene_id)
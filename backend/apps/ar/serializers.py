@@ -1,4 +1,8 @@
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
+
+from apps.ar.assets import asset_url_builder
 from .models import  ARScene, ARObject
 
 class ARObjectSerializer(serializers.ModelSerializer):
@@ -9,16 +13,85 @@ class ARObjectSerializer(serializers.ModelSerializer):
 
 class ARSceneSerializer(serializers.ModelSerializer):
     marker_image = serializers.SerializerMethodField()
+    marker_pattern = serializers.SerializerMethodField()
     model_url = serializers.SerializerMethodField()
 
     class Meta:
         model = ARScene
-        fields = ["id", "name", "description", "latitude", "longitude", "marker_image", "model_url"]
+        fields = ["id", "name", "description", "latitude", "longitude", "marker_image", "marker_pattern", "model_url"]
 
-    def get_marker_image(self, obj):
+    def _file_url(self, field_file, digest):
+        # The immutable /ar/assets/ URL once the file is hashed, MEDIA_URL until then
+        if not field_file:
+            return None
         request = self.context.get('request')
-        return request.build_absolute_uri(obj.marker_image.url) if obj.marker_image else None
+        if digest:
+            return asset_url_builder(request)(field_file.name, digest)
+        return request.build_absolute_uri(field_file.url)
+
+    def get_marker_image(self, obj):
+        return self._file_url(obj.marker_image, obj.marker_hash)
+
+    def get_marker_pattern(self, obj):
+        return self._file_url(obj.marker_pattern, obj.pattern_hash)
 
     def get_model_url(self, obj):
-        request = self.context.get('request')
-        return request.build_absolute_uri(obj.model_url.url) if obj.model_url else None
+        return self._file_url(obj.model_file, obj.model_hash)
+
+
+# Read-only fast path: ARSceneSerializer's output straight from .values() rows
+SCENE_LIST_VALUES = [
+    "id", "name", "description", "latitude", "longitude", "marker_image", "marker_hash",
+    "marker_pattern", "pattern_hash", "model_file", "model_hash",
+]
+
+
+def _absolute_url_builder(storage, request):
+    """
+    ``name -> request.build_absolute_uri(storage.url(name))``. For files on
+    FileSystemStorage under a path-only MEDIA_URL that is the absolute media
+    prefix plus the quoted name, so skip urljoin/urlsplit on every row.
+    """
+    base_url = storage.base_url or ""
+    if (
+        not isinstance(storage, FileSystemStorage)
+        or not base_url.startswith("/") or base_url.startswith("//") or not base_url.endswith("/")
+        or "/./" in base_url or "/../" in base_url
+    ):
+        return lambda name: request.build_absolute_uri(storage.url(name))
+
+    prefix = request.build_absolute_uri(base_url)
+
+    def build(name):
+        path = filepath_to_uri(name).lstrip("/")
+        if any(segment in (".", "..") for segment in path.split("/")):
+            return request.build_absolute_uri(storage.url(name))
+        return prefix + path
+
+    return build
+
+
+def _file_url_builder(field_name, request):
+    """``(name, digest) -> URL``: the /ar/assets/ URL for hashed files, the media URL otherwise."""
+    media_url = _absolute_url_builder(ARScene._meta.get_field(field_name).storage, request)
+    asset_url = asset_url_builder(request)
+    return lambda name, digest: asset_url(name, digest) if digest else media_url(name)
+
+
+def scene_list_data(rows, request):
+    marker_url = _file_url_builder("marker_image", request)
+    pattern_url = _file_url_builder("marker_pattern", request)
+    model_url = _file_url_builder("model_file", request)
+    return [
+        {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "latitude": row["latitude"],
+            "longitude": row["longitude"],
+            "marker_image": marker_url(row["marker_image"], row["marker_hash"]) if row["marker_image"] else None,
+            "marker_pattern": pattern_url(row["marker_pattern"], row["pattern_hash"]) if row["marker_pattern"] else None,
+            "model_url": model_url(row["model_file"], row["model_hash"]) if row["model_file"] else None,
+        }
+        for row in rows
+    ]
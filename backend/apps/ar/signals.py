@@ -0,0 +1,26 @@
+# apps/ar/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.ar.models import ARScene
+from apps.ar.patterns import needs_pattern, schedule_pattern_generation
+from apps.ar.spatial import bump_scene_version
+from apps.tourism.offline import schedule_bundle_rebuild
+
+
+@receiver([post_save, post_delete], sender=ARScene)
+def scene_changed(sender, **kwargs):
+    # Bump now for this worker and again once other connections can see
+    # the change, so no grid index built in between outlives it. The
+    # offline bundle carries the scenes too.
+    bump_scene_version()
+    transaction.on_commit(bump_scene_version)
+    transaction.on_commit(schedule_bundle_rebuild)
+
+
+@receiver(post_save, sender=ARScene)
+def marker_changed(sender, instance, raw=False, **kwargs):
+    # Generate the AR.js pattern once the new marker is committed.
+    if not raw and needs_pattern(instance):
+        transaction.on_commit(lambda: schedule_pattern_generation(instance.pk))
@@ -0,0 +1,94 @@
+# apps/ar/spatial.py
+"""
+Nearby AR scene lookup.
+
+Small radii (the common case: "what is around me") are answered from a
+per-worker grid index of scene coordinates, rebuilt when the scene version
+stamp changes. Larger radii fall back to a bounding-box prefilter in SQL on
+the indexed latitude/longitude columns. Either way the candidates are then
+refined with the exact haversine distance (vectorized, bicoltravelguide/geo.py),
+sorted nearest first and cut to the requested limit.
+"""
+import math
+from collections import defaultdict
+
+import numpy as np
+
+from apps.ar.models import ARScene
+from apps.tourism.versioning import VersionedValue, VersionStamp
+from bicoltravelguide.geo import PointIndex, bounding_box, bounding_box_filter
+
+GRID_CELL_DEGREES = 0.1  # about 11 km of latitude
+GRID_MAX_RADIUS_KM = 50
+SCENE_VERSION_KEY = "ar:scene-version"
+
+
+class SceneGridIndex:
+    """
+    A PointIndex of scene coordinates, with the positions of its points
+    bucketed into GRID_CELL_DEGREES x GRID_CELL_DEGREES cells.
+    """
+
+    def __init__(self, points):
+        points = list(points)
+        self.points = PointIndex.from_rows(points)
+        cells = defaultdict(list)
+        for position, (_, lat, lon) in enumerate(points):
+            cells[self._cell(lat, lon)].append(position)
+        self.cells = {cell: np.array(positions, dtype=np.intp) for cell, positions in cells.items()}
+
+    @staticmethod
+    def _cell(lat, lon):
+        return math.floor(lat / GRID_CELL_DEGREES), math.floor(lon / GRID_CELL_DEGREES)
+
+    def candidates(self, lat, lon, radius_km):
+        """Positions in ``self.points`` of the scenes in cells the circle's bounding box touches."""
+        min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius_km)
+        if lon_ranges is None:
+            lon_ranges = [(-180, 180)]
+        first_row, last_row = self._cell(min_lat, 0)[0], self._cell(max_lat, 0)[0]
+        found = []
+        for min_lon, max_lon in lon_ranges:
+            first_col, last_col = self._cell(0, min_lon)[1], self._cell(0, max_lon)[1]
+            if (last_row - first_row + 1) * (last_col - first_col + 1) > len(self.cells):
+                # Sparser than the box: walking the occupied cells is cheaper.
+                found.extend(
+                    positions for (row, col), positions in self.cells.items()
+                    if first_row <= row <= last_row and first_col <= col <= last_col
+                )
+                continue
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    if (row, col) in self.cells:
+                        found.append(self.cells[row, col])
+        return np.concatenate(found) if found else np.arange(0)
+
+    def nearby(self, lat, lon, radius_km, limit):
+        return self.points.within(lat, lon, radius_km, limit, positions=self.candidates(lat, lon, radius_km))
+
+
+def nearby_sql(lat, lon, radius_km, limit):
+    """Same as SceneGridIndex.nearby(), prefiltered by a bounding box in SQL."""
+    scenes = ARScene.objects.filter(bounding_box_filter(lat, lon, radius_km))
+    return PointIndex.from_rows(scenes.values_list("id", "latitude", "longitude")).within(lat, lon, radius_km, limit)
+
+
+scene_version = VersionStamp(SCENE_VERSION_KEY)
+get_scene_version = scene_version.get
+bump_scene_version = scene_version.bump
+
+_scene_index = VersionedValue(
+    get_scene_version, lambda version: SceneGridIndex(ARScene.objects.values_list("id", "latitude", "longitude"))
+)
+
+
+def get_scene_index():
+    """Return this worker's SceneGridIndex, rebuilding it if a scene changed."""
+    return _scene_index.get()
+
+
+def nearby_scenes(lat, lon, radius_km, limit):
+    """[(distance_km, scene id)] within ``radius_km`` of (lat, lon), nearest first, at most ``limit``."""
+    if radius_km <= GRID_MAX_RADIUS_KM:
+        return get_scene_index().nearby(lat, lon, radius_km, limit)
+    return nearby_sql(lat, lon, radius_km, limit)
@@ -1,3 +1,351 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+
+from apps.ar.models import ARObject, ARScene
+from apps.ar.patterns import _pattern_job, encode_pattern, generate_pattern, schedule_pattern_generation
+from apps.ar.serializers import ARSceneSerializer
+from apps.ar.spatial import SceneGridIndex, nearby_sql
+from bicoltravelguide.geo import PointIndex, haversine_distance, haversine_km, haversine_matrix_km
+from bicoltravelguide.query_budget import QueryBudgetTestMixin
+
+
+class ARQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        for i in range(3):
+            scene = ARScene.objects.create(name=f"Far scene {i}", latitude=40.0 + i, longitude=140.0)
+            ARObject.objects.create(scene=scene, name=f"Marker {i}")
+        self.client.force_login(get_user_model().objects.create_user("tourist", password="pw"))
+
+    def test_nearby_scenes(self):
+        response = self.assertWithinQueryBudget('/ar/api/scenes/nearby/?lat=13.14&lon=123.73')
+        self.assertEqual(response.json(), [])
+
+    def test_scene_list(self):
+        self.assertWithinQueryBudget('/ar/api/scenes/')
+
+    def test_location_view(self):
+        self.assertWithinQueryBudget('/ar/location/')
+
+    def test_scene_objects_accessor(self):
+        scene = ARScene.objects.get(name="Far scene 0")
+        self.assertEqual([obj.name for obj in scene.ar_objects.all()], ["Marker 0"])
+
+
+class SceneListFastPathTestCase(TestCase):
+    def test_matches_serializer_bytes(self):
+        ARScene.objects.create(
+            name="Cagsawa", description="Ruins\u2028", latitude=13.1662, longitude=123.7103,
+            marker_image="ar/markers/cagsawa.png", model_file="ar/models/bell tower.glb",
+        )
+        ARScene.objects.create(name="Mayon", latitude=13.2548, longitude=123.6861)
+        ARScene.objects.create(name="Daraga", latitude=13.15, longitude=123.71, marker_image="ar/markers/../daraga ñ.png")
+
+        response = self.client.get('/ar/api/scenes/', HTTP_HOST="travel.example.com")
+        request = RequestFactory().get('/ar/api/scenes/', HTTP_HOST="travel.example.com")
+        expected = JSONRenderer().render(
+            ARSceneSerializer(ARScene.objects.all(), many=True, context={"request": request}).data
+        )
+        self.assertEqual(response.content, expected)
+        self.assertIn(b'"model_url":"http://travel.example.com/media/ar/models/bell%20tower.glb"', response.content)
+
+
+class ARAssetTestCase(QueryBudgetTestMixin, TestCase):
+    MODEL = bytes(range(256)) * 40  # 10 KiB
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings_override = self.settings(MEDIA_ROOT=self.media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.scene = ARScene.objects.create(
+            name="Cagsawa", latitude=13.1662, longitude=123.7103,
+            model_file=SimpleUploadedFile("bell tower.glb", self.MODEL),
+        )
+        self.digest = hashlib.sha256(self.MODEL).hexdigest()[:16]
+
+    def asset_url(self):
+        return self.client.get('/ar/api/scenes/').json()[0]['model_url'].removeprefix('http://testserver')
+
+    def test_hashed_url_ranges_and_caching(self):
+        self.assertEqual(self.scene.model_hash, self.digest)
+        url = self.asset_url()
+        self.assertEqual(url, f'/ar/assets/{self.digest}/ar/models/bell_tower.glb')
+
+        response = self.assertWithinQueryBudget(url)
+        self.assertEqual(b''.join(response.streaming_content), self.MODEL)
+        self.assertEqual(response['Content-Type'], 'model/gltf-binary')
+        self.assertEqual(response['ETag'], f'"{self.digest}"')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        # Resume an interrupted download
+        partial = self.client.get(url, HTTP_RANGE='bytes=10000-', HTTP_IF_RANGE=f'"{self.digest}"')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b''.join(partial.streaming_content), self.MODEL[10000:])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"{self.digest}"').status_code, 304)
+
+    def test_new_upload_gets_a_new_url(self):
+        old_url = self.asset_url()
+        self.scene.model_file = SimpleUploadedFile("bell tower.glb", b"glTF v2")
+        self.scene.save()
+        self.assertNotEqual(self.asset_url(), old_url)
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(self.client.get('/ar/assets/0000000000000000/ar/models/bell_tower.glb').status_code, 404)
+
+    def test_offload_to_web_server(self):
+        url = self.asset_url()
+        with self.settings(FILE_OFFLOAD='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/ar/models/bell_tower.glb')
+        self.assertEqual(response.content, b'')
+        self.assertIn('immutable', response['Cache-Control'])
+        with self.settings(FILE_OFFLOAD='x-sendfile'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media, 'ar', 'models', 'bell_tower.glb'))
+
+    def test_backfill_command(self):
+        ARScene.objects.filter(pk=self.scene.pk).update(model_hash='')
+        self.assertTrue(self.asset_url().startswith('/media/'))
+        out = StringIO()
+        call_command('hash_ar_assets', stdout=out)
+        self.assertIn('Hashed files of 1 scenes', out.getvalue())
+        self.assertTrue(self.asset_url().startswith(f'/ar/assets/{self.digest}/'))
+
+    def test_backfill_command_saves_every_hash(self):
+        pattern = SimpleUploadedFile("cagsawa.patt", b" 0 0 0\n")
+        self.scene.marker_pattern.save("cagsawa.patt", pattern)
+        ARScene.objects.filter(pk=self.scene.pk).update(pattern_hash='')
+        call_command('hash_ar_assets', stdout=StringIO())
+        self.assertEqual(ARScene.objects.get(pk=self.scene.pk).pattern_hash, hashlib.sha256(b" 0 0 0\n").hexdigest()[:16])
+
+
+class SceneBundleTestCase(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = self.settings(MEDIA_ROOT=self.tmp, AR_BUNDLE_DIR=os.path.join(self.tmp, "bundles"))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.scene = ARScene.objects.create(
+            name="Cagsawa", latitude=13.1662, longitude=123.7103,
+            model_file=SimpleUploadedFile("belfry.glb", b"glTF" + bytes(2000)),
+            marker_image=SimpleUploadedFile("marker.png", b"\x89PNG marker"),
+        )
+        ARObject.objects.create(scene=self.scene, name="Bell", offset_y=1.5,
+                                image=SimpleUploadedFile("bell.png", b"\x89PNG bell"))
+        ARObject.objects.create(scene=self.scene, name="Plaque")
+        self.url = f'/ar/api/scenes/{self.scene.pk}/bundle/'
+
+    def test_manifest(self):
+        manifest = self.assertWithinQueryBudget(self.url).json()
+        self.assertEqual(manifest['scene']['name'], "Cagsawa")
+        self.assertEqual([obj['name'] for obj in manifest['objects']], ["Bell", "Plaque"])
+        self.assertEqual(
+            [(asset['role'], asset['size']) for asset in manifest['assets']],
+            [("model", 2004), ("marker", 11), ("object_image", 9)],
+        )
+        model = manifest['assets'][0]
+        self.assertEqual(manifest['scene']['model_url'], model['url'])
+        self.assertEqual(model['hash'], hashlib.sha256(b"glTF" + bytes(2000)).hexdigest()[:16])
+        self.assertEqual(manifest['objects'][0]['image'], manifest['assets'][2]['url'])
+        self.assertIsNone(manifest['objects'][1]['image'])
+
+        # Every asset URL serves its file
+        for asset in manifest['assets']:
+            response = self.client.get(asset['url'])
+            self.assertEqual(len(b''.join(response.streaming_content)), asset['size'])
+
+        self.assertEqual(self.client.get('/ar/api/scenes/999/bundle/').status_code, 404)
+
+    def test_packed_bundle(self):
+        manifest = self.client.get(self.url).json()
+        response = self.client.get(manifest['packed_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as bundle:
+            packed = {name: bundle.read(name) for name in bundle.namelist()}
+        self.assertEqual(sorted(packed), sorted(['manifest.json'] + [asset['path'] for asset in manifest['assets']]))
+        self.assertEqual(packed[manifest['assets'][1]['path']], b"\x89PNG marker")
+
+        # Any change gives a new version; the old one is gone.
+        ARObject.objects.filter(name="Plaque").update(offset_x=2)
+        new_manifest = self.client.get(self.url).json()
+        self.assertNotEqual(new_manifest['version'], manifest['version'])
+        self.assertEqual(self.client.get(manifest['packed_url']).status_code, 404)
+        self.assertEqual(self.client.get(new_manifest['packed_url']).status_code, 200)
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp, "bundles"))), 1)
+
+
+class MarkerPatternTestCase(TestCase):
+    @staticmethod
+    def png(image):
+        out = BytesIO()
+        image.save(out, "PNG")
+        return out.getvalue()
+
+    @staticmethod
+    def blocks(pattern):
+        """``[orientation][channel (b, g, r)][row][column]`` values of a .patt text."""
+        orientations = pattern.split("\n\n")
+        rows = [[[int(value) for value in line.split()] for line in block.splitlines()] for block in orientations]
+        return [[block[c * 16:(c + 1) * 16] for c in range(3)] for block in rows]
+
+    def test_encoding_and_rotations(self):
+        # Left half (50, 100, 150), right half (200, 10, 20)
+        image = Image.new("RGB", (32, 32), (50, 100, 150))
+        image.paste((200, 10, 20), (16, 0, 32, 32))
+        pattern = encode_pattern(image)
+        self.assertEqual(len(pattern.splitlines()), 4 * 48 + 3)
+        self.assertTrue(all(len(line) == 16 * 4 - 1 for line in pattern.splitlines() if line))
+
+        blocks = self.blocks(pattern)
+        blue, green, red = blocks[0]
+        self.assertEqual((blue[0][0], green[0][0], red[0][0]), (150, 100, 50))
+        self.assertEqual((blue[0][15], green[0][15], red[0][15]), (20, 10, 200))
+        # Turned 90 degrees counter-clockwise, the right half is on top.
+        self.assertEqual(blocks[1][2][0], [200] * 16)
+        self.assertEqual(blocks[1][2][15], [50] * 16)
+        self.assertEqual(blocks[2][2][0][0], 200)
+
+    def test_marker_border_is_cropped(self):
+        marker = Image.new("RGB", (64, 64), "black")
+        marker.paste((255, 255, 255), (16, 16, 48, 48))
+        blue, green, red = self.blocks(encode_pattern(marker))[0]
+        self.assertEqual({value for row in red for value in row}, {255})
+
+    def test_generated_on_upload_and_served(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        with self.settings(MEDIA_ROOT=tmp):
+            with self.captureOnCommitCallbacks() as callbacks:
+                scene = ARScene.objects.create(
+                    name="Mayon", latitude=13.2575, longitude=123.6856,
+                    marker_image=SimpleUploadedFile("mayon.png", self.png(Image.new("RGB", (40, 40), "orange"))),
+                )
+            self.assertIn('marker_changed', ' '.join(callback.__qualname__ for callback in callbacks))
+
+            self.assertTrue(generate_pattern(scene.pk))
+            scene.refresh_from_db()
+            self.assertEqual(scene.marker_pattern.name, f'ar/patterns/{scene.marker_hash}.patt')
+            self.assertFalse(generate_pattern(scene.pk))
+
+            url = self.client.get('/ar/api/scenes/').json()[0]['marker_pattern']
+            self.assertIn(f'/ar/assets/{scene.pattern_hash}/ar/patterns/', url)
+            response = self.client.get(url)
+            self.assertEqual(response['Content-Type'], 'text/plain')
+            pattern = b''.join(response.streaming_content).decode()
+            self.assertEqual(self.blocks(pattern)[0][2][0], [255] * 16)
+
+            out = StringIO()
+            call_command('generate_ar_patterns', stdout=out)
+            self.assertIn('Generated patterns for 0 scenes', out.getvalue())
+
+    def test_generation_is_coalesced_per_scene(self):
+        # Runs are started by hand here, on the test's own connection.
+        with mock.patch.object(_pattern_job, '_executor') as executor, \
+                mock.patch.object(_pattern_job, 'func') as generate, \
+                mock.patch('bicoltravelguide.background.connection'):
+            schedule_pattern_generation(1)
+            schedule_pattern_generation(1)
+            schedule_pattern_generation(2)
+            self.assertEqual([call.args[1] for call in executor.submit.call_args_list], [(1,), (2,)])
+
+            run, args = executor.submit.call_args_list[0].args
+            run(args)
+            generate.assert_called_once_with(1)
+            schedule_pattern_generation(1)  # queued again once its run has started
+            self.assertEqual(executor.submit.call_count, 3)
+
+
+class NearbyScenesTestCase(TestCase):
+    def setUp(self):
+        self.legazpi = (13.1391, 123.7438)
+        for name, lat, lon in [
+            ("Cagsawa", 13.1662, 123.7103),      # ~4.7 km
+            ("Mayon", 13.2548, 123.6861),        # ~14 km
+            ("Daraga", 13.1490, 123.7120),       # ~3.6 km
+            ("Naga", 13.6218, 123.1948),         # ~80 km
+            ("Fiji", -17.7134, 178.0650),
+        ]:
+            ARScene.objects.create(name=name, latitude=lat, longitude=lon)
+
+    def nearby(self, **params):
+        lat, lon = self.legazpi
+        response = self.client.get('/ar/api/scenes/nearby/', {'lat': lat, 'lon': lon, **params})
+        self.assertEqual(response.status_code, 200)
+        return [scene['name'] for scene in response.json()]
+
+    def test_sorted_by_distance_with_radius_and_limit(self):
+        self.assertEqual(self.nearby(), ["Daraga", "Cagsawa"])
+        self.assertEqual(self.nearby(radius_km=20), ["Daraga", "Cagsawa", "Mayon"])
+        self.assertEqual(self.nearby(radius_km=20, limit=1), ["Daraga"])
+        # Beyond GRID_MAX_RADIUS_KM: bounding box in SQL
+        self.assertEqual(self.nearby(radius_km=100), ["Daraga", "Cagsawa", "Mayon", "Naga"])
+
+    def test_grid_and_sql_agree_with_a_full_scan(self):
+        index = SceneGridIndex(ARScene.objects.values_list("id", "latitude", "longitude"))
+        for lat, lon, radius in [(*self.legazpi, 10), (13.5, 123.4, 50), (-17.7, 179.99, 30), (89.99, 0, 40), (0, 0, 5)]:
+            with self.subTest(lat=lat, lon=lon, radius=radius):
+                expected = sorted(
+                    (haversine_distance(lat, lon, scene.latitude, scene.longitude), scene.pk)
+                    for scene in ARScene.objects.all()
+                    if haversine_distance(lat, lon, scene.latitude, scene.longitude) <= radius
+                )
+                for hits in (index.nearby(lat, lon, radius, 10), nearby_sql(lat, lon, radius, 10)):
+                    self.assertEqual([pk for _, pk in hits], [pk for _, pk in expected])
+                    for (distance, _), (exact, _) in zip(hits, expected):
+                        self.assertAlmostEqual(distance, exact, places=6)
+
+    def test_index_follows_scene_changes(self):
+        self.assertEqual(self.nearby(radius_km=1), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            ARScene.objects.create(name="Embarcadero", latitude=13.1430, longitude=123.7480)
+        self.assertEqual(self.nearby(radius_km=1), ["Embarcadero"])
+
+    def test_distance_and_validation(self):
+        lat, lon = self.legazpi
+        scene = self.client.get('/ar/api/scenes/nearby/', {'lat': lat, 'lon': lon, 'limit': 1}).json()[0]
+        self.assertAlmostEqual(scene['distance_km'], 3.6, delta=0.2)
+        for params in [{'lat': 'x', 'lon': 1}, {'lat': 91, 'lon': 0}, {'lat': 0, 'lon': 0, 'radius_km': 0},
+                       {'lat': 0, 'lon': 0, 'radius_km': 501}, {'lat': 0, 'lon': 0, 'limit': 'ten'}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/ar/api/scenes/nearby/', params).status_code, 400)
+
+
+class GeoEngineTestCase(SimpleTestCase):
+    def setUp(self):
+        self.points = [(1, 13.1662, 123.7103), (2, 13.2548, 123.6861), (3, 13.1490, 123.7120), (4, 13.6218, 123.1948)]
+        self.index = PointIndex.from_rows(self.points)
+
+    def test_matches_scalar_haversine(self):
+        lats, lons = [p[1] for p in self.points], [p[2] for p in self.points]
+        expected = [haversine_distance(13.14, 123.74, lat, lon) for lat, lon in zip(lats, lons)]
+        for distances in (haversine_km(13.14, 123.74, lats, lons), self.index.distances(13.14, 123.74)):
+            for distance, exact in zip(distances, expected):
+                self.assertAlmostEqual(distance, exact, places=6)
+
+        matrix = haversine_matrix_km(lats[:2], lons[:2], lats, lons)
+        self.assertEqual(matrix.shape, (2, 4))
+        self.assertAlmostEqual(matrix[1, 3], haversine_distance(lats[1], lons[1], lats[3], lons[3]), places=6)
+        self.assertTrue(((self.index.distance_matrix(self.index) - haversine_matrix_km(lats, lons, lats, lons)) < 1e-9).all())
+
+    def test_nearest_and_within(self):
+        self.assertEqual([pk for _, pk in self.index.nearest(13.14, 123.74, 2)], [3, 1])
+        self.assertEqual([pk for _, pk in self.index.nearest(13.14, 123.74, 10)], [3, 1, 2, 4])
+        self.assertEqual([pk for _, pk in self.index.within(13.14, 123.74, 20)], [3, 1, 2])
+        self.assertEqual([pk for _, pk in self.index.within(13.14, 123.74, 20, limit=1)], [3])
+        self.assertEqual(PointIndex.from_rows([]).nearest(0, 0, 3), [])
@@ -1,6 +1,6 @@
-from django.urls import path
+from django.urls import path, re_path
 from .models import ARScene
-from .views import nearby_ar_scenes, api_views, webar_view, location_ar_view
+from .views import ar_asset, nearby_ar_scenes, api_views, webar_view, location_ar_view
 from .views.api_views import list_ar_scenes
 
 app_name = 'ar'
@@ -8,7 +8,11 @@ app_name = 'ar'
 urlpatterns = [
     path('api/scenes/nearby/', api_views.nearby_ar_scenes, name='nearby_ar_scenes'),
     path("api/scenes/", api_views.list_ar_scenes, name="list_scenes"),
+    path('api/scenes/<int:pk>/bundle/', api_views.scene_bundle, name='scene_bundle'),
+    re_path(r'^api/scenes/(?P<pk>[0-9]+)/bundle-(?P<version>[0-9a-f]{16})\.zip$', api_views.scene_bundle_packed,
+            name='scene_bundle_packed'),
     path('webar/<int:spot_id>/', webar_view, name='webar_scene'),
     path('webar/', webar_view, name='webar_scene_no_id'),
     path('location/', location_ar_view, name='location_ar_scene'),
+    path('assets/<str:digest>/<path:name>', ar_asset, name='asset'),
 ]
\ No newline at end of file
@@ -1,2 +1,2 @@
 from .api_views import nearby_ar_scenes, list_ar_scenes
-from .views import webar_view, location_ar_view
+from .views import ar_asset, webar_view, location_ar_view
@@ -1,14 +1,22 @@
 # apps/tourism/views/api_views.py
+from django.http import Http404
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
 from rest_framework import generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
-from math import radians, sin, cos, sqrt, atan2
 
+from apps.ar.bundles import PACKED_NAME, packed_bundle, scene_manifest
 from apps.ar.models import ARScene
-from apps.ar.serializers import ARSceneSerializer
+from apps.ar.serializers import SCENE_LIST_VALUES, scene_list_data
+from apps.ar.spatial import nearby_scenes
 from apps.tourism.models import TouristSpot
+from apps.tourism.renderers import ORJSONRenderer
 from apps.tourism.serializers import TouristSpotSerializer
+from bicoltravelguide.query_budget import query_budget
+from bicoltravelguide.ranges import ranged_file_response
 
 
 class TouristSpotListAPIView(generics.ListAPIView):
@@ -21,46 +29,85 @@ def list_tourist_spots(request):
     serializer = TouristSpotSerializer(spots, many=True, context={"request": request})
     return Response(serializer.data)
 
+@query_budget(3)
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
 def list_ar_scenes(request):
-    scenes = ARScene.objects.all()
-    serializer = ARSceneSerializer(scenes, many=True, context={"request": request})
-    return Response(serializer.data)
-
+    # Same output as ARSceneSerializer(many=True), without a serializer per scene
+    scenes = ARScene.objects.values(*SCENE_LIST_VALUES)
+    return Response(scene_list_data(scenes, request))
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate the distance between two points in kilometers."""
-    R = 6371  # Radius of Earth in kilometers
-    dLat = radians(lat2 - lat1)
-    dLon = radians(lon2 - lon1)
-    a = (sin(dLat / 2) * sin(dLat / 2) +
-         cos(radians(lat1)) * cos(radians(lat2)) *
-         sin(dLon / 2) * sin(dLon / 2))
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
 
+@query_budget(4)
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
 def nearby_ar_scenes(request):
     """
-    Finds AR scenes within a given radius from a user's location.
-    Expects 'lat' and 'lon' as query parameters.
+    Finds AR scenes within a given radius from a user's location, nearest first.
+    Expects 'lat' and 'lon' as query parameters, and optionally 'radius_km'
+    (default 10, max 500) and 'limit' (default 20, max 100).
     """
     try:
         user_lat = float(request.query_params.get("lat"))
         user_lon = float(request.query_params.get("lon"))
     except (TypeError, ValueError):
         return Response({"error": "Invalid or missing 'lat' and 'lon' parameters."}, status=400)
+    if not (-90 <= user_lat <= 90 and -180 <= user_lon <= 180):
+        return Response({"error": "'lat' and 'lon' are out of range."}, status=400)
 
-    radius_km = 10  # Search radius in kilometers
-    nearby_scenes = []
-    
-    for scene in ARScene.objects.all():
-        if scene.latitude is not None and scene.longitude is not None:
-            distance = haversine_distance(user_lat, user_lon, scene.latitude, scene.longitude)
-            if distance <= radius_km:
-                nearby_scenes.append(scene)
+    try:
+        radius_km = float(request.query_params.get("radius_km", 10))
+        limit = int(request.query_params.get("limit", 20))
+    except ValueError:
+        return Response({"error": "Invalid 'radius_km' or 'limit' parameter."}, status=400)
+    if not 0 < radius_km <= 500:
+        return Response({"error": "'radius_km' must be greater than 0 and at most 500."}, status=400)
+    limit = min(max(limit, 1), 100)
 
-    serializer = ARSceneSerializer(nearby_scenes, many=True, context={"request": request})
-    return Response(serializer.data)
+    hits = nearby_scenes(user_lat, user_lon, radius_km, limit)
+    if not hits:
+        return Response([])
+    rows = {row["id"]: row for row in ARScene.objects.filter(pk__in=[pk for _, pk in hits]).values(*SCENE_LIST_VALUES)}
+    hits = [(distance, pk) for distance, pk in hits if pk in rows]  # deleted since the index was built
+    scenes = scene_list_data((rows[pk] for _, pk in hits), request)
+    for scene, (distance, _) in zip(scenes, hits):
+        scene["distance_km"] = round(distance, 3)
+    return Response(scenes)
+
+
+def _scene_with_objects(pk):
+    try:
+        return ARScene.objects.prefetch_related("ar_objects").get(pk=pk)
+    except ARScene.DoesNotExist:
+        raise Http404("No such AR scene.")
+
+
+@query_budget(2)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+def scene_bundle(request, pk):
+    """
+    One scene with its AR objects and the URL, size and hash of every file
+    it uses, so a client can start the scene from a single request.
+    'packed_url' downloads the same files as one zip.
+    """
+    return Response(scene_manifest(_scene_with_objects(pk), request))
+
+
+@query_budget(2)
+@require_safe
+def scene_bundle_packed(request, pk, version):
+    """The manifest and files of a scene bundle version as one zip, with Range support."""
+    scene = _scene_with_objects(pk)
+    manifest = scene_manifest(scene, request)
+    if manifest["version"] != version:
+        raise Http404("No such AR scene bundle.")
+    name = PACKED_NAME.format(scene_id=scene.pk, version=version)
+    response = ranged_file_response(request, packed_bundle(scene, manifest), "application/zip",
+                                    etag=f'"{version}"', filename=name)
+    # The content of a version never changes.
+    patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
@@ -1,9 +1,22 @@
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.utils.encoding import filepath_to_uri
+from django.views.decorators.http import require_safe
 
+from apps.ar.assets import content_type_for
+from apps.ar.models import ARObject, ARScene
+from bicoltravelguide.query_budget import query_budget
+from bicoltravelguide.ranges import offloaded_file_response, ranged_file_response
+
+@query_budget(0)
 def webar_view(request, spot_id=None):
     context = {'spot_id': spot_id}
     return render(request, 'ar/webar_scene.html', context)
 
+@query_budget(0)
 def location_ar_view(request):
     # For now, just pass some dummy data
     context = {
@@ -12,3 +25,36 @@ def location_ar_view(request):
         'longitude': 0.0,
     }
     return render(request, 'ar/location_ar_scene.html', context)
+
+@query_budget(2)
+@require_safe
+def ar_asset(request, digest, name):
+    """
+    An AR scene's model, marker or pattern, or an AR object's image, by content hash.
+    Only files a scene or object currently references under that hash are
+    served; the bytes behind the URL never change, so clients may cache
+    them forever.
+    """
+    if not (
+        ARScene.objects.filter(
+            Q(model_file=name, model_hash=digest) | Q(marker_image=name, marker_hash=digest)
+            | Q(marker_pattern=name, pattern_hash=digest)
+        ).exists()
+        or ARObject.objects.filter(image=name, image_hash=digest).exists()
+    ):
+        raise Http404("No such AR asset.")
+
+    storage = ARScene._meta.get_field("model_file").storage
+    path = storage.path(name)
+    etag = f'"{digest}"'
+    content_type = content_type_for(name)
+    response = offloaded_file_response(
+        request, path, settings.MEDIA_ACCEL_PREFIX + filepath_to_uri(name), content_type, etag=etag
+    )
+    if response is None:
+        try:
+            response = ranged_file_response(request, path, content_type, etag=etag)
+        except FileNotFoundError:
+            raise Http404("No such AR asset.")
+    patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
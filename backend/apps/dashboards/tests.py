@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.tourism.models import Category, Location, SavedSpot, TouristSpot
+from bicoltravelguide.query_budget import QueryBudgetTestMixin
+
+
+class DashboardQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("tourist", password="pw")
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        category = Category.objects.create(name="Nature")
+        for i in range(3):
+            spot = TouristSpot.objects.create(
+                name=f"Spot {i}", description="", location=location, category=category,
+                is_featured=True, is_active=bool(i),
+            )
+            SavedSpot.objects.create(user=self.user, spot=spot)
+        self.client.force_login(self.user)
+
+    def test_dashboards(self):
+        for url in ['/dashboard/tourist/', '/dashboard/tourism/', '/dashboard/business/', '/dashboard/event/']:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(url)
@@ -3,7 +3,9 @@
 from django.shortcuts import render
 from apps.tourism.models import TouristSpot
 from apps.dashboards.views.cards_utils import get_dashboard_cards
+from bicoltravelguide.query_budget import query_budget
 
+@query_budget(3)
 def admin_dashboard(request):
     approved_spots = TouristSpot.objects.filter(is_active=True).select_related("location")[:10]
     dashboard_cards = get_dashboard_cards("Admin")
@@ -3,7 +3,9 @@
 from django.shortcuts import render
 from apps.business.models import Business
 from apps.dashboards.views.cards_utils import get_dashboard_cards
+from bicoltravelguide.query_budget import query_budget
 
+@query_budget(3)
 def business_dashboard(request):
     pending_businesses = Business.objects.filter(owner=request.user, is_approved=False)[:10]
     dashboard_cards = get_dashboard_cards("Business Owner")
@@ -4,7 +4,9 @@ from django.shortcuts import render
 from django.utils.timezone import now
 from apps.events.models import Event
 from apps.dashboards.views.cards_utils import get_dashboard_cards
+from bicoltravelguide.query_budget import query_budget
 
+@query_budget(3)
 def event_dashboard(request):
     upcoming_events = Event.objects.filter(organizer=request.user, date__gte=now()).order_by("date")[:10]
     dashboard_cards = get_dashboard_cards("Event Organizer")
@@ -3,7 +3,9 @@
 from django.shortcuts import render
 from apps.tourism.models import TouristSpot
 from apps.dashboards.views.cards_utils import get_dashboard_cards
+from bicoltravelguide.query_budget import query_budget
 
+@query_budget(3)
 def tourism_dashboard(request):
     pending_spots = TouristSpot.objects.filter(is_active=False).select_related("location")[:10]
     dashboard_cards = get_dashboard_cards("Tourism Officer")
@@ -1,4 +1,5 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from .exporter import export_snapshot
 from .models import TouristSpot, Review, Gallery, OperatingHour
 
 @admin.register(TouristSpot)
@@ -6,6 +7,14 @@ class TouristSpotAdmin(admin.ModelAdmin):
     list_display = ('name', 'location', 'is_featured', 'is_active')
     search_fields = ('name', 'description')
     list_filter = ('is_featured', 'location', 'is_active')
+    actions = ['export_csv_snapshot']
+
+    @admin.action(description="Export CSV snapshot of all spots to shared/static")
+    def export_csv_snapshot(self, request, queryset):
+        # The fallback CSVs mirror whole tables, so the selection is ignored.
+        written = export_snapshot()
+        summary = ", ".join(f"{count} rows to {path.rsplit('/', 1)[-1]}" for path, count in written)
+        self.message_user(request, f"Exported {summary}.", messages.SUCCESS)
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
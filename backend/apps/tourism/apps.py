@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class TourismConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tourism'  # Full Python import path
+
+    def ready(self):
+        from apps.tourism import signals  # noqa: F401
@@ -0,0 +1,113 @@
+# apps/tourism/autocomplete.py
+"""
+Per-worker prefix index for search-as-you-type.
+
+Every word of a spot's name, location and category is normalised (lower
+case, accents stripped) and stored in one sorted list of ``(word, spot)``
+pairs, so a prefix lookup is two bisects plus a walk over the matching range.
+The index is built from spots, locations and categories only, so it follows
+the spots version (reviews do not move it). After a change each worker keeps
+answering from its current index while a background job builds the new one;
+only a worker's first request builds it inline.
+"""
+import unicodedata
+from bisect import bisect_left
+
+from apps.tourism.models import TouristSpot
+from apps.tourism.versioning import VersionedValue, get_spots_version
+
+# Matches in the spot's own name outrank matches on its location/category.
+NAME_WEIGHT = 2
+CONTEXT_WEIGHT = 1
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return "".join(ch if ch.isalnum() else " " for ch in text).split()
+
+
+class PrefixIndex:
+    def __init__(self, spots):
+        """``spots``: iterable of dicts with id, name, name_url, province, location and category."""
+        self.spots = []
+        entries = []
+        for spot in spots:
+            index = len(self.spots)
+            self.spots.append({
+                "id": spot["id"],
+                "name": spot["name"],
+                "name_url": spot["name_url"],
+                "province": spot["province"],
+            })
+            name_words = normalize(spot["name"])
+            for word in name_words:
+                entries.append((word, index, NAME_WEIGHT))
+            for field in ("location", "province", "category"):
+                for word in normalize(spot.get(field)):
+                    if word not in name_words:
+                        entries.append((word, index, CONTEXT_WEIGHT))
+        entries.sort()
+        self.words = [word for word, _, _ in entries]
+        self.postings = [(index, weight) for _, index, weight in entries]
+        self.names = [" ".join(normalize(spot["name"])) for spot in self.spots]
+
+    def _prefix_matches(self, prefix):
+        """spot index -> best weight, for spots with a word starting with ``prefix``."""
+        matches = {}
+        lo = bisect_left(self.words, prefix)
+        hi = bisect_left(self.words, prefix + "\uffff", lo)
+        for index, weight in self.postings[lo:hi]:
+            if weight > matches.get(index, 0):
+                matches[index] = weight
+        return matches
+
+    def search(self, query, limit=10):
+        terms = normalize(query)
+        if not terms:
+            return []
+
+        scores = None
+        for term in terms:
+            matches = self._prefix_matches(term)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {index: scores[index] + weight for index, weight in matches.items() if index in scores}
+            if not scores:
+                return []
+
+        phrase = " ".join(terms)
+
+        def rank(index):
+            # Whole-name prefix first, then weight, then shorter/alphabetical names.
+            return (not self.names[index].startswith(phrase), -scores[index], len(self.names[index]), self.names[index])
+
+        return [self.spots[index] for index in sorted(scores, key=rank)[:limit]]
+
+
+def spots_for_index():
+    rows = (
+        TouristSpot.objects.filter(is_active=True)
+        .order_by("id")
+        .values_list("id", "name", "name_url", "location__name", "location__province", "category__name")
+    )
+    for spot_id, name, name_url, location, province, category in rows.iterator(chunk_size=2000):
+        yield {
+            "id": spot_id,
+            "name": name,
+            "name_url": name_url,
+            "province": province,
+            "location": location,
+            "category": category,
+        }
+
+
+_prefix_index = VersionedValue(
+    get_spots_version, lambda version: PrefixIndex(spots_for_index()), background="prefix-index",
+)
+
+
+def get_prefix_index():
+    """Return this worker's PrefixIndex; a rebuild is scheduled if the spots changed."""
+    return _prefix_index.get()
@@ -0,0 +1,176 @@
+# apps/tourism/catalog.py
+"""
+Process-wide cache of the CSV fallback catalog in shared/static.
+
+The spot, location and category CSVs are parsed once per worker and kept in
+indexed dicts. Every access re-checks the files' mtime/size (one stat per
+file) and only re-parses when one of them changed on disk.
+"""
+import csv
+import os
+import threading
+
+from django.conf import settings
+
+SPOT_CSV = "tourism_touristspot.csv"
+LOCATION_CSV = "tourism_location.csv"
+CATEGORY_CSV = "tourism_touristspot_category.csv"
+
+
+def catalog_dir():
+    return os.path.join(settings.BASE_DIR, "shared", "static")
+
+
+def clean_image_path(raw):
+    """Normalise a CSV image value to a path relative to the static root."""
+    if not raw:
+        return None
+    fixed = raw.replace("\\", "/")
+    marker = "shared/static/images/"
+    idx = fixed.find(marker)
+    if idx >= 0:
+        fixed = fixed[idx + len(marker):]
+    # ✅ Prevent double "images/" prefix
+    if fixed.startswith("images/"):
+        return fixed
+    return f"images/{fixed.lstrip('/')}"
+
+
+def _read_rows(path):
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class CSVCatalog:
+    """
+    Indexed view over the spot/location/category CSVs.
+
+    Rows are the raw csv.DictReader dicts; ``locations`` and ``categories``
+    are keyed by their (string) id, matching the ``*_id`` columns on spots.
+    """
+
+    def __init__(self, base_dir=None):
+        self.base_dir = base_dir or catalog_dir()
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.spots = []
+        self.locations = {}
+        self.categories = {}
+        self.spots_by_id = {}
+        self.spots_by_name_url = {}
+        self.spots_by_province = {}
+        self.spots_by_province_name_url = {}
+        self.image_map = {}
+        self._memo = {}
+
+    def _paths(self):
+        return [os.path.join(self.base_dir, name) for name in (SPOT_CSV, LOCATION_CSV, CATEGORY_CSV)]
+
+    def _current_stamp(self):
+        return tuple(_file_stamp(path) for path in self._paths())
+
+    def refresh(self):
+        """Re-parse the CSVs if any of them changed since the last load."""
+        stamp = self._current_stamp()
+        if stamp == self._stamp:
+            return self
+        with self._lock:
+            if stamp != self._stamp:
+                self._load()
+                self._stamp = stamp
+        return self
+
+    def _load(self):
+        spot_path, loc_path, cat_path = self._paths()
+        locations = {row["id"]: row for row in _read_rows(loc_path) if row.get("id")}
+        categories = {row["id"]: row for row in _read_rows(cat_path) if row.get("id")}
+
+        spots = _read_rows(spot_path)
+        by_id, by_name_url, by_province, by_province_name_url, image_map = {}, {}, {}, {}, {}
+        for row in spots:
+            spot_id = (row.get("id") or "").strip()
+            if spot_id:
+                by_id[spot_id] = row
+                try:
+                    image_map[int(spot_id)] = clean_image_path(row.get("image"))
+                except ValueError:
+                    pass
+            if row.get("name_url"):
+                by_name_url.setdefault(row["name_url"], row)
+            loc = locations.get(row.get("location_id"))
+            province = ((loc.get("province", "") if loc else row.get("province", "")) or "").strip().lower()
+            by_province.setdefault(province, []).append(row)
+            if row.get("name_url"):
+                # name_url is not unique across provinces
+                by_province_name_url.setdefault((province, row["name_url"]), row)
+
+        # Swap everything in at once so readers never see a half-built index.
+        self.spots = spots
+        self.locations = locations
+        self.categories = categories
+        self.spots_by_id = by_id
+        self.spots_by_name_url = by_name_url
+        self.spots_by_province = by_province
+        self.spots_by_province_name_url = by_province_name_url
+        self.image_map = image_map
+        self._memo = {}
+
+    # --- lookups ---------------------------------------------------------
+
+    def get_spot(self, spot_id):
+        return self.spots_by_id.get(str(spot_id).strip())
+
+    def get_spot_by_name_url(self, name_url, province=None):
+        """The first spot with ``name_url``, or the first in ``province`` if one is given."""
+        if province is not None:
+            return self.spots_by_province_name_url.get((province.strip().lower(), name_url))
+        return self.spots_by_name_url.get(name_url)
+
+    def spots_in_province(self, province):
+        return self.spots_by_province.get(province.strip().lower(), [])
+
+    def memo(self, key, build):
+        """
+        Return ``build()``, computed once per load of the CSVs.
+
+        Views use this to keep derived data (built spot dicts, position
+        indexes) that must be thrown away together with the rows.
+        """
+        memo = self._memo
+        try:
+            return memo[key]
+        except KeyError:
+            value = memo[key] = build()
+            return value
+
+    def province_of(self, row):
+        loc = self.locations.get(row.get("location_id"))
+        return ((loc.get("province", "") if loc else row.get("province", "")) or "").strip().lower()
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return this worker's shared CSVCatalog, reloaded if the files changed."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = CSVCatalog()
+    return _catalog.refresh()
@@ -0,0 +1,143 @@
+# apps/tourism/clusters.py
+"""
+Map marker clusters for tourist spots and AR scenes.
+
+Points are projected to Web Mercator and bucketed, per zoom level, into
+square cells CLUSTER_CELL_PX screen pixels wide; every occupied cell is a
+cluster at its members' mean position. All levels (0 to MAX_CLUSTER_ZOOM)
+are computed in one pass with NumPy when the index is built, and each
+worker keeps the index for the current catalog and scene versions, so a
+request only selects the clusters inside its viewport. Above
+MAX_CLUSTER_ZOOM every point is its own marker.
+"""
+import math
+
+import numpy as np
+
+from apps.ar.models import ARScene
+from apps.ar.spatial import get_scene_version
+from apps.tourism.models import TouristSpot
+from apps.tourism.versioning import VersionedValue, get_catalog_version
+
+TILE_SIZE = 256
+CLUSTER_CELL_PX = 64
+MAX_CLUSTER_ZOOM = 16
+MAX_ZOOM = 22
+MERCATOR_MAX_LAT = 85.05112878
+
+SPOT, SCENE = 0, 1
+KINDS = {SPOT: "spot", SCENE: "ar_scene"}
+
+
+class ClusterLevel:
+    """The clusters of one zoom level, with their members grouped by cluster."""
+
+    def __init__(self, cells, lat, lon):
+        _, inverse, self.counts = np.unique(cells, return_inverse=True, return_counts=True)
+        self.lat = np.bincount(inverse, weights=lat) / self.counts
+        self.lon = np.bincount(inverse, weights=lon) / self.counts
+        self.members = np.argsort(inverse, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(self.counts)))
+
+
+class MapClusterIndex:
+    def __init__(self, points):
+        """``points`` are ``(kind, id, name, latitude, longitude, category)`` tuples."""
+        points = list(points)
+        self.kinds = np.array([point[0] for point in points], dtype=np.int8)
+        self.ids = np.array([point[1] for point in points], dtype=np.int64)
+        self.names = [point[2] for point in points]
+        self.lat = np.array([point[3] for point in points], dtype=np.float64)
+        self.lon = np.array([point[4] for point in points], dtype=np.float64)
+        self.category_names = sorted({point[5] for point in points if point[0] == SPOT and point[5]})
+        label = {name: position for position, name in enumerate(self.category_names)}
+        # -1 for AR scenes (and spots without a category)
+        self.labels = np.array([label.get(point[5], -1) if point[0] == SPOT else -1 for point in points], dtype=np.int64)
+
+        # World coordinates in [0, 1), then cell indices at MAX_CLUSTER_ZOOM;
+        # a cell at zoom z - 1 covers 2 x 2 cells at zoom z.
+        x = (self.lon + 180) / 360
+        sin_lat = np.sin(np.radians(np.clip(self.lat, -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT)))
+        y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+        cells_per_side = 2 ** MAX_CLUSTER_ZOOM * TILE_SIZE // CLUSTER_CELL_PX
+        cx = np.clip((x * cells_per_side).astype(np.int64), 0, cells_per_side - 1)
+        cy = np.clip((y * cells_per_side).astype(np.int64), 0, cells_per_side - 1)
+        self.levels = []
+        for zoom in range(MAX_CLUSTER_ZOOM + 1):
+            shift = MAX_CLUSTER_ZOOM - zoom
+            self.levels.append(ClusterLevel(((cx >> shift) << 32) | (cy >> shift), self.lat, self.lon))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _point(self, position):
+        kind = int(self.kinds[position])
+        label = int(self.labels[position])
+        return {
+            "type": KINDS[kind],
+            "id": int(self.ids[position]),
+            "name": self.names[position],
+            "lat": float(self.lat[position]),
+            "lon": float(self.lon[position]),
+            "category": self.category_names[label] if label >= 0 else None,
+        }
+
+    @staticmethod
+    def _in_bbox(lat, lon, west, south, east, north):
+        inside_lat = (lat >= south) & (lat <= north)
+        if west <= east:
+            return inside_lat & (lon >= west) & (lon <= east)
+        # The viewport crosses the antimeridian.
+        return inside_lat & ((lon >= west) | (lon <= east))
+
+    def query(self, west, south, east, north, zoom):
+        """``{"clusters": [...], "points": [...]}`` inside the bounding box at ``zoom``."""
+        if zoom > MAX_CLUSTER_ZOOM:
+            positions = np.flatnonzero(self._in_bbox(self.lat, self.lon, west, south, east, north))
+            return {"clusters": [], "points": [self._point(position) for position in positions]}
+
+        level = self.levels[zoom]
+        clusters, points = [], []
+        for index in np.flatnonzero(self._in_bbox(level.lat, level.lon, west, south, east, north)):
+            members = level.members[level.offsets[index]:level.offsets[index + 1]]
+            if len(members) == 1:
+                points.append(self._point(members[0]))
+                continue
+            spots = members[self.kinds[members] == SPOT]
+            labels = self.labels[spots]
+            breakdown = np.bincount(labels[labels >= 0], minlength=len(self.category_names))
+            clusters.append({
+                "lat": float(level.lat[index]),
+                "lon": float(level.lon[index]),
+                "count": int(level.counts[index]),
+                "spots": len(spots),
+                "ar_scenes": len(members) - len(spots),
+                "categories": {
+                    self.category_names[label]: int(count) for label, count in enumerate(breakdown) if count
+                },
+            })
+        return {"clusters": clusters, "points": points}
+
+
+def map_points():
+    spots = (
+        TouristSpot.objects.filter(is_active=True, latitude__isnull=False, longitude__isnull=False)
+        .order_by("pk").values_list("id", "name", "latitude", "longitude", "category__name")
+    )
+    scenes = ARScene.objects.order_by("pk").values_list("id", "name", "latitude", "longitude")
+    for pk, name, lat, lon, category in spots:
+        yield SPOT, pk, name, lat, lon, category
+    for pk, name, lat, lon in scenes:
+        yield SCENE, pk, name, lat, lon, None
+
+
+def map_version():
+    return f"{get_catalog_version()}-{get_scene_version()}"
+
+
+_cluster_index = VersionedValue(map_version, lambda version: MapClusterIndex(map_points()))
+
+
+def get_cluster_index():
+    """Return this worker's MapClusterIndex, rebuilding it if a spot or scene changed."""
+    return _cluster_index.get()
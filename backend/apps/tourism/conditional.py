@@ -0,0 +1,37 @@
+# apps/tourism/conditional.py
+"""
+Conditional GET for the spot API, driven by the catalog version stamp.
+
+The ETag is the catalog version plus the negotiated format, and
+Last-Modified is the time of the last catalog change. Both come from the
+cache, so a request carrying a current ``If-None-Match`` or
+``If-Modified-Since`` gets its 304 after authentication without the view
+building a queryset or running the serializer.
+"""
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from apps.tourism.versioning import get_catalog_modified, get_catalog_version
+
+
+def catalog_etag(request):
+    renderer = getattr(request, "accepted_renderer", None)
+    return f'"{get_catalog_version()}-{renderer.format if renderer else "json"}"'
+
+
+class CatalogConditionalGetMixin:
+    """For DRF views whose GET output only changes with the catalog."""
+
+    def get(self, request, *args, **kwargs):
+        etag = catalog_etag(request)
+        last_modified = get_catalog_modified()
+
+        # Read the version before the data, so a change made mid-request
+        # leaves this response with an already-stale ETag, never the reverse.
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified)
+        return response
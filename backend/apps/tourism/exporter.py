@@ -0,0 +1,69 @@
+# apps/tourism/exporter.py
+"""
+Streaming DB -> CSV snapshot of the tables behind the shared/static fallback.
+
+Rows are pulled with server-side cursors (``.iterator(chunk_size=...)``) and
+written straight to a temp file in the destination directory, which is then
+renamed over the old CSV. Memory stays flat regardless of table size, and the
+CSV-backed views only ever see the old file or the complete new one.
+"""
+import csv
+import os
+import tempfile
+
+from apps.tourism.catalog import CATEGORY_CSV, LOCATION_CSV, SPOT_CSV, catalog_dir
+from apps.tourism.models import Category, Location, TouristSpot
+
+# Column order matches the files that already live in shared/static.
+SNAPSHOT_TABLES = [
+    (CATEGORY_CSV, Category, ['id', 'name']),
+    (LOCATION_CSV, Location, ['id', 'name', 'region', 'province']),
+    (SPOT_CSV, TouristSpot, [
+        'id', 'name', 'description', 'created_at', 'category_id', 'location_id', 'is_active', 'image',
+        'is_featured', 'map_embed', 'website', 'rating', 'address', 'name_url',
+    ]),
+]
+
+
+def _csv_value(value):
+    return '' if value is None else value
+
+
+def write_csv_atomic(path, header, rows):
+    """Write ``rows`` to ``path`` through a temp file + rename; returns the row count."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    count = 0
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow([_csv_value(value) for value in row])
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return count
+
+
+def export_snapshot(output_dir=None, chunk_size=2000):
+    """
+    Export categories, locations and spots to CSV.
+
+    Returns a list of ``(path, row_count)``. Categories and locations are
+    written first so the spot file never references ids that are missing.
+    """
+    output_dir = output_dir or catalog_dir()
+    written = []
+    for filename, model, columns in SNAPSHOT_TABLES:
+        rows = model.objects.order_by('id').values_list(*columns).iterator(chunk_size=chunk_size)
+        path = os.path.join(output_dir, filename)
+        written.append((path, write_csv_atomic(path, columns, rows)))
+    return written
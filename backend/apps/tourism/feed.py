@@ -0,0 +1,56 @@
+# apps/tourism/feed.py
+"""
+Building blocks for the mobile home feed (/api/feed/) and the tourist
+dashboard.
+
+The profile and the three dashboard counts come back from one statement (a
+row of scalar subqueries on the user), the featured and recently saved spots
+from one ``.values()`` query each, in the /api/tourism-spots/ row format.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models import OuterRef, Subquery
+
+from apps.tourism.models import SavedSpot, TouristSpot, VisitedSpot
+from apps.tourism.serializers import SPOT_LIST_VALUES, spot_list_data
+from bicoltravelguide.queries import count_subquery
+
+FEED_SPOT_LIMIT = 10
+BATCH_MAX_IDS = 100
+
+
+def profile_and_counts(user):
+    """
+    The /api/auth/me/ profile of ``user`` plus its dashboard counts, in one query.
+    Role is the user's first group, as on /api/auth/me/.
+    """
+    row = (
+        get_user_model().objects.filter(pk=user.pk)
+        .values(
+            "id", "username", "email",
+            group=Subquery(Group.objects.filter(user=OuterRef("pk")).order_by("pk").values("name")[:1]),
+            approved_spots_count=count_subquery(TouristSpot.objects.filter(is_active=True), "is_active"),
+            saved_spots_count=count_subquery(SavedSpot.objects.filter(user=OuterRef("pk")), "user"),
+            visited_spots_count=count_subquery(VisitedSpot.objects.filter(user=OuterRef("pk")), "user"),
+        )
+        .get()
+    )
+    profile = {key: row.pop(key) for key in ("id", "username", "email")}
+    profile["role"] = row.pop("group") or "Unknown"
+    return profile, row
+
+
+def featured_spots(limit=FEED_SPOT_LIMIT):
+    rows = TouristSpot.objects.filter(is_active=True, is_featured=True).order_by("-created_at")[:limit]
+    return spot_list_data(rows.values(*SPOT_LIST_VALUES))
+
+
+def recently_saved_spots(user, limit=FEED_SPOT_LIMIT):
+    rows = TouristSpot.objects.filter(savedspot__user=user).order_by("-savedspot__saved_at", "-savedspot__id")[:limit]
+    return spot_list_data(rows.values(*SPOT_LIST_VALUES))
+
+
+def spots_by_id(ids):
+    """Spots for ``ids`` in the order given; ids with no spot are left out."""
+    rows = {row["id"]: row for row in TouristSpot.objects.filter(pk__in=ids).values(*SPOT_LIST_VALUES)}
+    return spot_list_data(rows[pk] for pk in ids if pk in rows)
@@ -0,0 +1,96 @@
+# apps/tourism/fieldsets.py
+"""
+Sparse fieldsets for the tourism API.
+
+``?fields=id,name`` keeps only the listed fields, ``?view=compact`` keeps a
+serializer's ``Meta.compact_fields`` (what list screens show) and
+``?expand=location`` swaps a foreign key's id for the nested object named in
+``Meta.expandable_fields``. SparseFieldsetQuerysetMixin then narrows the SQL
+to the columns those fields read with ``.only()`` and joins the expanded
+relations with ``select_related()``.
+"""
+from rest_framework import serializers
+
+
+def _param_list(request, name):
+    return [value.strip() for value in request.query_params.get(name, "").split(",") if value.strip()]
+
+
+def selected_fields(request, meta):
+    """Names of the fields ``request`` asked for, or None for all of them."""
+    fields = _param_list(request, "fields")
+    if fields:
+        return set(fields)
+    if request.query_params.get("view") == "compact" and hasattr(meta, "compact_fields"):
+        return set(meta.compact_fields)
+    return None
+
+
+def expanded_fields(request, meta):
+    expandable = getattr(meta, "expandable_fields", {})
+    return {name: expandable[name] for name in _param_list(request, "expand") if name in expandable}
+
+
+def _lookup_path(lookup):
+    return getattr(lookup, "prefetch_through", lookup)
+
+
+class SparseFieldsMixin:
+    """ModelSerializer mixin applying ``?fields=``, ``?view=compact`` and ``?expand=``."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        root = self.parent.parent if isinstance(self.parent, serializers.ListSerializer) else self.parent
+        if request is None or root is not None:
+            # Nested serializers always render in full.
+            return fields
+
+        for name, serializer_class in expanded_fields(request, self.Meta).items():
+            if name in fields:
+                fields[name] = serializer_class(read_only=True)
+
+        keep = selected_fields(request, self.Meta)
+        if keep is not None:
+            fields = {name: field for name, field in fields.items() if name in keep}
+        return fields
+
+
+class SparseFieldsetQuerysetMixin:
+    """
+    Generic view mixin: on reads, load only the columns the (sparse)
+    serializer renders, plus the primary key and the pagination order.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in ("GET", "HEAD"):
+            return queryset
+
+        opts = queryset.model._meta
+        columns = {field.name for field in opts.concrete_fields}
+        relations = {rel.get_accessor_name() for rel in opts.related_objects} | {f.name for f in opts.many_to_many}
+        only = {opts.pk.name, *getattr(self.paginator, "ordering", ())}
+        related, prefetched = [], set()
+        for field in self.get_serializer().fields.values():
+            if field.source in relations:
+                prefetched.add(field.source)  # loaded by prefetch_related, needs only the pk
+                continue
+            if field.source not in columns:
+                # Reads something other than a column (a method field, a
+                # property); nothing is safe to defer.
+                return queryset
+            only.add(field.source)
+            if isinstance(field, serializers.BaseSerializer):
+                related.append(field.source)
+                related_columns = {f.name for f in opts.get_field(field.source).related_model._meta.concrete_fields}
+                only.update(
+                    f"{field.source}__{sub.source}" for sub in field.fields.values() if sub.source in related_columns
+                )
+        if related:
+            queryset = queryset.select_related(*related)
+        lookups = queryset._prefetch_related_lookups
+        wanted = [lookup for lookup in lookups if _lookup_path(lookup).split("__")[0] in prefetched]
+        if len(wanted) < len(lookups):
+            queryset = queryset.prefetch_related(None).prefetch_related(*wanted)
+        return queryset.only(*only)
@@ -1,5 +1,7 @@
 import django_filters
 from .models import TouristSpot, TourismReportedSpotAlbay
+from .fuzzy import fuzzy_search_spots
+from .search import search_spots
 
 
 
@@ -7,10 +9,18 @@ class TouristSpotFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='icontains')
     category = django_filters.CharFilter(field_name='category__name', lookup_expr='icontains')
     location = django_filters.CharFilter(field_name='location__name', lookup_expr='icontains')
+    search = django_filters.CharFilter(method='filter_search')  # ranked full-text search
+    fuzzy = django_filters.CharFilter(method='filter_fuzzy')  # typo-tolerant name/place match
 
     class Meta:
         model = TouristSpot
-        fields = ['name', 'category', 'location']
+        fields = ['name', 'category', 'location', 'search', 'fuzzy']
+
+    def filter_search(self, queryset, name, value):
+        return search_spots(queryset, value)
+
+    def filter_fuzzy(self, queryset, name, value):
+        return fuzzy_search_spots(queryset, value)
 
 
 class TourismReportedSpotFilter(django_filters.FilterSet):
@@ -0,0 +1,145 @@
+# apps/tourism/fuzzy.py
+"""
+Typo-tolerant matching on spot and place names ("Mayyon", "Cagsaua").
+
+Scores are pg_trgm word similarity: the share of the query's trigrams found
+in the best-matching stretch of a name, so "Cagsaua" scores well against
+"Cagsawa Ruins". On PostgreSQL the ``%>`` operator (GIN trigram indexes on
+``tourism_touristspot.name`` and ``tourism_location.name``) narrows the
+candidates and ``word_similarity()`` ranks them. Other backends use
+TrigramIndex, an in-process inverted index over the same trigrams, rebuilt
+when the catalog version changes.
+"""
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from apps.tourism.models import TouristSpot
+from apps.tourism.search import search_spots, uses_postgres_search
+from apps.tourism.versioning import VersionedValue, get_catalog_version
+
+FUZZY_THRESHOLD = 0.6  # pg_trgm's default word_similarity_threshold
+FUZZY_LIMIT = 20
+
+
+def _words(text):
+    return "".join(ch if ch.isalnum() else " " for ch in (text or "").lower()).split()
+
+
+def _word_trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def trigrams(text):
+    """Trigram set of ``text``, built the way pg_trgm does it."""
+    grams = set()
+    for word in _words(text):
+        grams |= _word_trigrams(word)
+    return grams
+
+
+def word_similarity(query_grams, word_grams, span):
+    """
+    Best share of ``query_grams`` found in any ``span`` consecutive words,
+    ``word_grams`` being the per-word trigram sets of the target.
+    """
+    if not query_grams or not word_grams:
+        return 0.0
+    best = 0
+    for start in range(max(len(word_grams) - span, 0) + 1):
+        window = set().union(*word_grams[start:start + span])
+        best = max(best, len(query_grams & window))
+    return best / len(query_grams)
+
+
+class TrigramIndex:
+    def __init__(self, rows):
+        """``rows``: iterable of ``(spot id, spot name, location name)``."""
+        self.names = {}
+        self.postings = {}
+        for spot_id, *names in rows:
+            per_name = [[_word_trigrams(word) for word in _words(name)] for name in names if name]
+            self.names[spot_id] = per_name
+            for word_grams in per_name:
+                for grams in word_grams:
+                    for gram in grams:
+                        postings = self.postings.setdefault(gram, [])
+                        if not postings or postings[-1] != spot_id:
+                            postings.append(spot_id)
+
+    def search(self, query, threshold=FUZZY_THRESHOLD):
+        """``[(spot id, score), ...]`` best first, for spots at or above ``threshold``."""
+        query_grams = trigrams(query)
+        span = max(len(_words(query)), 1)
+        candidates = set()
+        for gram in query_grams:
+            candidates.update(self.postings.get(gram, ()))
+
+        scored = []
+        for spot_id in candidates:
+            score = max(
+                (word_similarity(query_grams, word_grams, span) for word_grams in self.names[spot_id]),
+                default=0.0,
+            )
+            if score >= threshold:
+                scored.append((spot_id, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+
+def _build_trigram_index(version):
+    rows = TouristSpot.objects.values_list("id", "name", "location__name").iterator(chunk_size=2000)
+    return TrigramIndex(rows)
+
+
+_trigram_index = VersionedValue(get_catalog_version, _build_trigram_index)
+
+
+def get_trigram_index():
+    return _trigram_index.get()
+
+
+def fuzzy_search_spots(queryset, query, threshold=FUZZY_THRESHOLD, limit=None):
+    """
+    Spots in ``queryset`` whose name or location name resembles ``query``,
+    annotated with ``similarity`` and ordered best first.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset
+
+    if uses_postgres_search():
+        spots = (
+            queryset.filter(Q(name__trigram_word_similar=query) | Q(location__name__trigram_word_similar=query))
+            .annotate(similarity=Greatest(
+                TrigramWordSimilarity(query, "name"),
+                TrigramWordSimilarity(query, "location__name"),
+            ))
+            .filter(similarity__gte=threshold)
+            .order_by("-similarity", "id")
+        )
+    else:
+        scored = get_trigram_index().search(query, threshold)
+        if limit is not None:
+            # Over-fetch: some of the best matches may be outside ``queryset``.
+            scored = scored[:limit * 4]
+        scores = dict(scored)
+        spots = (
+            queryset.filter(pk__in=scores)
+            .annotate(similarity=Case(
+                *[When(pk=pk, then=Value(score)) for pk, score in scored],
+                default=Value(0.0), output_field=FloatField(),
+            ))
+            .order_by("-similarity", "id")
+        )
+    return spots[:limit] if limit is not None else spots
+
+
+def search_with_fuzzy_fallback(queryset, query, limit=FUZZY_LIMIT):
+    """Ranked full-text search; if nothing matches, the closest names instead."""
+    spots = search_spots(queryset, query)
+    if not (query or "").strip() or spots.exists():
+        return spots
+    return fuzzy_search_spots(queryset, query, limit=limit)
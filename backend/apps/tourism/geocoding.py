@@ -0,0 +1,36 @@
+# apps/tourism/geocoding.py
+"""
+Coordinates from the Google Maps links stored in TouristSpot.map_embed.
+
+map_embed holds an embed URL or a whole <iframe> snippet. Embed URLs carry
+the map centre as ``!2d<lng>!3d<lat>`` inside the ``pb=`` parameter; place
+links carry the pin as ``!3d<lat>!4d<lng>``; search and share links use
+``q=lat,lng``, ``ll=lat,lng``, ``center=lat,lng`` or ``@lat,lng``.
+"""
+import html
+import re
+from urllib.parse import unquote
+
+_NUMBER = r"(-?\d{1,3}(?:\.\d+)?)"
+_PAIR = rf"{_NUMBER}\s*,\s*{_NUMBER}"
+
+# (pattern, index of the latitude group, index of the longitude group), most precise first
+PATTERNS = [
+    (re.compile(rf"!3d{_NUMBER}!4d{_NUMBER}"), 1, 2),
+    (re.compile(rf"!2d{_NUMBER}!3d{_NUMBER}"), 2, 1),
+    (re.compile(rf"[?&](?:q|query|ll|center|destination)={_PAIR}"), 1, 2),
+    (re.compile(rf"@{_PAIR}"), 1, 2),
+]
+
+
+def parse_map_embed(map_embed):
+    """``(latitude, longitude)`` from a map_embed value, or None if it has none."""
+    if not map_embed:
+        return None
+    text = unquote(html.unescape(map_embed))
+    for pattern, lat_group, lon_group in PATTERNS:
+        for match in pattern.finditer(text):
+            lat, lon = float(match.group(lat_group)), float(match.group(lon_group))
+            if -90 <= lat <= 90 and -180 <= lon <= 180 and (lat, lon) != (0, 0):
+                return lat, lon
+    return None
@@ -0,0 +1,213 @@
+# apps/tourism/heatmap.py
+"""
+Popularity heatmap tiles (/tiles/heatmap/{z}/{x}/{y}.png).
+
+Every active spot with coordinates is a point weighted by its saves, visits
+and reviews. A tile is the sum of a Gaussian of TILE_RADIUS_PX pixels around
+each nearby point, computed with NumPy as one product of two separable
+kernel matrices, scaled logarithmically against the busiest spot (so every
+tile shares one colour scale) and coloured through PALETTE by Pillow.
+
+Tiles are written to settings.HEATMAP_TILE_DIR under the heatmap version,
+a hash of the points and weights, and rendered only when first requested.
+Each worker keeps the points for the current catalog and activity
+stamps; when those move it reloads the points, and only if the hash
+changed do requests land in a new (empty) version directory. Tiles are
+written to a temporary file and renamed into place, and a version directory
+is removed only TILE_PRUNE_GRACE after the last worker loaded it.
+"""
+import hashlib
+import io
+import math
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, OuterRef
+from PIL import Image
+
+from apps.tourism.models import Review, SavedSpot, TouristSpot, VisitedSpot
+from apps.tourism.versioning import VersionedValue, VersionStamp, get_catalog_version
+from bicoltravelguide.queries import count_subquery
+
+TILE_SIZE = 256
+TILE_RADIUS_PX = 24
+MAX_TILE_ZOOM = 18
+TILE_PRUNE_GRACE = 10 * 60  # seconds a retired version's tiles are kept
+MERCATOR_MAX_LAT = 85.05112878
+ACTIVITY_VERSION_KEY = "tourism:activity-version"
+
+# (position, (r, g, b, a)) colour stops, from no activity to the busiest spot
+PALETTE_STOPS = [
+    (0.0, (0, 0, 255, 0)),
+    (0.25, (0, 128, 255, 110)),
+    (0.5, (0, 220, 120, 160)),
+    (0.75, (255, 220, 0, 200)),
+    (1.0, (230, 20, 20, 230)),
+]
+_positions = [position for position, _ in PALETTE_STOPS]
+PALETTE = np.stack(
+    [np.interp(np.linspace(0, 1, 256), _positions, [color[c] for _, color in PALETTE_STOPS]) for c in range(4)],
+    axis=1,
+).astype(np.uint8)
+
+
+# Bumped by saves and visits, which the catalog version does not cover.
+activity_version = VersionStamp(ACTIVITY_VERSION_KEY)
+get_activity_version = activity_version.get
+bump_activity_version = activity_version.bump
+
+
+def tile_dir():
+    return Path(settings.HEATMAP_TILE_DIR)
+
+
+def tile_in_range(z, x, y):
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+class HeatmapPoints:
+    """Spot positions in world coordinates ([0, 1) across the Web Mercator square) with their weights."""
+
+    def __init__(self, rows):
+        rows = [row for row in rows if row[2] > 0]
+        lat = np.array([row[0] for row in rows], dtype=np.float64)
+        lon = np.array([row[1] for row in rows], dtype=np.float64)
+        self.weights = np.array([row[2] for row in rows], dtype=np.float64)
+        self.x = (lon + 180) / 360
+        sin_lat = np.sin(np.radians(np.clip(lat, -MERCATOR_MAX_LAT, MERCATOR_MAX_LAT)))
+        self.y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+        self.scale = math.log1p(self.weights.max()) if len(rows) else 1.0
+        self.version = hashlib.sha256(
+            np.stack([self.x, self.y, self.weights]).tobytes()
+        ).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.weights)
+
+    def render(self, z, x, y):
+        """RGBA array of tile (z, x, y), or None if no point reaches it."""
+        # Point positions in this tile's pixels
+        size = TILE_SIZE * 2 ** z
+        px = self.x * size - x * TILE_SIZE
+        py = self.y * size - y * TILE_SIZE
+        reach = 3 * TILE_RADIUS_PX
+        near = (px > -reach) & (px < TILE_SIZE + reach) & (py > -reach) & (py < TILE_SIZE + reach)
+        if not near.any():
+            return None
+
+        # density[row, col] = sum over points of w * g(row - py) * g(col - px)
+        centers = np.arange(TILE_SIZE) + 0.5
+        sigma2 = 2 * (TILE_RADIUS_PX / 2) ** 2
+        rows = np.exp(-((centers[:, None] - py[near]) ** 2) / sigma2) * self.weights[near]
+        cols = np.exp(-((centers[:, None] - px[near]) ** 2) / sigma2)
+        density = rows @ cols.T
+
+        level = np.clip(np.log1p(density) / self.scale, 0, 1)
+        return PALETTE[(level * 255).astype(np.uint8)]
+
+
+def heatmap_rows():
+    """``(latitude, longitude, saves + visits + reviews)`` for every active spot with coordinates, in one query."""
+    return (
+        TouristSpot.objects.filter(is_active=True, latitude__isnull=False, longitude__isnull=False)
+        .annotate(
+            saves=count_subquery(SavedSpot.objects.filter(spot=OuterRef("pk")), "spot"),
+            visits=count_subquery(VisitedSpot.objects.filter(spot=OuterRef("pk")), "spot"),
+            reviews=count_subquery(Review.objects.filter(tourist_spot=OuterRef("pk")), "tourist_spot"),
+        )
+        .order_by("pk")
+        .values_list("latitude", "longitude", F("saves") + F("visits") + F("reviews"))
+    )
+
+
+def encode_png(rgba):
+    out = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+_empty_tile = None
+
+
+def empty_tile():
+    global _empty_tile
+    if _empty_tile is None:
+        _empty_tile = encode_png(np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8))
+    return _empty_tile
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def prune_tile_cache(keep, directory=None, grace=TILE_PRUNE_GRACE):
+    """
+    Remove the cached tiles of heatmap versions other than ``keep`` that no
+    worker has loaded for ``grace`` seconds. A worker still on an older
+    version writes into its directory until its next request notices the
+    new stamp, so a version is only dropped once it has been retired a while.
+    """
+    directory = directory or tile_dir()
+    if not directory.is_dir():
+        return
+    cutoff = time.time() - grace
+    for entry in directory.iterdir():
+        try:
+            if entry.is_dir() and entry.name != keep and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+        except FileNotFoundError:  # pruned by another worker meanwhile
+            continue
+
+
+def get_tile(z, x, y):
+    """
+    ``(version, png bytes)`` of a tile, from the disk cache or rendered and
+    stored there. Tiles no point reaches share one transparent PNG and are
+    not stored.
+    """
+    points = get_heatmap_points()
+    path = tile_dir() / points.version / str(z) / str(x) / f"{y}.png"
+    try:
+        return points.version, path.read_bytes()
+    except FileNotFoundError:
+        pass
+
+    rgba = points.render(z, x, y)
+    if rgba is None:
+        return points.version, empty_tile()
+    data = encode_png(rgba)
+    try:
+        _write_atomic(path, data)
+    except OSError:  # e.g. the version was pruned under a slow worker; serve it uncached
+        pass
+    return points.version, data
+
+
+def heatmap_stamp():
+    return (get_catalog_version(), get_activity_version())
+
+
+def _load_points(stamp):
+    points = HeatmapPoints(heatmap_rows())
+    current = tile_dir() / points.version
+    current.mkdir(parents=True, exist_ok=True)
+    os.utime(current)  # in use, as far as prune_tile_cache() is concerned
+    prune_tile_cache(keep=points.version)
+    return points
+
+
+_points = VersionedValue(heatmap_stamp, _load_points)
+
+
+def get_heatmap_points():
+    """Return this worker's HeatmapPoints, reloading them if a spot, review, save or visit changed."""
+    return _points.get()
@@ -0,0 +1,278 @@
+# apps/tourism/importer.py
+"""
+Streaming bulk importer for tourist spot CSVs.
+
+Rows are read in chunks; categories and locations are resolved through
+in-memory caches (missing ones are bulk-created once per chunk) and spots are
+upserted on ``name_url`` with a single ``bulk_create(update_conflicts=True)``
+per chunk, so an import costs a handful of queries per chunk instead of 3-5
+per row. The chunk's search vectors are then refreshed in one UPDATE.
+"""
+import csv
+import time
+from itertools import islice
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from apps.tourism.geocoding import parse_map_embed
+from apps.tourism.models import Category, Location, TouristSpot
+from apps.tourism.search import update_search_vectors
+from apps.tourism.versioning import bump_spots_version
+
+SPOT_UPDATE_FIELDS = [
+    'name', 'description', 'category', 'location', 'image', 'rating', 'address',
+    'map_embed', 'latitude', 'longitude', 'website', 'is_featured', 'is_active', 'updated_at',
+]
+
+TRUE_VALUES = {'true', '1', 'yes', 't', 'y'}
+FALSE_VALUES = {'false', '0', 'no', 'f', 'n'}
+
+
+def spot_name_url(name):
+    # Same rule as TouristSpot.save(), which bulk_create does not call.
+    return slugify(name.replace(" ", ""))
+
+
+def _parse_bool(value, default=False):
+    value = (value or '').strip().lower()
+    if not value:
+        return default
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _parse_rating(value):
+    if value is None or not value.strip():
+        return None
+    return float(value)
+
+
+class ImportStats:
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.categories_created = 0
+        self.locations_created = 0
+        self.errors = []  # (line number, message)
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class SpotImporter:
+    """
+    Import spots from a CSV file.
+
+    Accepted columns: ``name`` (required), ``description``, ``category_name``
+    (or ``category_id`` of an existing category), ``location_name``,
+    ``region``, ``province`` (or ``location_id``), ``image``, ``rating``,
+    ``address``, ``map_embed``/``embed_link``, ``website``/``website_link``,
+    ``is_featured``, ``is_active`` and ``name_url``.
+
+    With ``dry_run=True`` every row is parsed and validated but nothing is
+    written.
+    """
+
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.categories = {}
+        self.locations = {}
+        self.category_ids = set()
+        self.location_ids = set()
+
+    def _load_caches(self):
+        for pk, name in Category.objects.values_list('id', 'name'):
+            self.categories.setdefault(name.strip().lower(), pk)
+            self.category_ids.add(pk)
+        for pk, name, region, province in Location.objects.values_list('id', 'name', 'region', 'province'):
+            self.locations.setdefault(self._location_key(name, region, province), pk)
+            self.location_ids.add(pk)
+
+    @staticmethod
+    def _location_key(name, region, province):
+        return (name.strip().lower(), (region or '').strip().lower(), (province or '').strip().lower())
+
+    # --- parsing ---------------------------------------------------------
+
+    def _parse_row(self, row):
+        """Turn a CSV row into a plain dict of spot values; raises ValueError."""
+        name = (row.get('name') or '').strip()
+        if not name:
+            raise ValueError("missing name")
+
+        category_name = (row.get('category_name') or row.get('category') or '').strip()
+        category_id = (row.get('category_id') or '').strip()
+        if not category_name and not category_id:
+            raise ValueError("missing category_name or category_id")
+
+        location_name = (row.get('location_name') or '').strip()
+        location_id = (row.get('location_id') or '').strip()
+        if not location_name and not location_id:
+            raise ValueError("missing location_name or location_id")
+
+        map_embed = row.get('map_embed') or row.get('embed_link') or ''
+        latitude, longitude = parse_map_embed(map_embed) or (None, None)
+
+        return {
+            'name': name,
+            'name_url': (row.get('name_url') or '').strip() or spot_name_url(name),
+            'description': row.get('description') or '',
+            'category_name': category_name,
+            'category_id': int(category_id) if category_id and not category_name else None,
+            'location': (location_name, row.get('region') or '', row.get('province') or '') if location_name else None,
+            'location_id': int(location_id) if location_id and not location_name else None,
+            'image': row.get('image') or None,
+            'rating': _parse_rating(row.get('rating')),
+            'address': row.get('address') or None,
+            'map_embed': map_embed,
+            'latitude': latitude,
+            'longitude': longitude,
+            'website': row.get('website') or row.get('website_link') or None,
+            'is_featured': _parse_bool(row.get('is_featured')),
+            'is_active': _parse_bool(row.get('is_active'), default=True),
+        }
+
+    # --- resolving -------------------------------------------------------
+
+    def _resolve_categories(self, parsed, stats):
+        missing = {}
+        for values in parsed:
+            name = values['category_name']
+            if name and name.lower() not in self.categories:
+                missing.setdefault(name.lower(), name)
+        if missing:
+            created = Category.objects.bulk_create([Category(name=name) for name in missing.values()])
+            for category in created:
+                self.categories[category.name.lower()] = category.pk
+                self.category_ids.add(category.pk)
+            stats.categories_created += len(created)
+
+    def _resolve_locations(self, parsed, stats):
+        missing = {}
+        for values in parsed:
+            if values['location']:
+                key = self._location_key(*values['location'])
+                if key not in self.locations:
+                    missing.setdefault(key, values['location'])
+        if missing:
+            created = Location.objects.bulk_create([
+                Location(name=name.strip(), region=region.strip(), province=province.strip())
+                for name, region, province in missing.values()
+            ])
+            for location in created:
+                self.locations[self._location_key(location.name, location.region, location.province)] = location.pk
+                self.location_ids.add(location.pk)
+            stats.locations_created += len(created)
+
+    def _category_pk(self, values):
+        if values['category_name']:
+            return self.categories.get(values['category_name'].lower())
+        return values['category_id'] if values['category_id'] in self.category_ids else None
+
+    def _known_references(self, values):
+        """Whether the row's category and location exist or are named (and so can be created)."""
+        return (
+            (values['category_name'] or values['category_id'] in self.category_ids)
+            and (values['location'] or values['location_id'] in self.location_ids)
+        )
+
+    def _location_pk(self, values):
+        if values['location']:
+            return self.locations.get(self._location_key(*values['location']))
+        return values['location_id'] if values['location_id'] in self.location_ids else None
+
+    # --- import ----------------------------------------------------------
+
+    def _import_chunk(self, chunk, stats):
+        parsed = []
+        for line_no, row in chunk:
+            try:
+                parsed.append((line_no, self._parse_row(row)))
+            except (ValueError, TypeError) as exc:
+                stats.errors.append((line_no, str(exc)))
+        if not parsed:
+            return
+        if self.dry_run:
+            # What the upsert below would write: named categories/locations
+            # would be created, ids must exist, repeated name_urls count once.
+            valid = set()
+            for line_no, values in parsed:
+                if self._known_references(values):
+                    valid.add(values['name_url'])
+                else:
+                    stats.errors.append((line_no, "unknown category_id or location_id"))
+            stats.imported += len(valid)
+            return
+
+        values_only = [values for _, values in parsed]
+        self._resolve_categories(values_only, stats)
+        self._resolve_locations(values_only, stats)
+
+        # Later rows win when a chunk repeats a name_url; Postgres refuses to
+        # upsert the same row twice in one statement.
+        spots = {}
+        for line_no, values in parsed:
+            category_id = self._category_pk(values)
+            location_id = self._location_pk(values)
+            if category_id is None or location_id is None:
+                stats.errors.append((line_no, "unknown category_id or location_id"))
+                continue
+            spots[values['name_url']] = TouristSpot(
+                name=values['name'],
+                name_url=values['name_url'],
+                description=values['description'],
+                category_id=category_id,
+                location_id=location_id,
+                image=values['image'],
+                rating=values['rating'],
+                address=values['address'],
+                map_embed=values['map_embed'],
+                latitude=values['latitude'],
+                longitude=values['longitude'],
+                website=values['website'],
+                is_featured=values['is_featured'],
+                is_active=values['is_active'],
+            )
+
+        TouristSpot.objects.bulk_create(
+            list(spots.values()),
+            update_conflicts=True,
+            unique_fields=['name_url'],
+            update_fields=SPOT_UPDATE_FIELDS,
+        )
+        # No post_save either, so refresh the full-text vectors here.
+        update_search_vectors(TouristSpot.objects.filter(name_url__in=list(spots)))
+        stats.imported += len(spots)
+
+    def import_file(self, csv_path, progress=None):
+        """Stream ``csv_path`` in chunks; ``progress(stats)`` is called after each chunk."""
+        stats = ImportStats()
+        started = time.perf_counter()
+        self._load_caches()
+
+        with open(csv_path, newline='', encoding='utf-8') as csvfile:
+            # Line 1 is the header row.
+            rows = enumerate(csv.DictReader(csvfile), start=2)
+            while True:
+                chunk = list(islice(rows, self.batch_size))
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    self._import_chunk(chunk, stats)
+                stats.rows += len(chunk)
+                stats.seconds = time.perf_counter() - started
+                if progress:
+                    progress(stats)
+
+        if not self.dry_run and stats.imported:
+            # bulk_create sends no post_save, so the signal handlers never see this.
+            bump_spots_version()
+        stats.seconds = time.perf_counter() - started
+        return stats
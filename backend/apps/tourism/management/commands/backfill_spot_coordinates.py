@@ -0,0 +1,57 @@
+# apps/tourism/management/commands/backfill_spot_coordinates.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tourism.geocoding import parse_map_embed
+from apps.tourism.models import TouristSpot
+from apps.tourism.versioning import bump_spots_version
+
+
+class Command(BaseCommand):
+    help = 'Fill TouristSpot.latitude/longitude from the Google Maps links in map_embed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true', help='Re-parse spots that already have coordinates')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk update (default 500)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        spots = TouristSpot.objects.exclude(map_embed='').only('id', 'name', 'map_embed', 'latitude', 'longitude')
+        if not options['overwrite']:
+            spots = spots.filter(latitude__isnull=True)
+
+        changed, unparsed, batch = 0, 0, []
+        for spot in spots.order_by('pk').iterator(chunk_size=options['batch_size']):
+            coordinates = parse_map_embed(spot.map_embed)
+            if coordinates is None:
+                unparsed += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(self.style.WARNING(f'No coordinates in map_embed of #{spot.pk} {spot.name}'))
+                continue
+            if coordinates == (spot.latitude, spot.longitude):
+                continue
+            spot.latitude, spot.longitude = coordinates
+            batch.append(spot)
+            changed += 1
+            if len(batch) >= options['batch_size']:
+                self._save(batch, options['dry_run'])
+                batch = []
+        self._save(batch, options['dry_run'])
+
+        if changed and not options['dry_run']:
+            # bulk_update sends no post_save, so the signal handlers never see this.
+            bump_spots_version()
+
+        verb = 'Would update' if options['dry_run'] else 'Updated'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {changed} spots; {unparsed} map_embed values had no coordinates'
+        ))
+
+    @staticmethod
+    def _save(batch, dry_run):
+        if batch and not dry_run:
+            # TouchingQuerySet.bulk_update stamps updated_at for delta sync; the
+            # search vector does not read the coordinates.
+            TouristSpot.objects.bulk_update(batch, ['latitude', 'longitude'])
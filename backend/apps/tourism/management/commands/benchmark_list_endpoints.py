@@ -0,0 +1,89 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from apps.ar.models import ARScene
+from apps.ar.serializers import SCENE_LIST_VALUES, ARSceneSerializer, scene_list_data
+from apps.tourism.models import Category, Location, TouristSpot
+from apps.tourism.renderers import ORJSONRenderer, orjson
+from apps.tourism.serializers import SPOT_LIST_VALUES, TouristSpotSerializer, spot_list_data
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the values() + orjson fast path against the DRF serializers for the spot and AR scene lists. '
+        'Synthetic rows are inserted in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='Table sizes to time')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of N runs (default 3)')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or min(options['rows']) < 1:
+            raise CommandError('--rows and --repeat must be at least 1')
+
+        request = RequestFactory().get('/ar/api/scenes/')
+        self.stdout.write(f"orjson: {'installed' if orjson else 'not installed (stdlib json fallback)'}")
+        self.stdout.write(f"{'list':<8}{'rows':>9}{'serializer':>13}{'fast path':>12}{'speedup':>10}")
+
+        for rows in options['rows']:
+            with transaction.atomic():
+                self._insert(rows)
+                paths = {
+                    'spots': (
+                        lambda: JSONRenderer().render(TouristSpotSerializer(TouristSpot.objects.all(), many=True).data),
+                        lambda: ORJSONRenderer().render(spot_list_data(TouristSpot.objects.values(*SPOT_LIST_VALUES))),
+                    ),
+                    'scenes': (
+                        lambda: JSONRenderer().render(
+                            ARSceneSerializer(ARScene.objects.all(), many=True, context={'request': request}).data
+                        ),
+                        lambda: ORJSONRenderer().render(scene_list_data(ARScene.objects.values(*SCENE_LIST_VALUES), request)),
+                    ),
+                }
+                for name, (slow, fast) in paths.items():
+                    if slow() != fast():
+                        raise CommandError(f'{name}: fast path output differs from the serializer')
+                    slow_s, fast_s = self._best(slow, options['repeat']), self._best(fast, options['repeat'])
+                    self.stdout.write(f'{name:<8}{rows:>9}{slow_s:>12.3f}s{fast_s:>11.3f}s{slow_s / fast_s:>9.1f}x')
+                transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS('Fast path output is byte-identical to the serializers'))
+
+    @staticmethod
+    def _insert(rows):
+        location = Location.objects.create(name='Benchmark', province='Albay', region='Bicol')
+        category = Category.objects.create(name='Benchmark')
+        TouristSpot.objects.bulk_create(
+            [
+                TouristSpot(
+                    name=f'Benchmark spot {i}', name_url=f'benchmark-spot-{i}', description='Lorem ipsum ' * 20,
+                    image=f'spot_{i}.jpg', rating=(i % 50) / 10, location=location, category=category,
+                )
+                for i in range(rows)
+            ],
+            batch_size=2000,
+        )
+        ARScene.objects.bulk_create(
+            [
+                ARScene(
+                    name=f'Benchmark scene {i}', latitude=13.0 + i * 1e-5, longitude=123.0 + i * 1e-5,
+                    marker_image=f'ar/markers/marker_{i}.png', model_file=f'ar/models/model_{i}.glb',
+                )
+                for i in range(rows)
+            ],
+            batch_size=2000,
+        )
+
+    @staticmethod
+    def _best(func, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - started)
+        return best
@@ -0,0 +1,31 @@
+# apps/tourism/management/commands/build_offline_bundle.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tourism.offline import build_bundle
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the offline catalog bundle (SQLite + thumbnails) served at /api/offline/. '
+        'Does nothing if the catalog has not changed since the last build. Once a bundle exists, '
+        'catalog changes rebuild it automatically; run this for the first build or after bulk imports.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='Bundle directory (defaults to settings.OFFLINE_BUNDLE_DIR)')
+        parser.add_argument('--force', action='store_true', help='Rebuild even if the catalog is unchanged')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        manifest, built = build_bundle(options['output_dir'], force=options['force'])
+        elapsed = time.perf_counter() - started
+
+        if not built:
+            self.stdout.write(f"Catalog unchanged; bundle {manifest['version']} is current ({elapsed:.2f}s)")
+            return
+        counts = ', '.join(f'{count} {table}' for table, count in manifest['counts'].items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {manifest['bundle']} ({manifest['size']} bytes: {counts}) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,32 @@
+# apps/tourism/management/commands/build_spot_catalog.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.tourism.mmap_catalog import catalog_path, spot_records_from_csv, spot_records_from_db, write_catalog
+from apps.tourism.versioning import get_spots_version
+
+
+class Command(BaseCommand):
+    help = 'Build the memory-mapped spot catalog shared by worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', choices=['db', 'csv'], default='db',
+            help='Read spots from the database (default) or the CSVs in shared/static',
+        )
+        parser.add_argument('--output', help='Catalog file to write (defaults to settings.SPOT_CATALOG_PATH)')
+
+    def handle(self, *args, **options):
+        path = options['output'] or catalog_path()
+        if options['source'] == 'db':
+            # Workers fall back to the database once the spots move past this version.
+            records, version = spot_records_from_db(), get_spots_version()
+        else:
+            records, version = spot_records_from_csv(), 0
+
+        started = time.perf_counter()
+        count = write_catalog(path, records, catalog_version=version)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} spots to {path} in {elapsed:.2f}s'))
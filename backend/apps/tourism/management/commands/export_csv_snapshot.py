@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tourism.exporter import export_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Export the spot, location and category tables to the CSV fallback files in shared/static'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', help='Directory to write to (defaults to shared/static)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per cursor round trip')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        for path, count in export_snapshot(options['output_dir'], chunk_size=options['chunk_size']):
+            self.stdout.write(self.style.SUCCESS(f'Wrote {count} rows to {path}'))
@@ -1,58 +1,47 @@
-import csv
 import os
-from django.core.management.base import BaseCommand
-from apps.tourism.models import TouristSpot, Category, Location
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tourism.importer import SpotImporter
+
 
 class Command(BaseCommand):
     help = 'Load tourist spots from CSV file'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_path', nargs='?',
+            default=os.path.join(settings.BASE_DIR, 'shared', 'static', 'tourism_reported_spots_albay.csv'),
+            help='CSV file to import (defaults to shared/static/tourism_reported_spots_albay.csv)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk upsert (default 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate every row without writing anything')
+
     def handle(self, *args, **options):
-        # Get the project root (directory containing manage.py's parent)
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        print(f"Project root: {project_root}")
+        csv_path = options['csv_path']
+        if not os.path.exists(csv_path):
+            raise CommandError(f'CSV file not found at: {csv_path}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
 
-        # Construct the full path to the CSV file relative to project root
-        csv_path = os.path.join(project_root, 'data', '../../../../../shared/static/tourism_reported_spots_albay.csv')
-        print(f"Looking for CSV at: {csv_path}")
+        importer = SpotImporter(batch_size=options['batch_size'], dry_run=options['dry_run'])
 
-        # Check if the file exists
-        if not os.path.exists(csv_path):
-            self.stdout.write(self.style.ERROR(f'CSV file not found at: {csv_path}'))
-            # For debugging, print the directory contents
-            data_dir = os.path.join(project_root, 'data')
-            if os.path.exists(data_dir):
-                print(f"Contents of {data_dir}: {os.listdir(data_dir)}")
-            else:
-                print(f"Data directory not found at: {data_dir}")
-            return
-
-        try:
-            with open(csv_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    # Create or get Category
-                    category, _ = Category.objects.get_or_create(name=row['category_name'])
-
-                    # Create or get Location
-                    location, _ = Location.objects.get_or_create(
-                        name=row['location_name'],
-                        region=row['region'],
-                        province=row['province']
-                    )
-
-                    # Create or update TouristSpot
-                    TouristSpot.objects.update_or_create(
-                        name=row['name'],
-                        defaults={
-                            'description': row['description'],
-                            'category': category,
-                            'location': location,
-                            'image': row['image'],
-                            'embed_link': row['embed_link'],
-                            'website_link': row['website_link'],
-                            'is_featured': row['is_featured'].lower() == 'true',
-                        }
-                    )
-            self.stdout.write(self.style.SUCCESS('Successfully loaded tourist spots'))
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f'An error occurred: {str(e)}'))
\ No newline at end of file
+        def progress(stats):
+            self.stdout.write(f'  {stats.rows} rows, {stats.rows_per_second:.0f} rows/s')
+
+        stats = importer.import_file(csv_path, progress=progress if options['verbosity'] > 1 else None)
+
+        for line_no, message in stats.errors:
+            self.stdout.write(self.style.WARNING(f'Line {line_no}: {message}'))
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        summary = (
+            f'{verb} {stats.imported} of {stats.rows} rows in {stats.seconds:.2f}s '
+            f'({stats.rows_per_second:.0f} rows/s)'
+        )
+        if not options['dry_run']:
+            summary += f', {stats.categories_created} new categories, {stats.locations_created} new locations'
+        if stats.errors:
+            summary += f', {len(stats.errors)} rejected'
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.tourism.sync import TOMBSTONE_RETENTION, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = f'Delete delta-sync tombstones older than {TOMBSTONE_RETENTION.days} days (run daily, e.g. from cron)'
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} tombstones'))
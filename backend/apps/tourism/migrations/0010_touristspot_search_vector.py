@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:00
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # GIN indexes and tsvector are PostgreSQL-only; other backends use the
+    # icontains fallback in apps/tourism/search.py.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS tourism_touristspot_search_vector_gin "
+        "ON tourism_touristspot USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        "UPDATE tourism_touristspot s SET search_vector ="
+        " setweight(to_tsvector('english', coalesce(s.name, '')), 'A') ||"
+        " setweight(to_tsvector('english', coalesce(c.name, '') || ' ' || coalesce(l.name, '') || ' ' ||"
+        "   coalesce(l.province, '') || ' ' || coalesce(l.region, '')), 'B') ||"
+        " setweight(to_tsvector('english', coalesce(s.description, '')), 'C')"
+        " FROM tourism_touristspot_category c, tourism_location l"
+        " WHERE c.id = s.category_id AND l.id = s.location_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS tourism_touristspot_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0009_touristspot_address_touristspot_rating_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='touristspot',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tourism', '0013_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='touristspot',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='touristspot',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['latitude', 'longitude'], name='tourism_spot_lat_lon_idx'),
+        ),
+    ]
@@ -0,0 +1,435 @@
+# apps/tourism/mmap_catalog.py
+"""
+Read-only binary spot catalog shared between worker processes via mmap.
+
+The file is written by ``manage.py build_spot_catalog`` and opened by every
+worker with ``mmap``; the pages live in the OS page cache once, no matter how
+many workers read them. Each spot is stored as a denormalised JSON record
+(category/location already joined) and located through offset tables:
+
+    header
+    records        JSON blobs, back to back
+    keys           name_url / province strings used by the indexes
+    record table   (offset, length, id, latitude, longitude, active) per record
+    id index       (id, record) sorted by id
+    name index     (key offset, key length, record) sorted by name_url
+    province index (key offset, key length, list offset, list length)
+                   sorted by lower-cased province
+    province lists uint32 record numbers
+
+The record table and province lists are read as NumPy arrays over the
+mapping, so filtering and distance-sorting a province's spots touches no
+JSON; a record is decoded only when it is accessed.
+
+A catalog built from the database carries the spots version it was built
+for (apps/tourism/versioning.py; reviews do not move it, records hold
+none). Once that version moves on, workers fall back to the database and the
+file is rebuilt off the request path, as it is after every committed change
+to a spot, category or location (apps/tourism/signals.py). A catalog built
+from the CSVs carries version 0 and is only served while the database has
+no spots; after that it is stale too, and replaced from the database.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Sequence
+
+import numpy as np
+from django.conf import settings
+
+from apps.tourism.versioning import VersionedValue, get_spots_version
+from bicoltravelguide.background import BackgroundJob
+from bicoltravelguide.geo import haversine_km
+
+MAGIC = b"TGSPOTS\0"
+VERSION = 2
+
+HEADER = struct.Struct("<8sHHIQQIQIQIQ")
+RECORD = struct.Struct("<QIqddB")
+RECORD_DTYPE = np.dtype([
+    ("offset", "<u8"), ("length", "<u4"), ("id", "<i8"),
+    ("latitude", "<f8"), ("longitude", "<f8"), ("active", "u1"),
+])
+ID_ENTRY = struct.Struct("<qI")
+NAME_ENTRY = struct.Struct("<QII")
+PROVINCE_ENTRY = struct.Struct("<QIQI")
+LIST_ENTRY = struct.Struct("<I")
+
+
+def catalog_path():
+    return str(settings.SPOT_CATALOG_PATH)
+
+
+def province_key(value):
+    return (value or "").strip().lower()
+
+
+# ------------------------------------------------------------------
+#   Building
+# ------------------------------------------------------------------
+
+def spot_records_from_db():
+    """Yield catalog records for every TouristSpot, with category/location joined in."""
+    from apps.tourism.catalog import get_catalog
+    from apps.tourism.models import TouristSpot
+
+    image_map = get_catalog().image_map
+    spots = TouristSpot.objects.select_related("category", "location").order_by("id")
+    for spot in spots.iterator(chunk_size=2000):
+        yield {
+            "id": spot.id,
+            "name": spot.name,
+            "name_url": spot.name_url,
+            "description": spot.description,
+            "image": image_map.get(spot.id) or spot.image,
+            "rating": spot.rating,
+            "address": spot.address,
+            "map_embed": spot.map_embed,
+            "latitude": spot.latitude,
+            "longitude": spot.longitude,
+            "website": spot.website,
+            "is_featured": spot.is_featured,
+            "is_active": spot.is_active,
+            "category": spot.category.name,
+            "category_id": spot.category_id,
+            "location": spot.location.name,
+            "location_id": spot.location_id,
+            "province": spot.location.province,
+            "region": spot.location.region,
+        }
+
+
+def spot_records_from_csv(catalog=None):
+    """Yield catalog records from the CSV files in shared/static."""
+    from apps.tourism.catalog import clean_image_path, get_catalog
+    from apps.tourism.geocoding import parse_map_embed
+
+    catalog = catalog or get_catalog()
+    for row in catalog.spots:
+        try:
+            spot_id = int(row.get("id", ""))
+        except ValueError:
+            continue
+        loc = catalog.locations.get(row.get("location_id")) or {}
+        cat = catalog.categories.get(row.get("category_id")) or {}
+        try:
+            rating = float(row["rating"]) if row.get("rating") else None
+        except ValueError:
+            rating = None
+        latitude, longitude = parse_map_embed(row.get("map_embed", "")) or (None, None)
+        yield {
+            "id": spot_id,
+            "name": row.get("name", ""),
+            "name_url": row.get("name_url") or None,
+            "description": row.get("description", ""),
+            "image": clean_image_path(row.get("image")),
+            "rating": rating,
+            "address": row.get("address") or None,
+            "map_embed": row.get("map_embed", ""),
+            "latitude": latitude,
+            "longitude": longitude,
+            "website": row.get("website") or None,
+            "is_featured": row.get("is_featured", "").lower() == "true",
+            "is_active": row.get("is_active", "True").lower() != "false",
+            "category": cat.get("name", ""),
+            "category_id": int(row["category_id"]) if row.get("category_id", "").isdigit() else None,
+            "location": loc.get("name", ""),
+            "location_id": int(row["location_id"]) if row.get("location_id", "").isdigit() else None,
+            "province": loc.get("province", row.get("province", "")),
+            "region": loc.get("region", ""),
+        }
+
+
+def write_catalog(path, records, catalog_version=0):
+    """
+    Serialise ``records`` into the binary catalog format at ``path``.
+
+    ``catalog_version`` is the catalog version the records were read at, or
+    0 for records that do not come from the database.
+
+    The file is written next to its destination and renamed into place, so
+    workers that already mapped the previous version keep reading it safely.
+    Returns the number of records written.
+    """
+    blobs = bytearray()
+    keys = bytearray()
+    record_table = []
+    ids = []
+    names = []
+    provinces = {}
+
+    for index, record in enumerate(records):
+        data = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        latitude, longitude = record.get("latitude"), record.get("longitude")
+        record_table.append((
+            len(blobs), len(data), int(record["id"]),
+            math.nan if latitude is None else latitude, math.nan if longitude is None else longitude,
+            bool(record.get("is_active", True)),
+        ))
+        blobs += data
+
+        ids.append((int(record["id"]), index))
+        if record.get("name_url"):
+            names.append((record["name_url"].encode("utf-8"), index))
+        provinces.setdefault(province_key(record.get("province")).encode("utf-8"), []).append(index)
+
+    def add_key(key):
+        offset = len(keys)
+        keys.extend(key)
+        return offset
+
+    ids.sort()
+    names.sort()
+    name_entries = [(add_key(key), len(key), index) for key, index in names]
+    province_keys = sorted(provinces)
+    province_key_offsets = [add_key(key) for key in province_keys]
+
+    records_off = HEADER.size
+    keys_off = records_off + len(blobs)
+    table_off = keys_off + len(keys)
+    id_off = table_off + RECORD.size * len(record_table)
+    name_off = id_off + ID_ENTRY.size * len(ids)
+    province_off = name_off + NAME_ENTRY.size * len(name_entries)
+    lists_off = province_off + PROVINCE_ENTRY.size * len(province_keys)
+
+    out = bytearray(HEADER.pack(
+        MAGIC, VERSION, 0, len(record_table),
+        table_off, id_off, len(ids), name_off, len(name_entries), province_off, len(province_keys),
+        catalog_version,
+    ))
+    out += blobs
+    out += keys
+    for offset, *columns in record_table:
+        out += RECORD.pack(records_off + offset, *columns)
+    for spot_id, index in ids:
+        out += ID_ENTRY.pack(spot_id, index)
+    for key_offset, key_len, index in name_entries:
+        out += NAME_ENTRY.pack(keys_off + key_offset, key_len, index)
+
+    list_blob = bytearray()
+    for key, key_offset in zip(province_keys, province_key_offsets):
+        members = provinces[key]
+        out += PROVINCE_ENTRY.pack(keys_off + key_offset, len(key), lists_off + len(list_blob), len(members))
+        for index in members:
+            list_blob += LIST_ENTRY.pack(index)
+    out += list_blob
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(out)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(record_table)
+
+
+# ------------------------------------------------------------------
+#   Reading
+# ------------------------------------------------------------------
+
+class MappedCatalog:
+    """Zero-copy reader over a catalog file written by write_catalog()."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _flags, self._count, self._table_off,
+         self._id_off, self._id_count, self._name_off, self._name_count,
+         self._province_off, self._province_count, self.catalog_version) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {VERSION} spot catalog")
+        self._view = memoryview(self._mm)
+        self._records = np.frombuffer(self._mm, dtype=RECORD_DTYPE, count=self._count, offset=self._table_off)
+
+    def close(self):
+        self._records = None
+        self._view.release()
+        self._mm.close()
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self.record(index)
+
+    def record(self, index):
+        offset, length = RECORD.unpack_from(self._mm, self._table_off + index * RECORD.size)[:2]
+        return json.loads(str(self._view[offset:offset + length], "utf-8"))
+
+    def _key(self, offset, length):
+        return self._mm[offset:offset + length]
+
+    def get(self, spot_id):
+        """Binary-search the id index; returns the record dict or None."""
+        try:
+            spot_id = int(spot_id)
+        except (TypeError, ValueError):
+            return None
+        lo, hi = 0, self._id_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found, index = ID_ENTRY.unpack_from(self._mm, self._id_off + mid * ID_ENTRY.size)
+            if found == spot_id:
+                return self.record(index)
+            if found < spot_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get_by_name_url(self, name_url):
+        target = (name_url or "").encode("utf-8")
+        lo, hi = 0, self._name_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_off, key_len, index = NAME_ENTRY.unpack_from(self._mm, self._name_off + mid * NAME_ENTRY.size)
+            key = self._key(key_off, key_len)
+            if key == target:
+                return self.record(index)
+            if key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _province_indexes(self, province):
+        """Record numbers of ``province``'s spots, in catalog order."""
+        target = province_key(province).encode("utf-8")
+        lo, hi = 0, self._province_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key_off, key_len, list_off, list_len = PROVINCE_ENTRY.unpack_from(
+                self._mm, self._province_off + mid * PROVINCE_ENTRY.size)
+            key = self._key(key_off, key_len)
+            if key == target:
+                return np.frombuffer(self._mm, dtype="<u4", count=list_len, offset=list_off).astype(np.intp)
+            if key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return np.empty(0, dtype=np.intp)
+
+    def in_province(self, province):
+        return [self.record(index) for index in self._province_indexes(province)]
+
+    def nearest_in_province(self, province, lat, lon, exclude_id=None):
+        """
+        Active spots of ``province`` other than ``exclude_id``, nearest
+        (lat, lon) first and those without coordinates after, as MappedRecords.
+        With no (lat, lon) they stay in catalog order.
+        """
+        indexes = self._province_indexes(province)
+        rows = self._records[indexes]
+        keep = rows["active"].astype(bool)
+        if exclude_id is not None:
+            keep &= rows["id"] != exclude_id
+        indexes, rows = indexes[keep], rows[keep]
+        if lat is not None and lon is not None:
+            located = ~(np.isnan(rows["latitude"]) | np.isnan(rows["longitude"]))
+            distances = np.full(len(rows), np.inf)
+            distances[located] = haversine_km(lat, lon, rows["latitude"][located], rows["longitude"][located])
+            indexes = indexes[np.argsort(distances, kind="stable")]
+        return MappedRecords(self, indexes)
+
+
+class MappedRecords(Sequence):
+    """Records of a MappedCatalog by record number, decoded from JSON as they are accessed."""
+
+    def __init__(self, catalog, indexes):
+        self.catalog = catalog
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return MappedRecords(self.catalog, self.indexes[position])
+        return self.catalog.record(int(self.indexes[position]))
+
+
+def read_catalog_version(path):
+    """The catalog version in the header of the catalog at ``path``, or None if there is none."""
+    try:
+        with open(path, "rb") as f:
+            header = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if header[0] != MAGIC or header[1] != VERSION:
+        return None
+    return header[-1]
+
+
+def rebuild_catalog():
+    """
+    Rewrite the catalog from the database if the current file is stale: built
+    from there for an older spots version, or from the CSVs while the
+    database has spots. Returns True if it was rewritten.
+    """
+    path = catalog_path()
+    built = read_catalog_version(path)
+    version = get_spots_version()  # read before the rows, so a change meanwhile leaves it stale
+    if built is None or built == version or (built == 0 and not _database_has_spots.get()):
+        return False
+    write_catalog(path, spot_records_from_db(), catalog_version=version)
+    return True
+
+
+def _any_spots(version):
+    from apps.tourism.models import TouristSpot
+
+    return TouristSpot.objects.exists()
+
+
+# Asked again only when the spots change
+_database_has_spots = VersionedValue(get_spots_version, _any_spots)
+_rebuild_job = BackgroundJob("spot-catalog", rebuild_catalog)
+
+
+def schedule_catalog_rebuild():
+    """Rebuild off the request path; requests made while one is queued share it."""
+    return _rebuild_job.schedule()
+
+
+_mapped = None
+_mapped_lock = threading.Lock()
+
+
+def get_mapped_catalog():
+    """
+    Return this worker's MappedCatalog, or None if no catalog has been
+    built or the one on disk is stale (see rebuild_catalog()).
+
+    The file is re-mapped when it is replaced.
+    """
+    global _mapped
+    path = catalog_path()
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    current = _mapped
+    if current is None or current.path != path or current.stamp != stamp:
+        with _mapped_lock:
+            if _mapped is None or _mapped.path != path or _mapped.stamp != stamp:
+                try:
+                    _mapped = MappedCatalog(path)
+                except (OSError, ValueError):
+                    return None
+                # The previous mapping is left for the GC: another thread may
+                # still be reading from it.
+            current = _mapped
+    if current.catalog_version != get_spots_version() and (current.catalog_version or _database_has_spots.get()):
+        schedule_catalog_rebuild()
+        return None
+    return current
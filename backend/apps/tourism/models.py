@@ -1,11 +1,23 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 
+from apps.tourism.geocoding import parse_map_embed
+from bicoltravelguide.queries import TouchingQuerySet
+
+# Bulk writes to the delta-synced models set updated_at too (apps/tourism/sync.py).
+class SpotQuerySet(TouchingQuerySet):
+    # Refreshing the search vector (apps/tourism/search.py) is not a change sync sends.
+    untouched_fields = frozenset({"search_vector"})
+
 # 1. Category Model (matches tourism_touristspot_category)
 class Category(models.Model):
     id = models.BigAutoField(primary_key=True)  # id column: bigint, PK, IDENTITY
     name = models.CharField(max_length=100)     # name: varchar(100), EXTENDED, collation default
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TouchingQuerySet.as_manager()
 
     class Meta:
         app_label = 'tourism'
@@ -20,6 +32,9 @@ class Location(models.Model):
     name = models.CharField(max_length=100)     # name: varchar(100), EXTENDED, collation default
     province = models.CharField(max_length=100, blank=True)   # province: varchar(100)
     region = models.CharField(max_length=100, blank=True)     # region: varchar(100)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TouchingQuerySet.as_manager()
 
     class Meta:
         app_label = 'tourism'
@@ -39,20 +54,53 @@ class TouristSpot(models.Model):
     rating = models.FloatField(blank=True, null=True)                # rating: double precision
     address = models.CharField(max_length=255, blank=True, null=True)
     map_embed = models.TextField(blank=True, help_text="Google Maps embed link")
+    # Parsed from map_embed when left empty or when map_embed changes (apps/tourism/geocoding.py)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta sync (apps/tourism/sync.py)
     website = models.URLField(blank=True, null=True)
     name_url = models.SlugField(unique=True, blank=True, null=True)
+    # Weighted tsvector maintained by apps/tourism/search.py (GIN indexed on PostgreSQL)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = SpotQuerySet.as_manager()
 
     class Meta:
         app_label = 'tourism'
         db_table = 'tourism_touristspot'
+        indexes = [
+            # Keyset pagination order (apps/tourism/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='tourism_spot_created_id_idx'),
+            # Bounding-box prefilter for /api/spots/nearby/
+            models.Index(fields=['latitude', 'longitude'], name='tourism_spot_lat_lon_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored link and coordinates, to tell in save() whether map_embed was edited
+        instance._loaded_geo = tuple(instance.__dict__.get(name) for name in ("map_embed", "latitude", "longitude"))
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.name_url:
             self.name_url = slugify(self.name.replace(" ", ""))
+        loaded = getattr(self, "_loaded_geo", None)
+        reparse = self.latitude is None and self.longitude is None
+        if loaded is not None and "map_embed" in self.__dict__ and self.map_embed != loaded[0]:
+            # A new link moves the spot, unless its coordinates were edited in the same save.
+            reparse = reparse or (self.latitude, self.longitude) == loaded[1:]
+        if reparse:
+            coordinates = parse_map_embed(self.map_embed)
+            if coordinates and coordinates != (self.latitude, self.longitude):
+                self.latitude, self.longitude = coordinates
+                if kwargs.get("update_fields") is not None:
+                    kwargs["update_fields"] = {*kwargs["update_fields"], "latitude", "longitude"}
         super().save(*args, **kwargs)
+        self._loaded_geo = (self.__dict__.get("map_embed"), self.latitude, self.longitude)
 
     def __str__(self):
         return self.name
@@ -84,6 +132,12 @@ class Review(models.Model):
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order (apps/tourism/pagination.py)
+            models.Index(fields=['created_at', 'id'], name='tourism_review_created_id_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username} review for {self.tourist_spot.name}'
 
@@ -91,6 +145,9 @@ class Gallery(models.Model):
     tourist_spot = models.ForeignKey(TouristSpot, on_delete=models.CASCADE)
     image = models.ImageField(upload_to='gallery/')
     caption = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TouchingQuerySet.as_manager()
 
     def __str__(self):
         return f'Image of {self.tourist_spot.name}'
@@ -109,6 +166,9 @@ class OperatingHour(models.Model):
     day_of_week = models.CharField(max_length=3, choices=DAYS_OF_WEEK, default='Mon')
     open_time = models.TimeField()
     close_time = models.TimeField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TouchingQuerySet.as_manager()
 
     def __str__(self):
         return f'{self.tourist_spot.name} - {self.get_day_of_week_display()}'
@@ -129,6 +189,15 @@ class VisitedSpot(models.Model):
     class Meta:
         unique_together = ('user', 'spot')
 
+class Tombstone(models.Model):
+    """A deleted row of a delta-synced model, so /api/sync/ can report the delete."""
+    model = models.CharField(max_length=100)  # app_label.model_name
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.model} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}'
+
 # --- Deprecated/legacy/CSV compatibility models below (not for normal relational use) ---
 class TourismReportedSpotAlbay(models.Model):
     """
@@ -0,0 +1,49 @@
+# apps/tourism/nearby.py
+"""
+Distance queries over tourist spots.
+
+nearby_spots() prefilters active spots with a bounding box on the indexed
+latitude/longitude columns (one query, rows in the /api/tourism-spots/
+format) and refines the candidates with the vectorized haversine in
+bicoltravelguide/geo.py. sort_by_distance() ranks already loaded spots,
+e.g. the "more spots" list of a detail page.
+"""
+import numpy as np
+
+from apps.tourism.models import TouristSpot
+from apps.tourism.serializers import SPOT_LIST_VALUES, spot_list_data
+from bicoltravelguide.geo import PointIndex, bounding_box_filter, haversine_km
+
+NEARBY_VALUES = [*SPOT_LIST_VALUES, "latitude", "longitude"]
+
+
+def nearby_spots(lat, lon, radius_km, limit, category=None):
+    """
+    Active spots within ``radius_km`` of (lat, lon), nearest first, each
+    with its coordinates and ``distance_km``. ``category`` is a category id
+    or name.
+    """
+    spots = TouristSpot.objects.filter(bounding_box_filter(lat, lon, radius_km), is_active=True)
+    if category:
+        spots = spots.filter(category_id=int(category)) if category.isdigit() else spots.filter(category__name__iexact=category)
+    rows = {row["id"]: row for row in spots.values(*NEARBY_VALUES)}
+
+    index = PointIndex.from_rows((pk, row["latitude"], row["longitude"]) for pk, row in rows.items())
+    hits = index.within(lat, lon, radius_km, limit)
+    results = spot_list_data(rows[pk] for _, pk in hits)
+    for result, (distance, pk) in zip(results, hits):
+        result["latitude"] = rows[pk]["latitude"]
+        result["longitude"] = rows[pk]["longitude"]
+        result["distance_km"] = round(distance, 3)
+    return results
+
+
+def sort_by_distance(spots, lat, lon):
+    """``spots`` nearest (lat, lon) first; spots without coordinates follow in their original order."""
+    spots = list(spots)
+    located = [spot for spot in spots if spot.latitude is not None and spot.longitude is not None]
+    if not located:
+        return spots
+    distances = haversine_km(lat, lon, [spot.latitude for spot in located], [spot.longitude for spot in located])
+    ranked = [located[i] for i in np.argsort(distances, kind="stable")]
+    return ranked + [spot for spot in spots if spot.latitude is None or spot.longitude is None]
@@ -0,0 +1,301 @@
+# apps/tourism/offline.py
+"""
+Offline catalog bundle for the mobile app.
+
+A bundle is one zip holding:
+
+* ``catalog.sqlite3`` - active spots with their categories, locations and
+  operating hours, plus the AR scenes;
+* ``thumbnails/<hash>.jpg`` - spot images from shared/static/images (the
+  CSV catalog's image for the spot if it has one, as on the web pages),
+  resized to fit THUMBNAIL_SIZE and named by the hash of the source file;
+* ``manifest.json`` - bundle version, row counts and the size and SHA-256 of
+  every other file in the zip.
+
+The version is a hash of the bundle's content, so rebuilding an unchanged
+catalog is a no-op and the same data always gets the same URL. Thumbnails
+are cached in the bundle directory by source hash and only re-encoded when
+an image changes; a source is only re-hashed when its size or mtime moves
+(``SOURCES_FILE`` remembers them). Cached thumbnails no build has used for
+THUMBNAIL_PRUNE_GRACE are removed, so one worker's cleanup never takes a
+file another worker's build has just written. ``latest.json`` in the
+bundle directory points at the current bundle; the previous bundle is kept
+so downloads in progress can finish.
+
+``manage.py build_offline_bundle`` builds the first bundle. From then on a
+rebuild is scheduled whenever a change to a model the bundle holds commits
+(apps/tourism/signals.py, apps/ar/signals.py).
+"""
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from apps.ar.models import ARScene
+from apps.tourism.catalog import get_catalog
+from apps.tourism.models import Category, Location, OperatingHour, TouristSpot
+from bicoltravelguide.background import BackgroundJob
+
+BUNDLE_FORMAT = 2
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_PRUNE_GRACE = 10 * 60  # seconds an unused cached thumbnail is kept
+LATEST_FILE = "latest.json"
+SOURCES_FILE = "sources.json"
+BUNDLE_NAME = "offline-{version}.zip"
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE categories (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE locations (id INTEGER PRIMARY KEY, name TEXT NOT NULL, province TEXT NOT NULL, region TEXT NOT NULL);
+CREATE TABLE spots (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, name_url TEXT, description TEXT NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES categories (id), location_id INTEGER NOT NULL REFERENCES locations (id),
+    address TEXT, rating REAL, is_featured INTEGER NOT NULL, website TEXT, latitude REAL, longitude REAL,
+    image TEXT, thumbnail TEXT
+);
+CREATE INDEX spots_location_idx ON spots (location_id);
+CREATE INDEX spots_category_idx ON spots (category_id);
+CREATE TABLE operating_hours (
+    id INTEGER PRIMARY KEY, spot_id INTEGER NOT NULL REFERENCES spots (id),
+    day_of_week TEXT NOT NULL, open_time TEXT NOT NULL, close_time TEXT NOT NULL
+);
+CREATE INDEX operating_hours_spot_idx ON operating_hours (spot_id);
+CREATE TABLE ar_scenes (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL, description TEXT NOT NULL,
+    latitude REAL NOT NULL, longitude REAL NOT NULL, marker_image TEXT, model_file TEXT
+);
+"""
+
+SPOT_COLUMNS = [
+    "id", "name", "name_url", "description", "category_id", "location_id",
+    "address", "rating", "is_featured", "website", "latitude", "longitude", "image",
+]
+
+
+def bundle_dir():
+    return Path(settings.OFFLINE_BUNDLE_DIR)
+
+
+def read_latest(directory=None):
+    """The current bundle's manifest (with ``bundle``, ``size`` and ``sha256`` of the zip), or None."""
+    try:
+        with open((directory or bundle_dir()) / LATEST_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def catalog_tables():
+    """Rows for each SQLite table, as lists of tuples in primary key order."""
+    spots = TouristSpot.objects.filter(is_active=True).order_by("pk")
+    image_map = get_catalog().image_map
+    hours = OperatingHour.objects.filter(tourist_spot__in=spots.values("pk")).order_by("pk")
+    return {
+        "categories": list(
+            Category.objects.filter(pk__in=spots.values("category_id")).order_by("pk").values_list("id", "name")
+        ),
+        "locations": list(
+            Location.objects.filter(pk__in=spots.values("location_id")).order_by("pk")
+            .values_list("id", "name", "province", "region")
+        ),
+        "spots": [
+            (*row[:-1], image_map.get(row[0]) or row[-1]) for row in spots.values_list(*SPOT_COLUMNS)
+        ],
+        "operating_hours": [
+            (pk, spot_id, day, opens.isoformat(), closes.isoformat())
+            for pk, spot_id, day, opens, closes in hours.values_list(
+                "id", "tourist_spot_id", "day_of_week", "open_time", "close_time"
+            )
+        ],
+        "ar_scenes": list(
+            ARScene.objects.order_by("pk")
+            .values_list("id", "name", "description", "latitude", "longitude", "marker_image", "model_file")
+        ),
+    }
+
+
+def _image_source(image):
+    """Absolute path of a spot's image if it is a file under shared/static/images."""
+    if not image:
+        return None
+    root = (Path(settings.SHARED_STATIC_DIR) / "images").resolve()
+    path = (Path(settings.SHARED_STATIC_DIR) / image.lstrip("/")).resolve()
+    return path if path.is_relative_to(root) and path.is_file() else None
+
+
+def make_thumbnail(source):
+    """JPEG bytes of ``source`` scaled down to fit THUMBNAIL_SIZE."""
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def _read_sources(cache_dir):
+    """``{source path: [mtime_ns, size, digest]}`` from the last build."""
+    try:
+        with open(cache_dir / SOURCES_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_thumbnails(spot_rows, cache_dir, grace=THUMBNAIL_PRUNE_GRACE):
+    """
+    ``({image: zip name}, {zip name: thumbnail path})`` for the spots'
+    images, re-encoding only images not already in ``cache_dir``. Cached
+    thumbnails no build has used for ``grace`` seconds are removed.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    known = _read_sources(cache_dir)
+    sources = {}
+    names, files = {}, {}
+    image_index = SPOT_COLUMNS.index("image")
+    for image in {row[image_index] for row in spot_rows if row[image_index]}:
+        source = _image_source(image)
+        if source is None:
+            continue
+        st = source.stat()
+        entry = known.get(str(source))
+        if entry and entry[:2] == [st.st_mtime_ns, st.st_size]:
+            digest = entry[2]
+        else:
+            digest = _sha256(source.read_bytes())[:32]
+        sources[str(source)] = [st.st_mtime_ns, st.st_size, digest]
+        cached = cache_dir / f"{digest}.jpg"
+        if cached.exists():
+            os.utime(cached)  # in use: keeps it from other workers' pruning
+        else:
+            try:
+                _write_atomic(cached, make_thumbnail(source))
+            except OSError:  # not an image Pillow can read
+                continue
+        names[image] = f"thumbnails/{digest}.jpg"
+        files[names[image]] = cached
+
+    if sources != known:
+        _write_atomic(cache_dir / SOURCES_FILE, json.dumps(sources).encode("utf-8"))
+    cutoff = time.time() - grace
+    for stale in cache_dir.glob("*.jpg"):
+        if f"thumbnails/{stale.name}" not in files:
+            try:
+                if stale.stat().st_mtime < cutoff:
+                    stale.unlink()
+            except FileNotFoundError:  # pruned by another worker
+                pass
+    return names, files
+
+
+def write_database(path, tables, version):
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO meta VALUES (?, ?)", [("format", str(BUNDLE_FORMAT)), ("version", version)]
+        )
+        for table, rows in tables.items():
+            if rows:
+                placeholders = ", ".join("?" * len(rows[0]))
+                connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def build_bundle(directory=None, force=False):
+    """
+    Build the offline bundle in ``directory`` (settings.OFFLINE_BUNDLE_DIR by
+    default) and return ``(manifest, built)``; ``built`` is False when the
+    catalog is unchanged since the current bundle and nothing was written.
+    """
+    directory = Path(directory or bundle_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+
+    tables = catalog_tables()
+    thumbnail_names, thumbnail_files = build_thumbnails(tables["spots"], directory / "thumbnails")
+    tables["spots"] = [(*row, thumbnail_names.get(row[-1])) for row in tables["spots"]]
+
+    content = json.dumps(
+        {"format": BUNDLE_FORMAT, "tables": tables, "thumbnails": sorted(thumbnail_files)},
+        separators=(",", ":"), default=str,
+    ).encode("utf-8")
+    version = _sha256(content)[:16]
+
+    latest = read_latest(directory)
+    if not force and latest and latest["version"] == version and (directory / latest["bundle"]).exists():
+        return latest, False
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        db_path = Path(tmp) / "catalog.sqlite3"
+        write_database(db_path, tables, version)
+        entries = {"catalog.sqlite3": db_path, **thumbnail_files}
+        files = []
+        for name, path in entries.items():
+            data = path.read_bytes()
+            files.append({"path": name, "size": len(data), "sha256": _sha256(data)})
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": version,
+            "built_at": timezone.now().isoformat(),
+            "counts": {table: len(rows) for table, rows in tables.items()},
+            "files": files,
+        }
+
+        bundle_name = BUNDLE_NAME.format(version=version)
+        zip_tmp = Path(tmp) / bundle_name
+        with zipfile.ZipFile(zip_tmp, "w") as bundle:
+            bundle.writestr("manifest.json", json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+            bundle.write(db_path, "catalog.sqlite3", compress_type=zipfile.ZIP_DEFLATED)
+            for name, path in thumbnail_files.items():
+                # Already JPEG-compressed.
+                bundle.write(path, name, compress_type=zipfile.ZIP_STORED)
+        zip_data = zip_tmp.read_bytes()
+        os.replace(zip_tmp, directory / bundle_name)
+
+    latest_manifest = {**manifest, "bundle": bundle_name, "size": len(zip_data), "sha256": _sha256(zip_data)}
+    _write_atomic(directory / LATEST_FILE, json.dumps(latest_manifest, indent=2).encode("utf-8"))
+
+    keep = {bundle_name, latest["bundle"] if latest else None}
+    for old in directory.glob(BUNDLE_NAME.format(version="*")):
+        if old.name not in keep:
+            old.unlink()
+    return latest_manifest, True
+
+
+def rebuild_current_bundle():
+    """Rebuild the bundle if one has been built; until then bundles are opt-in."""
+    if read_latest() is not None:
+        build_bundle()
+
+
+_rebuild_job = BackgroundJob("offline-bundle", rebuild_current_bundle)
+
+
+def schedule_bundle_rebuild():
+    """Rebuild off the request path; changes committed while one is queued share it."""
+    return _rebuild_job.schedule()
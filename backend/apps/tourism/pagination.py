@@ -0,0 +1,155 @@
+# apps/tourism/pagination.py
+"""
+Keyset (cursor) pagination for the tourism list APIs.
+
+Pages are ordered by ``(created_at, id)`` and continue from the last row of
+the previous page with ``WHERE created_at >= x AND (created_at > x OR
+(created_at = x AND id > y))``, i.e. ``(created_at, id) > (x, y)`` with a
+leading bound the ``(created_at, id)`` index can seek to, so page 500 costs
+the same index range scan as page 1: no OFFSET and no COUNT(*).
+The cursor is an opaque urlsafe-base64 token of the last row's sort key.
+
+Ranked querysets (``?search=`` orders by ``ts_rank``, ``?fuzzy=`` by name
+similarity) keep their relevance order instead: a score is not a stable
+key to continue from, so their cursor carries an offset. Search results
+are short and rarely paged far, so the OFFSET stays small.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering = ('created_at', 'id')
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+    # Score annotations of apps/tourism/search.py and fuzzy.py, which order the rows themselves
+    relevance_annotations = ('rank', 'similarity')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    # --- cursor encoding ---------------------------------------------------
+
+    def encode_cursor(self, row):
+        key = []
+        for field in self.ordering:
+            value = row[field] if isinstance(row, dict) else getattr(row, field)
+            key.append(value.isoformat() if isinstance(value, datetime) else value)
+        return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def encode_offset_cursor(self, offset):
+        return base64.urlsafe_b64encode(json.dumps({'offset': offset}).encode()).decode().rstrip('=')
+
+    def _cursor_payload(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_cursor(self, request):
+        key = self._cursor_payload(request)
+        if key is None:
+            return None
+        try:
+            if not isinstance(key, list) or len(key) != len(self.ordering):
+                raise ValueError
+            return [
+                datetime.fromisoformat(value) if field.endswith('_at') else int(value)
+                for field, value in zip(self.ordering, key)
+            ]
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_offset_cursor(self, request):
+        payload = self._cursor_payload(request)
+        if payload is None:
+            return 0
+        offset = payload.get('offset') if isinstance(payload, dict) else None
+        if not isinstance(offset, int) or offset < 0:
+            raise NotFound(self.invalid_cursor_message)
+        return offset
+
+    def _after(self, key):
+        """
+        Q for rows strictly after ``key`` in ``self.ordering``. The nested
+        OR alone is not sargable, so it is ANDed with ``first >= key[0]``,
+        which the composite index can start its range scan from.
+        """
+        condition = Q()
+        for depth in range(len(self.ordering) - 1, -1, -1):
+            field = self.ordering[depth]
+            step = Q(**{f'{field}__gt': key[depth]})
+            if depth < len(self.ordering) - 1:
+                step |= Q(**{field: key[depth]}) & condition
+            condition = step
+        return Q(**{f'{self.ordering[0]}__gte': key[0]}) & condition
+
+    def is_ranked(self, queryset):
+        return any(name in queryset.query.annotations for name in self.relevance_annotations)
+
+    # --- BasePagination ---------------------------------------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if self.is_ranked(queryset):
+            offset = self.decode_offset_cursor(request)
+            rows = list(queryset[offset:offset + page_size + 1])
+            self.page = rows[:page_size]
+            self.next_cursor = self.encode_offset_cursor(offset + page_size) if len(rows) > page_size else None
+            return self.page
+
+        key = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if key is not None:
+            queryset = queryset.filter(self._after(key))
+
+        rows = list(queryset[:page_size + 1])
+        self.page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(self.page[-1]) if len(rows) > page_size else None
+        return self.page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class IdKeysetPagination(KeysetPagination):
+    """For models without ``created_at``; ids only ever increase."""
+    ordering = ('id',)
@@ -0,0 +1,12 @@
+# apps/tourism/permissions.py
+from rest_framework.permissions import BasePermission
+
+OFFICER_ROLES = ("Tourism Officer", "Admin")
+
+
+class IsTourismOfficer(BasePermission):
+    """Tourism officers and admins (by role, or Django staff)."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.role in OFFICER_ROLES or user.is_staff))
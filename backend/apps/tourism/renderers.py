@@ -0,0 +1,31 @@
+# apps/tourism/renderers.py
+"""
+JSON renderer backed by orjson, for the read-only fast-path list endpoints.
+
+Output matches DRF's compact JSONRenderer byte-for-byte for the plain
+dicts/lists/str/int/float/None those endpoints return: no whitespace, raw
+UTF-8 and U+2028/U+2029 escaped. (Floats needing an exponent, e.g. 1e16, are
+written "1e16" where json.dumps writes "1e+16"; ratings and coordinates never
+need one.) Without orjson installed, or when indentation is requested, it is
+DRF's JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional speedup; see requirements.txt
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return (
+            orjson.dumps(data)
+            .replace(b"\xe2\x80\xa8", b"\\u2028")
+            .replace(b"\xe2\x80\xa9", b"\\u2029")
+        )
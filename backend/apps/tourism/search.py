@@ -0,0 +1,75 @@
+# apps/tourism/search.py
+"""
+Full-text search over tourist spots.
+
+On PostgreSQL every spot carries a ``search_vector`` (tsvector, GIN indexed)
+weighted name (A) > category/location (B) > description (C). It is refreshed
+by the signals in apps/tourism/signals.py and, since bulk writes send no
+signals, by the importer after each batch (bulk writes of columns the vector
+does not read, such as coordinates, leave it alone), and queried with
+``ts_rank``. Other
+backends (SQLite in local test runs) fall back to ``icontains`` matching.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery
+
+SEARCH_CONFIG = "english"
+
+
+def uses_postgres_search():
+    return connection.vendor == "postgresql"
+
+
+def spot_search_vector():
+    """tsvector expression for a TouristSpot row, usable in ``.update()``."""
+    from apps.tourism.models import Category, Location
+
+    category = Category.objects.filter(pk=OuterRef("category_id"))
+    location = Location.objects.filter(pk=OuterRef("location_id"))
+    return (
+        SearchVector("name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(
+            Subquery(category.values("name")[:1]),
+            Subquery(location.values("name")[:1]),
+            Subquery(location.values("province")[:1]),
+            Subquery(location.values("region")[:1]),
+            weight="B", config=SEARCH_CONFIG,
+        )
+        + SearchVector("description", weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(queryset):
+    """Recompute ``search_vector`` for every spot in ``queryset`` in one UPDATE."""
+    if not uses_postgres_search():
+        return 0
+    return queryset.update(search_vector=spot_search_vector())
+
+
+def search_spots(queryset, query):
+    """
+    Filter ``queryset`` to spots matching ``query``, best matches first.
+
+    Returns ``queryset`` unchanged for an empty query.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset
+
+    if uses_postgres_search():
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F("search_vector"), search_query))
+            .order_by("-rank", "id")
+        )
+
+    return queryset.filter(
+        Q(name__icontains=query) |
+        Q(description__icontains=query) |
+        Q(category__name__icontains=query) |
+        Q(location__name__icontains=query) |
+        Q(location__region__icontains=query) |
+        Q(location__province__icontains=query)
+    )
@@ -1,52 +1,75 @@
 from rest_framework import serializers
+from .fieldsets import SparseFieldsMixin
 from .models import TouristSpot, Category, Location, Review, Gallery, OperatingHour, TourismReportedSpotAlbay
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = '__all__'
+        exclude = ['updated_at']  # sync bookkeeping, served by /api/sync/
 
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Location
-        fields = '__all__'
+        exclude = ['updated_at']
 
 
-class TouristSpotSerializer(serializers.ModelSerializer):
+class TouristSpotSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = TouristSpot
-        fields = ['id', 'name', 'description', 'image', 'location']
+        fields = ['id', 'name', 'description', 'image', 'rating', 'location']
+        compact_fields = ['id', 'name', 'image', 'rating']
+        expandable_fields = {'location': LocationSerializer}
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = '__all__'
 
 
-class GallerySerializer(serializers.ModelSerializer):
+class GallerySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Gallery
-        fields = '__all__'
+        exclude = ['updated_at']
 
 
-class OperatingHourSerializer(serializers.ModelSerializer):
+class OperatingHourSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = OperatingHour
-        fields = '__all__'
+        exclude = ['updated_at']
+
+
+# Read-only fast path: TouristSpotSerializer's output straight from .values() rows
+SPOT_LIST_VALUES = ['id', 'name', 'description', 'image', 'rating', 'location_id']
+
+
+def spot_list_data(rows):
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'image': row['image'],
+            'rating': row['rating'],
+            'location': row['location_id'],
+        }
+        for row in rows
+    ]
 
 
 # Optional: For nested detail view
-class TouristSpotDetailSerializer(serializers.ModelSerializer):
+class TouristSpotDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     reviews = ReviewSerializer(many=True, source='review_set', read_only=True)
     gallery = GallerySerializer(many=True, source='gallery_set', read_only=True)
-    operatinghour = OperatingHourSerializer(read_only=True)
+    operatinghour = OperatingHourSerializer(many=True, source='operatinghour_set', read_only=True)
 
     class Meta:
         model = TouristSpot
-        fields = '__all__'
+        exclude = ['search_vector', 'updated_at']
+        compact_fields = ['id', 'name', 'image', 'rating']
+        expandable_fields = {'category': CategorySerializer, 'location': LocationSerializer}
 
 
 # --- Serializer for TourismReportedSpot (CSV-backed model) ---
@@ -0,0 +1,91 @@
+# apps/tourism/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.tourism.heatmap import bump_activity_version
+from apps.tourism.mmap_catalog import schedule_catalog_rebuild
+from apps.tourism.models import (
+    Category, Gallery, Location, OperatingHour, Review, SavedSpot, Tombstone, TouristSpot, VisitedSpot,
+)
+from apps.tourism.offline import schedule_bundle_rebuild
+from apps.tourism.search import update_search_vectors
+from apps.tourism.snapshot import schedule_snapshot_rebuild
+from apps.tourism.sync import SYNC_MODELS, model_label
+from apps.tourism.versioning import bump_catalog_version, bump_spots_version
+
+
+@receiver(post_save, sender=TouristSpot)
+def refresh_spot_search_vector(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_vectors(TouristSpot.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_search_vectors(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_vectors(TouristSpot.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Location)
+def refresh_location_search_vectors(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_search_vectors(TouristSpot.objects.filter(location=instance))
+
+
+@receiver([post_save, post_delete], sender=TouristSpot)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Location)
+def spots_changed(sender, **kwargs):
+    bump_spots_version()
+    transaction.on_commit(spots_committed)
+
+
+@receiver([post_save, post_delete], sender=Review)
+@receiver([post_save, post_delete], sender=Gallery)
+def catalog_changed(sender, **kwargs):
+    bump_catalog_version()
+    transaction.on_commit(catalog_committed)
+
+
+def catalog_committed():
+    # Bump again once the change is visible to other connections, so nothing
+    # built from the pre-commit data outlives the transaction, then rebuild
+    # the public snapshot off the request path.
+    bump_catalog_version()
+    schedule_snapshot_rebuild()
+
+
+def spots_committed():
+    # As catalog_committed; the mapped catalog holds spots, categories and
+    # locations only, so it is rebuilt for these and not for reviews.
+    bump_spots_version()
+    schedule_snapshot_rebuild()
+    schedule_catalog_rebuild()
+
+
+@receiver([post_save, post_delete], sender=TouristSpot)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Location)
+@receiver([post_save, post_delete], sender=OperatingHour)
+def bundle_changed(sender, **kwargs):
+    # Only the models the offline bundle holds (AR scenes: apps/ar/signals.py);
+    # reviews and galleries are not in it.
+    transaction.on_commit(schedule_bundle_rebuild)
+
+
+@receiver([post_save, post_delete], sender=SavedSpot)
+@receiver([post_save, post_delete], sender=VisitedSpot)
+def activity_changed(sender, **kwargs):
+    # Reviews already move the catalog version; saves and visits only feed
+    # the heatmap.
+    bump_activity_version()
+    transaction.on_commit(bump_activity_version)
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=model_label(sender), object_id=instance.pk)
+
+
+for model in SYNC_MODELS.values():
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f"sync-tombstone-{model_label(model)}")
@@ -0,0 +1,127 @@
+# apps/tourism/snapshot.py
+"""
+Pre-rendered, pre-compressed snapshot of the public spot catalog.
+
+The full spot list (the ``results`` rows of /api/tourism-spots/, every spot,
+in the same order) is rendered once per catalog version, compressed with
+gzip and, when the ``brotli`` package is installed, brotli, and stored in the
+Django cache. Each worker also keeps the current snapshot in memory, so a
+request is a version check plus a write of ready-made bytes.
+
+Catalog changes schedule a rebuild on a background thread once they commit
+(see apps/tourism/signals.py). Until the new snapshot is ready, a worker
+keeps serving its previous one, whose ETag still describes exactly those
+bytes, and schedules the rebuild itself if it was not the one that saw the
+write. Only a worker with no snapshot at all renders one in the request.
+"""
+import gzip
+import hashlib
+import threading
+
+from django.core.cache import cache
+
+from apps.tourism.models import TouristSpot
+from apps.tourism.renderers import ORJSONRenderer
+from apps.tourism.serializers import SPOT_LIST_VALUES, spot_list_data
+from apps.tourism.versioning import get_catalog_modified, get_catalog_version
+from bicoltravelguide.background import BackgroundJob
+
+try:
+    import brotli
+except ImportError:  # optional; gzip and identity are always available
+    brotli = None
+
+SNAPSHOT_CACHE_KEY = "tourism:catalog-snapshot:{version}"
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+# Preferred first when the client accepts several.
+ENCODINGS = ("br", "gzip", "identity")
+
+
+class CatalogSnapshot:
+    def __init__(self, version, modified, variants):
+        self.version = version
+        self.modified = modified
+        self.variants = variants  # encoding -> bytes
+        digest = hashlib.sha1(variants["identity"]).hexdigest()[:16]
+        self.etags = {encoding: f'"{digest}-{encoding}"' for encoding in variants}
+
+    def negotiate(self, accept_encoding):
+        """Best encoding in ``self.variants`` for an Accept-Encoding header value."""
+        accepted = set()
+        for item in (accept_encoding or "").split(","):
+            coding, *params = item.split(";")
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                accepted.add(coding.strip().lower())
+        for encoding in ENCODINGS:
+            if encoding in self.variants and (encoding == "identity" or encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+
+def render_snapshot(version):
+    rows = TouristSpot.objects.order_by("created_at", "id").values(*SPOT_LIST_VALUES).iterator(chunk_size=2000)
+    body = ORJSONRenderer().render(spot_list_data(rows))
+    variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return CatalogSnapshot(version, get_catalog_modified(), variants)
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def _install(version):
+    """Make the snapshot for ``version``, from the cache or a fresh render, this worker's current one."""
+    global _snapshot
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            key = SNAPSHOT_CACHE_KEY.format(version=version)
+            snapshot = cache.get(key)
+            if snapshot is None:
+                snapshot = render_snapshot(version)
+                cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+            _snapshot = snapshot
+        return _snapshot
+
+
+def get_snapshot():
+    """
+    Snapshot for the current catalog version if one is built, else this
+    worker's previous snapshot while the current one is rebuilt.
+    """
+    global _snapshot
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot is None:
+        return _install(version)
+    if snapshot.version == version:
+        return snapshot
+
+    built = cache.get(SNAPSHOT_CACHE_KEY.format(version=version))
+    if built is not None:
+        _snapshot = built
+        return built
+    schedule_snapshot_rebuild()
+    return snapshot
+
+
+def rebuild_snapshot():
+    _install(get_catalog_version())
+
+
+_rebuild_job = BackgroundJob("catalog-snapshot", rebuild_snapshot)
+
+
+def schedule_snapshot_rebuild():
+    """Rebuild off the request path; requests made while one is queued share it."""
+    return _rebuild_job.schedule()
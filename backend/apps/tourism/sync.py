@@ -0,0 +1,139 @@
+# apps/tourism/sync.py
+"""
+Delta sync for the mobile app: everything created, updated or deleted in the
+catalog since a cursor.
+
+Every synced model carries an ``updated_at`` (auto_now) column; deletes are
+recorded as Tombstone rows by apps/tourism/signals.py. A cursor is the server
+time (microseconds since the epoch) at which the previous sync started.
+Rows are matched from ``SYNC_OVERLAP`` before the cursor, so a write whose
+transaction commits a little after its ``updated_at`` was stamped, or a
+worker whose clock runs slightly behind, is still picked up; clients upsert,
+so the overlap only costs a few repeated rows.
+
+Bulk writes (``QuerySet.update()``, ``bulk_update()``) skip auto_now, so
+the synced models use TouchingQuerySet (bicoltravelguide/queries.py),
+which sets ``updated_at`` on them too.
+
+A sync is paged: each response holds at most ``SYNC_PAGE_SIZE`` rows, read
+with ``.iterator()`` so they are not also kept in a queryset cache, and
+``next`` names the page after it (models in SYNC_MODELS order, then by pk).
+Every page of one sync carries the same ``cursor`` and ``full``; deletes
+come on the first page. A client stores the cursor, and replaces its copy
+when ``full`` is set, only once it has read the last page.
+
+Tombstones are kept for ``TOMBSTONE_RETENTION`` (see the
+prune_sync_tombstones command); a cursor older than that gets a full resync.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from apps.ar.models import ARScene
+from apps.tourism.models import Category, Gallery, Location, OperatingHour, Tombstone, TouristSpot
+
+SYNC_OVERLAP = timedelta(minutes=2)
+TOMBSTONE_RETENTION = timedelta(days=30)
+SYNC_PAGE_SIZE = 1000
+SYNC_CHUNK_SIZE = 500
+
+# Response key -> model. Row fields are the model's concrete columns (file
+# fields as their storage name), minus the ones listed in SYNC_EXCLUDE.
+SYNC_MODELS = {
+    "categories": Category,
+    "locations": Location,
+    "spots": TouristSpot,
+    "galleries": Gallery,
+    "hours": OperatingHour,
+    "ar_scenes": ARScene,
+}
+SYNC_EXCLUDE = {"search_vector"}
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def encode_cursor(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(cursor):
+    """Datetime for a cursor string; ValueError if it is not one."""
+    micros = int(cursor)
+    if micros < 0:
+        raise ValueError("negative cursor")
+    return datetime.fromtimestamp(0, dt_timezone.utc) + timedelta(microseconds=micros)
+
+
+def sync_columns(model):
+    return [field.attname for field in model._meta.concrete_fields if field.name not in SYNC_EXCLUDE]
+
+
+def encode_page(started, key, after):
+    payload = {"started": encode_cursor(started), "model": key, "after": after}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_page(token):
+    """``(started, key, after)`` for a page token; ValueError if it is not one."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        started, key, after = decode_cursor(payload["started"]), payload["model"], int(payload["after"])
+    except (TypeError, KeyError, OverflowError, UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError("invalid page token") from exc
+    if key not in SYNC_MODELS or after < 0:
+        raise ValueError("invalid page token")
+    return started, key, after
+
+
+def changes_since(since, page=None):
+    """
+    ``(cursor, full, changes, next_page)`` for a sync from ``since`` (a
+    datetime, or None for a first sync). ``page`` is a decoded page token, or
+    None for the first page. ``changes`` maps each key of SYNC_MODELS to
+    ``{"updated": [rows], "deleted": [ids]}``; ``full`` says the client should
+    replace its copy rather than merge into it. ``next_page`` is the token of
+    the following page, or None on the last one.
+    """
+    started, first_key, after = page or (timezone.now(), next(iter(SYNC_MODELS)), 0)
+    full = since is None or since < started - TOMBSTONE_RETENTION
+    changes = {key: {"updated": [], "deleted": []} for key in SYNC_MODELS}
+    remaining = SYNC_PAGE_SIZE
+    next_page = None
+    keys = list(SYNC_MODELS)
+    for key in keys[keys.index(first_key):]:
+        model = SYNC_MODELS[key]
+        rows = model.objects.filter(pk__gt=after).order_by("pk")
+        if not full:
+            rows = rows.filter(updated_at__gte=since - SYNC_OVERLAP)
+        updated = changes[key]["updated"]
+        # One row past the page tells whether there is a next one.
+        for row in rows.values(*sync_columns(model))[:remaining + 1].iterator(chunk_size=SYNC_CHUNK_SIZE):
+            if len(updated) == remaining:
+                next_page = encode_page(started, key, updated[-1]["id"] if updated else after)
+                break
+            updated.append(row)
+        if next_page:
+            break
+        remaining -= len(updated)
+        after = 0
+
+    if not full and page is None:
+        labels = {model_label(model): key for key, model in SYNC_MODELS.items()}
+        tombstones = (
+            Tombstone.objects.filter(model__in=labels, deleted_at__gte=since - SYNC_OVERLAP)
+            .order_by("pk").values_list("model", "object_id")
+        )
+        for label, object_id in tombstones.iterator(chunk_size=SYNC_CHUNK_SIZE):
+            changes[labels[label]]["deleted"].append(object_id)
+    return encode_cursor(started), full, changes, next_page
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones no cursor within TOMBSTONE_RETENTION can still need."""
+    cutoff = (now or timezone.now()) - TOMBSTONE_RETENTION - SYNC_OVERLAP
+    return Tombstone.objects.filter(deleted_at__lt=cutoff).delete()[0]
@@ -1,8 +1,60 @@
 # tests.py
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest.mock
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from rest_framework import status
-from apps.tourism.models import TouristSpot, Location, Category
+from apps.tourism.autocomplete import PrefixIndex, _prefix_index
+from apps.tourism.clusters import SCENE, SPOT, MapClusterIndex
+from apps.ar.models import ARScene
+from apps.tourism.catalog import CSVCatalog, CATEGORY_CSV, LOCATION_CSV, SPOT_CSV, get_catalog
+from apps.tourism.fuzzy import (
+    _word_trigrams, fuzzy_search_spots, search_with_fuzzy_fallback, trigrams, word_similarity,
+)
+from apps.tourism.geocoding import parse_map_embed
+from apps.tourism.heatmap import TILE_PRUNE_GRACE, TILE_SIZE
+from apps.tourism.mmap_catalog import MappedCatalog, get_mapped_catalog, rebuild_catalog, write_catalog
+from apps.tourism.nearby import sort_by_distance
+from apps.tourism import offline
+from apps.tourism.offline import (
+    THUMBNAIL_PRUNE_GRACE, build_bundle, build_thumbnails, read_latest, rebuild_current_bundle,
+)
+from apps.tourism.search import search_spots
+from apps.tourism.models import (
+    TouristSpot, Location, Category, Review, Gallery, OperatingHour, SavedSpot, Tombstone, VisitedSpot,
+)
+from apps.tourism.renderers import ORJSONRenderer
+from apps.tourism.serializers import TouristSpotSerializer
+from apps.tourism.pagination import KeysetPagination
+from apps.tourism.snapshot import get_snapshot, rebuild_snapshot, render_snapshot
+from apps.tourism.sync import SYNC_MODELS, SYNC_OVERLAP, TOMBSTONE_RETENTION, encode_cursor, encode_page
+from apps.tourism.versioning import CATALOG_VERSION_KEY, VersionedValue, VersionStamp, bump_catalog_version
+from apps.tourism.views.api_views import TouristSpotListAPIView
+from bicoltravelguide.query_budget import (
+    QueryBudgetExceeded, QueryBudgetTestMixin, QueryRecorder, get_query_budget, query_budget, query_shape,
+)
 
 
 class TouristSpotAPITestCase(TestCase):
@@ -34,4 +86,1200 @@ class TouristSpotAPITestCase(TestCase):
         # Assert the response data
         self.assertEqual(len(response.data), 2)
         self.assertEqual(response.data[0]['name'], "Test Spot 1")
-        self.assertEqual(response.data[1]['name'], "Test Spot 2")
\ No newline at end of file
+        self.assertEqual(response.data[1]['name'], "Test Spot 2")
+
+class CSVCatalogTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self._write(LOCATION_CSV, "id,name,region,province\n1,Ligao,Bicol,Albay\n2,Naga,Bicol,Camarines Sur\n")
+        self._write(CATEGORY_CSV, "id,name\n1,Nature Park\n")
+        self._write(SPOT_CSV, "id,name,location_id,category_id,image,name_url\n"
+                              "1,Kawa-Kawa Hill,1,1,images/a.jpg,kawakawahill\n"
+                              "2,Basilica,2,1,b.jpg,basilica\n"
+                              "3,Basilica Minore,1,1,c.jpg,basilica\n")
+
+    def _write(self, name, text):
+        with open(os.path.join(self.tmpdir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_indexes(self):
+        catalog = CSVCatalog(self.tmpdir).refresh()
+        self.assertEqual(catalog.get_spot(1)["name"], "Kawa-Kawa Hill")
+        self.assertEqual(catalog.get_spot_by_name_url("basilica")["id"], "2")
+        self.assertEqual(catalog.get_spot_by_name_url("basilica", province="Albay")["id"], "3")
+        self.assertIsNone(catalog.get_spot_by_name_url("kawakawahill", province="Camarines Sur"))
+        self.assertEqual([r["id"] for r in catalog.spots_in_province("Albay")], ["1", "3"])
+        self.assertEqual(catalog.image_map, {1: "images/a.jpg", 2: "images/b.jpg", 3: "images/c.jpg"})
+
+    def test_reloads_only_when_file_changes(self):
+        catalog = CSVCatalog(self.tmpdir).refresh()
+        spots = catalog.spots
+        self.assertIs(catalog.refresh().spots, spots)
+
+        self._write(SPOT_CSV, "id,name,location_id,category_id,image,name_url\n"
+                              "3,Cagsawa Ruins,1,1,c.jpg,cagsawaruins\n")
+        self.assertEqual([r["id"] for r in catalog.refresh().spots], ["3"])
+        self.assertIsNone(catalog.get_spot(1))
+
+    def test_memo_is_dropped_on_reload(self):
+        catalog = CSVCatalog(self.tmpdir).refresh()
+        calls = []
+        build = lambda: calls.append(1) or len(catalog.spots)
+        self.assertEqual(catalog.memo("count", build), 3)
+        self.assertEqual(catalog.memo("count", build), 3)
+        self.assertEqual(len(calls), 1)
+
+        self._write(SPOT_CSV, "id,name,location_id,category_id,image,name_url\n")
+        self.assertEqual(catalog.refresh().memo("count", build), 0)
+        self.assertEqual(len(calls), 2)
+
+
+class MappedCatalogTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.path = os.path.join(self.tmpdir, "spots.tgcat")
+        records = [
+            {"id": 7, "name": "Cagsawa Ruins", "name_url": "cagsawaruins", "province": "Albay"},
+            {"id": 3, "name": "Kawa-Kawa Hill", "name_url": "kawakawahill", "province": "Albay"},
+            {"id": 5, "name": "Basilica", "name_url": "basilica", "province": "Camarines Sur"},
+        ]
+        self.assertEqual(write_catalog(self.path, records), 3)
+        self.catalog = MappedCatalog(self.path)
+        self.addCleanup(self.catalog.close)
+
+    def test_lookups(self):
+        self.assertEqual(len(self.catalog), 3)
+        self.assertEqual(self.catalog.get(3)["name"], "Kawa-Kawa Hill")
+        self.assertIsNone(self.catalog.get(4))
+        self.assertEqual(self.catalog.get_by_name_url("basilica")["id"], 5)
+        self.assertIsNone(self.catalog.get_by_name_url("mayon"))
+        self.assertEqual([r["id"] for r in self.catalog.in_province(" albay ")], [7, 3])
+        self.assertEqual(self.catalog.in_province("Sorsogon"), [])
+
+    def test_build_from_csv(self):
+        call_command("build_spot_catalog", source="csv", output=self.path, stdout=StringIO())
+        catalog = MappedCatalog(self.path)
+        self.addCleanup(catalog.close)
+        self.assertEqual(len(catalog), len(get_catalog().spots))
+        self.assertEqual(catalog.catalog_version, 0)
+
+    def test_nearest_in_province_decodes_lazily(self):
+        records = [
+            {"id": 1, "name": "Mayon", "province": "Albay", "latitude": 13.2575, "longitude": 123.6856},
+            {"id": 2, "name": "Unmapped", "province": "Albay"},
+            {"id": 3, "name": "Cagsawa", "province": "Albay", "latitude": 13.1662, "longitude": 123.7103},
+            {"id": 4, "name": "Closed", "province": "Albay", "latitude": 13.14, "longitude": 123.74, "is_active": False},
+            {"id": 5, "name": "Daraga", "province": "Albay", "latitude": 13.1490, "longitude": 123.7120},
+        ]
+        write_catalog(self.path, records)
+        catalog = MappedCatalog(self.path)
+        self.addCleanup(catalog.close)
+        with unittest.mock.patch.object(MappedCatalog, "record", wraps=catalog.record) as record:
+            nearest = catalog.nearest_in_province("albay", 13.1391, 123.7438, exclude_id=3)
+            self.assertEqual(len(nearest), 3)
+            record.assert_not_called()
+            self.assertEqual([spot["name"] for spot in nearest], ["Daraga", "Mayon", "Unmapped"])
+        self.assertEqual([spot["id"] for spot in catalog.nearest_in_province("albay", None, None)], [1, 2, 3, 5])
+
+
+class MappedCatalogRebuildTestCase(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        settings_override = self.settings(SPOT_CATALOG_PATH=os.path.join(tmpdir, "spots.tgcat"))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        self.spot = TouristSpot.objects.create(name="Mayon Volcano", description="Perfect cone",
+                                               location=location, category=Category.objects.create(name="Nature"))
+
+    def test_stale_catalog_falls_back_until_rebuilt(self):
+        call_command("build_spot_catalog", stdout=StringIO())
+        self.assertEqual(get_mapped_catalog().get(self.spot.pk)["description"], "Perfect cone")
+
+        self.spot.description = "Still a perfect cone"
+        with unittest.mock.patch("apps.tourism.mmap_catalog.schedule_catalog_rebuild") as schedule:
+            self.spot.save()
+            self.assertIsNone(get_mapped_catalog())
+        schedule.assert_called()
+
+        self.assertTrue(rebuild_catalog())
+        self.assertFalse(rebuild_catalog())
+        self.assertEqual(get_mapped_catalog().get(self.spot.pk)["description"], "Still a perfect cone")
+
+    def test_reviews_leave_the_catalog_current(self):
+        call_command("build_spot_catalog", stdout=StringIO())
+        user = get_user_model().objects.create_user("tourist", password="pw")
+        with unittest.mock.patch("apps.tourism.mmap_catalog.schedule_catalog_rebuild") as schedule:
+            Review.objects.create(user=user, tourist_spot=self.spot, rating=5)
+            self.assertIsNotNone(get_mapped_catalog())
+        schedule.assert_not_called()
+
+    def test_csv_catalog_is_stale_once_the_database_has_spots(self):
+        write_catalog(settings.SPOT_CATALOG_PATH, [{"id": 99, "name": "From the CSV", "name_url": "fromthecsv"}])
+        with unittest.mock.patch("apps.tourism.mmap_catalog.schedule_catalog_rebuild") as schedule:
+            self.assertIsNone(get_mapped_catalog())
+        schedule.assert_called_once_with()
+
+        self.assertTrue(rebuild_catalog())
+        self.assertEqual(get_mapped_catalog().get(self.spot.pk)["name"], "Mayon Volcano")
+        self.assertIsNone(get_mapped_catalog().get(99))
+
+    def test_csv_catalog_is_served_while_the_database_is_empty(self):
+        TouristSpot.objects.all().delete()
+        write_catalog(settings.SPOT_CATALOG_PATH, [{"id": 99, "name": "From the CSV", "name_url": "fromthecsv"}])
+        self.assertEqual(get_mapped_catalog().get(99)["name"], "From the CSV")
+        self.assertFalse(rebuild_catalog())
+
+
+class LoadDataCommandTestCase(TestCase):
+    HEADER = "name,description,category_name,location_name,region,province,image,rating,is_featured\n"
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.csv_path = os.path.join(self.tmpdir, "spots.csv")
+
+    def _load(self, body, **options):
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(self.HEADER + body)
+        out = StringIO()
+        call_command("load_data", self.csv_path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_bulk_upsert(self):
+        self._load("Mayon Volcano,Perfect cone,Nature,Legazpi,Bicol,Albay,mayon.jpg,4.9,true\n"
+                   "Cagsawa Ruins,Old church,Heritage,Daraga,Bicol,Albay,,,false\n")
+        self.assertEqual(TouristSpot.objects.count(), 2)
+        self.assertEqual(Category.objects.count(), 2)
+
+        self._load("Mayon Volcano,Still a perfect cone,Nature,Legazpi,Bicol,Albay,mayon.jpg,5,true\n",
+                   batch_size=1)
+        self.assertEqual(TouristSpot.objects.count(), 2)
+        mayon = TouristSpot.objects.get(name_url="mayonvolcano")
+        self.assertEqual(mayon.description, "Still a perfect cone")
+        self.assertEqual(mayon.rating, 5.0)
+        self.assertTrue(mayon.is_featured)
+        self.assertEqual(Location.objects.count(), 2)
+
+    def test_search_vectors_refreshed_per_chunk(self):
+        with unittest.mock.patch('apps.tourism.importer.update_search_vectors') as update:
+            self._load("Mayon Volcano,Perfect cone,Nature,Legazpi,Bicol,Albay,,,\n"
+                       "Cagsawa Ruins,Old church,Heritage,Daraga,Bicol,Albay,,,\n", batch_size=1)
+        self.assertEqual([sorted(call.args[0].values_list('name', flat=True)) for call in update.call_args_list],
+                         [["Mayon Volcano"], ["Cagsawa Ruins"]])
+
+    def test_dry_run_reports_errors_without_writing(self):
+        out = self._load("Mayon Volcano,Perfect cone,Nature,Legazpi,Bicol,Albay,,high,true\n"
+                         ",No name,Nature,Legazpi,Bicol,Albay,,,\n"
+                         "Cagsawa Ruins,Old church,Heritage,Daraga,Bicol,Albay,,,false\n",
+                         dry_run=True)
+        self.assertEqual(TouristSpot.objects.count(), 0)
+        self.assertIn("Line 2:", out)
+        self.assertIn("Line 3: missing name", out)
+        self.assertIn("Validated 1 of 3 rows", out)
+
+    def test_dry_run_checks_ids(self):
+        category = Category.objects.create(name="Nature")
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        self.HEADER = "name,category_id,location_id\n"
+        out = self._load(f"Mayon Volcano,{category.pk},{location.pk}\n"
+                         f"Cagsawa Ruins,{category.pk},999\n"
+                         f"Daraga Church,999,{location.pk}\n", dry_run=True)
+        self.assertIn("Line 3: unknown category_id or location_id", out)
+        self.assertIn("Line 4: unknown category_id or location_id", out)
+        self.assertIn("Validated 1 of 3 rows", out)
+
+
+class ExportCSVSnapshotTestCase(TestCase):
+    def test_export_round_trips_through_catalog(self):
+        location = Location.objects.create(name="Ligao", region="Bicol", province="Albay")
+        category = Category.objects.create(name="Nature Park")
+        TouristSpot.objects.create(name="Kawa-Kawa Hill", description="Bamboo groves, \"hilltop\" views",
+                                   location=location, category=category, rating=4.8)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+
+        call_command("export_csv_snapshot", output_dir=tmpdir, chunk_size=1, stdout=StringIO())
+
+        self.assertEqual(sorted(os.listdir(tmpdir)), sorted([CATEGORY_CSV, LOCATION_CSV, SPOT_CSV]))
+        catalog = CSVCatalog(tmpdir).refresh()
+        spot = catalog.get_spot_by_name_url("kawa-kawahill")
+        self.assertEqual(spot["description"], "Bamboo groves, \"hilltop\" views")
+        self.assertEqual(spot["rating"], "4.8")
+        self.assertEqual(catalog.province_of(spot), "albay")
+
+
+class SpotSearchTestCase(TestCase):
+    def setUp(self):
+        albay = Location.objects.create(name="Daraga", region="Bicol", province="Albay")
+        sorsogon = Location.objects.create(name="Donsol", region="Bicol", province="Sorsogon")
+        heritage = Category.objects.create(name="Heritage")
+        nature = Category.objects.create(name="Nature")
+        TouristSpot.objects.create(name="Cagsawa Ruins", description="Church ruins facing Mayon.",
+                                   location=albay, category=heritage)
+        TouristSpot.objects.create(name="Butanding Watching", description="Whale sharks.",
+                                   location=sorsogon, category=nature)
+
+    def test_search_matches_name_category_and_location(self):
+        spots = TouristSpot.objects.all()
+        self.assertEqual([s.name for s in search_spots(spots, "cagsawa")], ["Cagsawa Ruins"])
+        self.assertEqual([s.name for s in search_spots(spots, "nature")], ["Butanding Watching"])
+        self.assertEqual([s.name for s in search_spots(spots, "sorsogon")], ["Butanding Watching"])
+        self.assertEqual(search_spots(spots, "  ").count(), 2)
+
+    def test_filter_search_param(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user("tourist", password="pw"))
+        response = client.get('/tourism/spots/', {'search': 'mayon'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s['name'] for s in response.data['results']], ["Cagsawa Ruins"])
+
+
+class AutocompleteTestCase(TestCase):
+    def setUp(self):
+        albay = Location.objects.create(name="Daraga", region="Bicol", province="Albay")
+        heritage = Category.objects.create(name="Heritage")
+        TouristSpot.objects.create(name="Cagsawa Ruins", description="", location=albay, category=heritage)
+        TouristSpot.objects.create(name="Daraga Church", description="", location=albay, category=heritage)
+        self.client = APIClient()
+        # A fresh worker, and rebuilds run by the test rather than a thread
+        for name, value in [('_current', None), ('_job', unittest.mock.Mock())]:
+            patcher = unittest.mock.patch.object(_prefix_index, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_prefix_index_ranking(self):
+        index = PrefixIndex([
+            {"id": 1, "name": "Mayon Volcano", "name_url": "mayon", "province": "Albay", "location": "Legazpi"},
+            {"id": 2, "name": "Mayon Skyline", "name_url": "skyline", "province": "Albay", "location": "Tabaco"},
+            {"id": 3, "name": "Legazpi Boulevard", "name_url": "boulevard", "province": "Albay", "location": "Legazpi"},
+            {"id": 4, "name": "Peñafrancia Basilica", "name_url": "basilica", "province": "Camarines Sur"},
+        ])
+        self.assertEqual([s["id"] for s in index.search("may")], [2, 1])
+        self.assertEqual([s["id"] for s in index.search("mayon v")], [1])
+        self.assertEqual([s["id"] for s in index.search("legaz")], [3, 1])
+        self.assertEqual([s["id"] for s in index.search("penafr")], [4])
+        self.assertEqual(index.search("zz"), [])
+
+    def test_endpoint_rebuilds_when_spots_change(self):
+        response = self.client.get('/api/spots/autocomplete/', {'q': 'dar'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s['name'] for s in response.data], ["Daraga Church", "Cagsawa Ruins"])
+        self.assertEqual(set(response.data[0]), {"id", "name", "name_url", "province"})
+
+        # Reviews leave the index alone.
+        user = get_user_model().objects.create_user("tourist", password="pw")
+        Review.objects.create(user=user, tourist_spot=TouristSpot.objects.get(name="Cagsawa Ruins"), rating=5)
+        self.client.get('/api/spots/autocomplete/', {'q': 'dar'})
+        _prefix_index._job.schedule.assert_not_called()
+
+        # A spot change is served from the old index until the background rebuild.
+        TouristSpot.objects.filter(name="Daraga Church").get().delete()
+        response = self.client.get('/api/spots/autocomplete/', {'q': 'dar'})
+        self.assertEqual(len(response.data), 2)
+        _prefix_index._job.schedule.assert_called_once_with()
+        _prefix_index.refresh()
+        response = self.client.get('/api/spots/autocomplete/', {'q': 'dar'})
+        self.assertEqual([s['name'] for s in response.data], ["Cagsawa Ruins"])
+
+
+class FuzzySearchTestCase(TestCase):
+    def setUp(self):
+        daraga = Location.objects.create(name="Daraga", region="Bicol", province="Albay")
+        legazpi = Location.objects.create(name="Legazpi", region="Bicol", province="Albay")
+        nature = Category.objects.create(name="Nature")
+        TouristSpot.objects.create(name="Cagsawa Ruins", description="", location=daraga, category=nature)
+        TouristSpot.objects.create(name="Mayon Volcano", description="", location=legazpi, category=nature)
+
+    def test_trigram_similarity_matches_pg_trgm(self):
+        self.assertEqual(trigrams("Cat"), {"  c", " ca", "cat", "at "})
+        # word_similarity('word', 'two words') is 0.8 in pg_trgm
+        target = [_word_trigrams("two"), _word_trigrams("words")]
+        self.assertAlmostEqual(word_similarity(trigrams("word"), target, 1), 0.8)
+
+    def test_misspellings(self):
+        spots = TouristSpot.objects.all()
+        self.assertEqual([s.name for s in fuzzy_search_spots(spots, "Mayyon")], ["Mayon Volcano"])
+        self.assertEqual([s.name for s in fuzzy_search_spots(spots, "Cagsaua")], ["Cagsawa Ruins"])
+        self.assertEqual([s.name for s in fuzzy_search_spots(spots, "Legaspi")], ["Mayon Volcano"])
+        self.assertEqual(list(fuzzy_search_spots(spots, "Boracay")), [])
+
+    def test_full_text_falls_back_to_fuzzy(self):
+        spots = TouristSpot.objects.all()
+        self.assertEqual([s.name for s in search_with_fuzzy_fallback(spots, "Cagsaua")], ["Cagsawa Ruins"])
+        self.assertEqual([s.name for s in search_with_fuzzy_fallback(spots, "cagsawa")], ["Cagsawa Ruins"])
+
+
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        location = Location.objects.create(name="Legazpi")
+        category = Category.objects.create(name="Nature")
+        TouristSpot.objects.bulk_create([
+            TouristSpot(name=f"Spot {i}", name_url=f"spot-{i}", description="", location=location, category=category)
+            for i in range(5)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("tourist", password="pw"))
+
+    def test_walks_every_page_once(self):
+        names, url = [], '/api/tourism-spots/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 2)
+            names += [spot['name'] for spot in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(names, [f"Spot {i}" for i in range(5)])
+
+    def test_list_is_filtered(self):
+        TouristSpot.objects.filter(name="Spot 3").update(description="Crater lake")
+        for params in [{'search': 'crater'}, {'search': 'crater', 'fields': 'id,name'}, {'name': 'spot 3'}]:
+            with self.subTest(**params):
+                response = self.client.get('/api/tourism-spots/', params)
+                self.assertEqual([spot['name'] for spot in response.data['results']], ["Spot 3"])
+
+    def test_ranked_results_keep_their_order(self):
+        location, category = Location.objects.get(), Category.objects.get()
+        TouristSpot.objects.create(name="Mayyon Lookout", description="", location=location, category=category)
+        TouristSpot.objects.create(name="Mayon Volcano", description="", location=location, category=category)
+        names, url = [], '/tourism/spots/?fuzzy=Mayon&page_size=1'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [spot['name'] for spot in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(names, ["Mayon Volcano", "Mayyon Lookout"])
+
+    def test_deep_page_uses_keyset_not_offset(self):
+        first = self.client.get('/api/tourism-spots/', {'page_size': 3})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first.data['next'])
+        sql = " ".join(q['sql'] for q in ctx.captured_queries).upper()
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT(", sql)
+
+    def test_keyset_predicate_seeks_the_index(self):
+        spot = TouristSpot.objects.order_by('created_at', 'id')[2]
+        key = [spot.created_at, spot.pk]
+        queryset = TouristSpot.objects.filter(KeysetPagination()._after(key)).order_by('created_at', 'id')
+        where = str(queryset.query).split(" WHERE ", 1)[1]
+        # A leading bound ANDed with the OR, not the bare OR
+        self.assertRegex(where, r'^\("tourism_touristspot"\."created_at" >= .+ AND \(')
+        self.assertEqual(list(queryset), list(TouristSpot.objects.order_by('created_at', 'id')[3:]))
+        if connection.vendor == 'sqlite':
+            plan = queryset.explain()
+            self.assertIn('tourism_spot_created_id_idx (created_at>?)', plan)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/tourism-spots/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryBudgetTestCase(SimpleTestCase):
+    def test_query_shape_collapses_in_lists(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM "t"\n  WHERE "id" IN (%s, %s, %s)'),
+            query_shape('SELECT * FROM "t" WHERE "id" IN (%s)'),
+        )
+
+    def test_repeated_shapes_are_flagged(self):
+        recorder = QueryRecorder()
+        execute = lambda sql, params, many, context: None
+        for _ in range(3):
+            recorder(execute, 'SELECT "name" FROM "category" WHERE "id" = %s', (1,), False, {})
+        recorder(execute, 'SELECT "id" FROM "spot"', (), False, {})
+        self.assertEqual(len(recorder), 4)
+        self.assertEqual(recorder.repeated(), [('SELECT "name" FROM "category" WHERE "id" = %s', 3)])
+
+    def test_budget_per_method(self):
+        view = query_budget({'GET': 2})(lambda request: None)
+        self.assertEqual(get_query_budget(view, 'GET'), 2)
+        self.assertIsNone(get_query_budget(view, 'POST'))
+        self.assertEqual(get_query_budget(TouristSpotListAPIView.as_view(), 'GET'), 3)
+
+
+class TourismQueryBudgetTestCase(QueryBudgetTestMixin, TestCase):
+    """Every tourism endpoint stays within its declared query budget with several rows per table."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user("tourist", password="pw")
+        for province in ("Albay", "Camarines Sur", "Sorsogon"):
+            location = Location.objects.create(name=f"{province} town", province=province, region="Bicol")
+            for i in range(3):
+                spot = TouristSpot.objects.create(
+                    name=f"{province} spot {i}", description="", location=location,
+                    category=Category.objects.create(name=f"{province} category {i}"),
+                )
+                Review.objects.create(user=user, tourist_spot=spot, rating=5)
+                Gallery.objects.create(tourist_spot=spot, image="gallery/spot.jpg")
+                OperatingHour.objects.create(tourist_spot=spot, open_time="08:00", close_time="17:00")
+        self.spot = TouristSpot.objects.order_by("id").first()
+        self.client.force_login(user)
+
+    def test_api_endpoints(self):
+        spot = self.spot
+        for url in [
+            '/api/tourism-spots/', '/api/spots/autocomplete/?q=alb',
+            '/tourism/spots/', '/tourism/spots/?search=spot', f'/tourism/spots/{spot.pk}/',
+            f'/tourism/spots/{spot.pk}/full/',
+            '/tourism/categories/', f'/tourism/categories/{spot.category_id}/',
+            '/tourism/locations/', f'/tourism/locations/{spot.location_id}/',
+            '/tourism/reviews/', f'/tourism/reviews/{Review.objects.first().pk}/',
+            '/tourism/galleries/', f'/tourism/galleries/{Gallery.objects.first().pk}/',
+            '/tourism/hours/', f'/tourism/hours/{OperatingHour.objects.first().pk}/',
+        ]:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(url)
+
+    def test_pages(self):
+        for url in [
+            '/tourism/', '/tourism/explore/', '/tourism/explore/?search=mayyon', '/tourism/saved/',
+            '/tourism/review/', '/tourism/reports/', '/tourism/reports/?query=albay',
+            '/tourism/reports/albay/', '/tourism/reports/albay/?query=albay',
+            f'/tourism/reports/albay/{self.spot.name_url}/',
+        ]:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(url)
+
+    def test_writes(self):
+        self.assertWithinQueryBudget(
+            '/tourism/reviews/', 'post', data={'tourist_spot': self.spot.pk, 'rating': 4, 'user': 1},
+            content_type='application/json',
+        )
+        self.assertWithinQueryBudget(
+            f'/tourism/categories/{self.spot.category_id}/', 'patch', data={'name': 'Heritage'},
+            content_type='application/json',
+        )
+
+    def test_over_budget_fails(self):
+        with self.settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_RAISE=True):
+            with unittest.mock.patch.object(TouristSpotListAPIView, 'query_budget', 1):
+                with self.assertRaises(QueryBudgetExceeded):
+                    self.client.get('/api/tourism-spots/')
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("tourist", password="pw")
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        category = Category.objects.create(name="Nature")
+        self.spot = TouristSpot.objects.create(name="Mayon Volcano", description="", location=location, category=category)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified_skips_the_database(self):
+        for url in ['/api/tourism-spots/', f'/tourism/spots/{self.spot.pk}/', f'/tourism/spots/{self.spot.pk}/full/']:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, status.HTTP_200_OK)
+                self.assertTrue(first['ETag'].startswith('"'))
+
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['ETag'], first['ETag'])
+                self.assertEqual(len(ctx), 0)
+
+                response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_version_is_shared_between_workers(self):
+        self.assertNotEqual(settings.CACHES['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+        # Another worker process has its own cache client on the same store.
+        other_worker = caches.create_connection('default')
+        version = bump_catalog_version()
+        self.assertEqual(other_worker.get(CATALOG_VERSION_KEY), version)
+
+    def test_versioned_value_is_rebuilt_only_after_a_bump(self):
+        stamp = VersionStamp('tests:stamp')
+        builds = []
+        value = VersionedValue(stamp.get, lambda version: builds.append(version) or len(builds))
+        self.assertEqual((value.get(), value.get()), (1, 1))
+        stamp.bump()
+        self.assertEqual(value.get(), 2)
+        self.assertEqual(builds[1], stamp.get())
+
+    def test_background_versioned_value_serves_the_old_value_until_rebuilt(self):
+        stamp = VersionStamp('tests:stamp')
+        builds = []
+        value = VersionedValue(stamp.get, lambda version: builds.append(version) or len(builds), background='tests')
+        with unittest.mock.patch.object(value, '_job') as job:
+            self.assertEqual(value.get(), 1)  # the first build is inline
+            stamp.bump()
+            self.assertEqual(value.get(), 1)
+            job.schedule.assert_called_once_with()
+        value.refresh()
+        self.assertEqual(value.get(), 2)
+
+    def test_review_changes_the_etag(self):
+        url = f'/tourism/spots/{self.spot.pk}/full/'
+        etag = self.client.get(url)['ETag']
+        Review.objects.create(user=self.user, tourist_spot=self.spot, rating=5)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['reviews']), 1)
+
+
+class SparseFieldsetTestCase(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("tourist", password="pw")
+        location = Location.objects.create(name="Legazpi", province="Albay", region="Bicol")
+        category = Category.objects.create(name="Nature")
+        self.spot = TouristSpot.objects.create(
+            name="Mayon Volcano", description="A long description " * 50, location=location, category=category,
+            image="mayon.jpg", rating=4.8, map_embed="<iframe></iframe>",
+        )
+        Review.objects.create(user=user, tourist_spot=self.spot, rating=5)
+        OperatingHour.objects.create(tourist_spot=self.spot, open_time="08:00", close_time="17:00")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def _get(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def test_compact_view_narrows_sql(self):
+        response, queries = self._get('/api/tourism-spots/', {'view': 'compact'})
+        self.assertEqual(response.data['results'], [{'id': self.spot.pk, 'name': "Mayon Volcano", 'image': "mayon.jpg", 'rating': 4.8}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0])
+        self.assertNotIn('"map_embed"', queries[0])
+
+    def test_fields_and_expand(self):
+        response, queries = self._get('/api/tourism-spots/', {'fields': 'id,name,location', 'expand': 'location'})
+        self.assertEqual(response.data['results'][0]['location'], {
+            'id': self.spot.location_id, 'name': "Legazpi", 'province': "Albay", 'region': "Bicol",
+        })
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'location'})
+        self.assertEqual(len(queries), 1)
+
+        response, _ = self._get('/api/tourism-spots/', {})
+        self.assertEqual(response.data['results'][0]['location'], self.spot.location_id)
+
+    def test_full_detail(self):
+        url = f'/tourism/spots/{self.spot.pk}/full/'
+        response, queries = self._get(url, {})
+        self.assertNotIn('search_vector', response.data)
+        self.assertEqual(len(response.data['reviews']), 1)
+        self.assertEqual(len(response.data['operatinghour']), 1)
+        self.assertEqual(len(queries), 4)
+
+        response, queries = self._get(url, {'fields': 'id,name,category', 'expand': 'category'})
+        self.assertEqual(response.data, {'id': self.spot.pk, 'name': "Mayon Volcano", 'category': {'id': self.spot.category_id, 'name': "Nature"}})
+        self.assertEqual(len(queries), 1)
+
+
+class FastPathListTestCase(TestCase):
+    def setUp(self):
+        location = Location.objects.create(name="Legazpi")
+        category = Category.objects.create(name="Nature")
+        TouristSpot.objects.bulk_create([
+            TouristSpot(name="Mayon Volcano", name_url="mayon", description="Perfect cone \"quoted\"",
+                        image="mayon.jpg", rating=4.75, location=location, category=category),
+            TouristSpot(name="Cagsawa Ruins ⛪", name_url="cagsawa", description="", location=location, category=category),
+            TouristSpot(name="Sumlang Lake", name_url="sumlang", description="Ñ é 日本", rating=0.1,
+                        location=location, category=category),
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user("tourist", password="pw"))
+
+    def test_list_matches_serializer_bytes(self):
+        for params in [{}, {'page_size': 2}]:
+            with self.subTest(params=params):
+                response = self.client.get('/api/tourism-spots/', params)
+                spots = TouristSpot.objects.order_by('created_at', 'id')[:params.get('page_size', 20)]
+                expected = JSONRenderer().render({
+                    'next': response.data['next'],
+                    'results': TouristSpotSerializer(spots, many=True).data,
+                })
+                self.assertEqual(response.content, expected)
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {'a': [1, 2.5, None, True, "line sep ", "ünïcode ⛪", {'nested': 0.1}]}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class CatalogSnapshotTestCase(TestCase):
+    def setUp(self):
+        location = Location.objects.create(name="Legazpi")
+        category = Category.objects.create(name="Nature")
+        self.spot = TouristSpot.objects.create(name="Mayon Volcano", description="Perfect cone", location=location, category=category)
+        TouristSpot.objects.create(name="Cagsawa Ruins", description="", rating=4.5, location=location, category=category)
+        # No snapshot left in this worker by an earlier test
+        fresh_worker = unittest.mock.patch('apps.tourism.snapshot._snapshot', None)
+        fresh_worker.start()
+        self.addCleanup(fresh_worker.stop)
+
+    def test_serves_precompressed_bytes(self):
+        expected = JSONRenderer().render(TouristSpotSerializer(TouristSpot.objects.order_by('created_at', 'id'), many=True).data)
+
+        response = self.client.get('/api/tourism-spots/snapshot/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), expected)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tourism-spots/snapshot/')
+        self.assertEqual(len(ctx), 0)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, expected)
+
+        response = self.client.get('/api/tourism-spots/snapshot/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_negotiation(self):
+        snapshot = get_snapshot()
+        self.assertEqual(snapshot.negotiate('br;q=0, gzip'), 'gzip')
+        self.assertEqual(snapshot.negotiate('identity'), 'identity')
+        self.assertEqual(snapshot.negotiate('*'), 'br' if 'br' in snapshot.variants else 'gzip')
+        self.assertEqual(snapshot.negotiate(None), 'identity')
+
+    def test_changes_are_picked_up(self):
+        etag = self.client.get('/api/tourism-spots/snapshot/')['ETag']
+        with unittest.mock.patch('apps.tourism.signals.schedule_snapshot_rebuild') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.spot.name = "Mayon"
+                self.spot.save()
+        schedule.assert_called_once_with()
+
+        # Until the rebuild is done the previous snapshot is served, and rebuilt off the request.
+        with unittest.mock.patch('apps.tourism.snapshot._rebuild_job') as job:
+            with unittest.mock.patch('apps.tourism.snapshot.render_snapshot', wraps=render_snapshot) as render:
+                response = self.client.get('/api/tourism-spots/snapshot/')
+            render.assert_not_called()
+            job.schedule.assert_called_once_with()
+        self.assertEqual(response.json()[0]['name'], "Mayon Volcano")
+        self.assertEqual(response['ETag'], etag)
+
+        rebuild_snapshot()
+        response = self.client.get('/api/tourism-spots/snapshot/')
+        self.assertEqual(response.json()[0]['name'], "Mayon")
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class BatchAndFeedTestCase(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("tourist", email="t@example.com", password="pw")
+        self.user.groups.create(name="Tourist")
+        location = Location.objects.create(name="Legazpi")
+        category = Category.objects.create(name="Nature")
+        self.spots = [
+            TouristSpot.objects.create(
+                name=f"Spot {i}", description="", location=location, category=category,
+                is_featured=i % 2 == 0, is_active=i < 3,
+            )
+            for i in range(4)
+        ]
+        SavedSpot.objects.create(user=self.user, spot=self.spots[2])
+        SavedSpot.objects.create(user=self.user, spot=self.spots[0])
+        VisitedSpot.objects.create(user=self.user, spot=self.spots[1])
+        self.client.force_login(self.user)
+
+    def test_batch_keeps_requested_order(self):
+        a, b, c = self.spots[2].pk, self.spots[0].pk, self.spots[3].pk
+        response = self.client.get(f'/api/spots/batch/?ids={a},{b},9999,{a},{c}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([spot['id'] for spot in response.json()['results']], [a, b, c])
+        self.assertEqual(response.json()['results'][0], TouristSpotSerializer(self.spots[2]).data)
+        self.assertEqual(response.json()['missing'], [9999])
+        self.assertWithinQueryBudget(f'/api/spots/batch/?ids={a},{b}')
+
+    def test_batch_rejects_bad_ids(self):
+        for query in ['', '?ids=', '?ids=1,x', '?ids=' + ','.join(map(str, range(101)))]:
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/spots/batch/{query}')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('error', response.json())
+
+    def test_feed(self):
+        response = self.client.get('/api/feed/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        me = self.client.get('/api/auth/me/').json()
+        self.assertEqual(data['profile'], me)
+        self.assertEqual(data['counts'], {'approved_spots_count': 3, 'saved_spots_count': 2, 'visited_spots_count': 1})
+        self.assertEqual([spot['id'] for spot in data['featured_spots']], [self.spots[2].pk, self.spots[0].pk])
+        self.assertEqual([spot['id'] for spot in data['recently_saved_spots']], [self.spots[0].pk, self.spots[2].pk])
+        self.assertWithinQueryBudget('/api/feed/')
+
+    def test_feed_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/feed/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class DeltaSyncTestCase(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name="Legazpi")
+        self.category = Category.objects.create(name="Nature")
+        self.spot = TouristSpot.objects.create(name="Mayon", description="", location=self.location, category=self.category)
+        self.hour = OperatingHour.objects.create(tourist_spot=self.spot, open_time="08:00", close_time="17:00")
+        self.client.force_login(get_user_model().objects.create_user("tourist", password="pw"))
+
+    def sync(self, since=None):
+        response = self.client.get('/api/sync/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_first_sync_is_full(self):
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual([row['id'] for row in data['changes']['spots']['updated']], [self.spot.pk])
+        self.assertEqual(data['changes']['spots']['updated'][0]['category_id'], self.category.pk)
+        self.assertNotIn('search_vector', data['changes']['spots']['updated'][0])
+        self.assertEqual(data['changes']['hours']['updated'][0]['open_time'], '08:00:00')
+        self.assertEqual(set(data['changes']), {'categories', 'locations', 'spots', 'galleries', 'hours', 'ar_scenes'})
+
+    def test_delta_has_only_changes_and_deletes(self):
+        cursor = self.sync()['cursor']
+        stale = timezone.now() - SYNC_OVERLAP - timedelta(seconds=1)
+        for model in (Category, Location, TouristSpot, OperatingHour):
+            model.objects.update(updated_at=stale)
+        Tombstone.objects.update(deleted_at=stale)
+        later = encode_cursor(timezone.now())
+        self.assertEqual(
+            {key: len(change['updated']) + len(change['deleted']) for key, change in self.sync(later)['changes'].items()},
+            dict.fromkeys(SYNC_MODELS, 0),
+        )
+
+        self.spot.name = "Mayon Volcano"
+        self.spot.save()
+        hour_pk = self.hour.pk
+        self.hour.delete()
+        other = TouristSpot.objects.create(name="Cagsawa", description="", location=self.location, category=self.category)
+        other_pk = other.pk
+        other.delete()
+
+        data = self.sync(cursor)
+        self.assertFalse(data['full'])
+        self.assertEqual([row['name'] for row in data['changes']['spots']['updated']], ["Mayon Volcano"])
+        self.assertEqual(data['changes']['spots']['deleted'], [other_pk])
+        self.assertEqual(data['changes']['hours'], {'updated': [], 'deleted': [hour_pk]})
+        self.assertEqual(data['changes']['categories'], {'updated': [], 'deleted': []})
+        self.assertWithinQueryBudget(f'/api/sync/?since={cursor}')
+
+    def test_old_cursor_gets_full_resync_and_tombstones_are_pruned(self):
+        self.hour.delete()
+        old = timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1)
+        Tombstone.objects.update(deleted_at=old)
+        self.assertTrue(self.sync(encode_cursor(old))['full'])
+        call_command('prune_sync_tombstones', stdout=StringIO())
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_invalid_cursor(self):
+        for since in ['abc', '-5', '9' * 30]:
+            with self.subTest(since=since):
+                self.assertEqual(self.client.get('/api/sync/', {'since': since}).status_code, status.HTTP_400_BAD_REQUEST)
+        for page in ['abc', 'e30', encode_page(timezone.now(), 'reviews', 0)]:
+            with self.subTest(page=page):
+                self.assertEqual(self.client.get('/api/sync/', {'page': page}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pages_follow_next(self):
+        for name in ["Cagsawa", "Sumlang", "Quitinday"]:
+            TouristSpot.objects.create(name=name, description="", location=self.location, category=self.category)
+        whole = self.sync()
+        self.assertIsNone(whole['next'])
+
+        pages = []
+        with unittest.mock.patch('apps.tourism.sync.SYNC_PAGE_SIZE', 2):
+            response = self.client.get('/api/sync/')
+            while True:
+                pages.append(response.json())
+                if not pages[-1]['next']:
+                    break
+                self.assertWithinQueryBudget(pages[-1]['next'].removeprefix('http://testserver'))
+                response = self.client.get(pages[-1]['next'])
+        self.assertEqual(len(pages), 4)  # 1 category, 1 location, 4 spots and 1 hour, 2 per page
+        self.assertEqual({page['cursor'] for page in pages}, {pages[0]['cursor']})
+        self.assertTrue(all(page['full'] for page in pages))
+        for key in SYNC_MODELS:
+            self.assertEqual([row for page in pages for row in page['changes'][key]['updated']],
+                             whole['changes'][key]['updated'])
+
+    def test_bulk_writes_are_synced(self):
+        TouristSpot.objects.create(name="Cagsawa", description="", location=self.location, category=self.category)
+        cursor = self.sync()['cursor']
+        stale = timezone.now() - SYNC_OVERLAP - timedelta(seconds=1)
+        for model in (Category, Location, TouristSpot, OperatingHour):
+            model.objects.update(updated_at=stale)
+        TouristSpot.objects.update(search_vector=None)
+        self.location.name = "Legazpi City"
+        Location.objects.bulk_update([self.location], ['name'])
+        TouristSpot.objects.filter(pk=self.spot.pk).update(is_featured=True)
+
+        changes = self.sync(cursor)['changes']
+        self.assertEqual([row['name'] for row in changes['locations']['updated']], ["Legazpi City"])
+        self.assertEqual([row['id'] for row in changes['spots']['updated']], [self.spot.pk])
+        self.assertTrue(changes['spots']['updated'][0]['is_featured'])
+        self.assertEqual(changes['categories']['updated'], [])
+
+
+class OfflineBundleTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        static = os.path.join(self.tmp, "static")
+        os.makedirs(os.path.join(static, "images", "spots"))
+        Image.new("RGB", (1200, 800), "orange").save(os.path.join(static, "images", "spots", "mayon.jpg"))
+        settings_override = self.settings(SHARED_STATIC_DIR=static, OFFLINE_BUNDLE_DIR=os.path.join(self.tmp, "offline"))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        category = Category.objects.create(name="Nature")
+        # The CSV catalog's image wins over the spot's own, as on the web pages.
+        self.spot = TouristSpot.objects.create(name="Mayon", description="", location=location, category=category,
+                                               image="mayon-upload.jpg")
+        csv_catalog = unittest.mock.patch('apps.tourism.offline.get_catalog', return_value=unittest.mock.Mock(
+            image_map={self.spot.pk: "images/spots/mayon.jpg"}))
+        csv_catalog.start()
+        self.addCleanup(csv_catalog.stop)
+        OperatingHour.objects.create(tourist_spot=self.spot, open_time="08:00", close_time="17:00")
+        TouristSpot.objects.create(name="Closed", description="", location=location, category=category, is_active=False)
+
+    def test_build_is_incremental(self):
+        manifest, built = build_bundle()
+        self.assertTrue(built)
+        self.assertEqual(manifest['counts'], {'categories': 1, 'locations': 1, 'spots': 1, 'operating_hours': 1, 'ar_scenes': 0})
+
+        with zipfile.ZipFile(os.path.join(self.tmp, "offline", manifest['bundle'])) as bundle:
+            for entry in manifest['files']:
+                self.assertEqual(hashlib.sha256(bundle.read(entry['path'])).hexdigest(), entry['sha256'])
+            thumbnail = [entry['path'] for entry in manifest['files'] if entry['path'].startswith('thumbnails/')][0]
+            self.assertLessEqual(max(Image.open(io.BytesIO(bundle.read(thumbnail))).size), 320)
+            db_path = os.path.join(self.tmp, "catalog.sqlite3")
+            with open(db_path, "wb") as f:
+                f.write(bundle.read("catalog.sqlite3"))
+        db = sqlite3.connect(db_path)
+        self.addCleanup(db.close)
+        self.assertEqual(db.execute("SELECT name, thumbnail FROM spots").fetchall(), [("Mayon", thumbnail)])
+
+        self.assertEqual(build_bundle(), (manifest, False))
+        with open(os.path.join(self.tmp, "static", "images", "spots", "mayon.jpg"), "rb") as f:
+            source = f.read()
+        with unittest.mock.patch('apps.tourism.offline.make_thumbnail') as make_thumbnail, \
+                unittest.mock.patch('apps.tourism.offline._sha256', wraps=offline._sha256) as sha256:
+            self.spot.description = "Perfect cone"
+            self.spot.save()
+            updated, built = build_bundle()
+        make_thumbnail.assert_not_called()
+        # The unchanged source image is not read and hashed again.
+        self.assertNotIn(unittest.mock.call(source), sha256.call_args_list)
+        self.assertTrue(built)
+        self.assertNotEqual(updated['version'], manifest['version'])
+
+    def test_rebuilt_after_commit_once_built(self):
+        # Only the bundle job is looked at; the others would race the test database.
+        for other in ('schedule_snapshot_rebuild', 'schedule_catalog_rebuild'):
+            patcher = unittest.mock.patch(f'apps.tourism.signals.{other}')
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        with unittest.mock.patch('apps.tourism.signals.schedule_bundle_rebuild') as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.spot.save()
+            schedule.assert_called_once()
+            with self.captureOnCommitCallbacks(execute=True):
+                user = get_user_model().objects.create_user("tourist", password="pw")
+                Review.objects.create(user=user, tourist_spot=self.spot, rating=5)
+            schedule.assert_called_once()  # reviews are not in the bundle
+
+        rebuild_current_bundle()
+        self.assertIsNone(read_latest())
+        manifest, _ = build_bundle()
+        self.spot.description = "Perfect cone"
+        self.spot.save()
+        rebuild_current_bundle()
+        self.assertNotEqual(read_latest()['version'], manifest['version'])
+
+    def test_unused_thumbnails_are_pruned_after_a_grace_period(self):
+        cache_dir = Path(self.tmp) / "thumbnails"
+        cache_dir.mkdir()
+        fresh, old = cache_dir / "fresh.jpg", cache_dir / "old.jpg"
+        fresh.write_bytes(b"written by another worker's build")
+        old.write_bytes(b"unused")
+        os.utime(old, (time.time() - THUMBNAIL_PRUNE_GRACE - 60,) * 2)
+
+        names, files = build_thumbnails([], cache_dir)
+        self.assertEqual((names, files), ({}, {}))
+        self.assertTrue(fresh.exists())
+        self.assertFalse(old.exists())
+
+    def test_download_supports_ranges(self):
+        self.assertEqual(self.client.get('/api/offline/').status_code, status.HTTP_404_NOT_FOUND)
+        call_command('build_offline_bundle', stdout=StringIO())
+        manifest = self.client.get('/api/offline/').json()
+        url = manifest['url'].removeprefix('http://testserver')
+
+        response = self.client.get(url)
+        body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(hashlib.sha256(body).hexdigest(), manifest['sha256'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+        for header, expected in [('bytes=0-9', body[:10]), ('bytes=10-', body[10:]), ('bytes=-4', body[-4:])]:
+            with self.subTest(range=header):
+                response = self.client.get(url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+                self.assertEqual(b"".join(response.streaming_content), expected)
+                self.assertEqual(response['Content-Length'], str(len(expected)))
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(body)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(body)}')
+        response = self.client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get('/api/offline/offline-0000000000000000.zip').status_code, 404)
+
+
+class SpotCoordinatesTestCase(QueryBudgetTestMixin, TestCase):
+    EMBED = (
+        '<iframe src="https://www.google.com/maps/embed?pb=!1m18!1m12!1m3!1d3885.4!2d123.6856!3d13.2575'
+        '!2m3!1f0!2f0!3f0!3m2!1i1024!2i768!4f13.1" width="600" height="450"></iframe>'
+    )
+
+    def setUp(self):
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        self.nature = Category.objects.create(name="Nature")
+        heritage = Category.objects.create(name="Heritage")
+        for name, lat, lon, category in [
+            ("Cagsawa Ruins", 13.1662, 123.7103, heritage),  # ~4.7 km from Legazpi
+            ("Daraga Church", 13.1490, 123.7120, heritage),  # ~3.6 km
+            ("Mayon Volcano", 13.2575, 123.6856, self.nature),  # ~14 km
+            ("Caramoan", 13.7710, 123.8630, self.nature),  # ~70 km
+        ]:
+            TouristSpot.objects.create(name=name, description="", location=location, category=category,
+                                       latitude=lat, longitude=lon)
+        TouristSpot.objects.create(name="Unmapped", description="", location=location, category=self.nature)
+
+    def test_parse_map_embed(self):
+        for value, expected in [
+            (self.EMBED, (13.2575, 123.6856)),
+            ("https://www.google.com/maps/place/Mayon/@13.25,123.68,12z/data=!3m1!4b1!4m6!3m5!3d13.2575!4d123.6856", (13.2575, 123.6856)),
+            ("https://maps.google.com/maps?q=13.1662,123.7103&amp;z=15&amp;output=embed", (13.1662, 123.7103)),
+            ("https://maps.google.com/?ll=13.149%2C123.712", (13.149, 123.712)),
+            ("https://www.google.com/maps/@13.1391,123.7438,14z", (13.1391, 123.7438)),
+            ("https://maps.google.com/maps?q=Cagsawa+Ruins&output=embed", None),
+            ("https://maps.google.com/maps?q=0,0", None),
+            ("", None),
+        ]:
+            with self.subTest(value=value):
+                self.assertEqual(parse_map_embed(value), expected)
+
+    def test_save_and_backfill(self):
+        spot = TouristSpot.objects.create(name="Embed", description="", location=Location.objects.get(),
+                                          category=self.nature, map_embed=self.EMBED)
+        self.assertEqual((spot.latitude, spot.longitude), (13.2575, 123.6856))
+
+        stale = spot.created_at - timedelta(days=1)
+        TouristSpot.objects.filter(pk=spot.pk).update(latitude=None, longitude=None, updated_at=stale)
+        out = StringIO()
+        call_command('backfill_spot_coordinates', stdout=out)
+        spot.refresh_from_db()
+        self.assertEqual((spot.latitude, spot.longitude), (13.2575, 123.6856))
+        self.assertIn('Updated 1 spots', out.getvalue())
+        self.assertGreater(spot.updated_at, stale)  # for delta sync
+
+    def test_new_map_embed_moves_the_spot(self):
+        spot = TouristSpot.objects.create(name="Embed", description="", location=Location.objects.get(),
+                                          category=self.nature, map_embed=self.EMBED)
+        spot = TouristSpot.objects.get(pk=spot.pk)
+        spot.map_embed = "https://maps.google.com/maps?q=13.1662,123.7103&output=embed"
+        spot.save(update_fields=["map_embed"])
+        spot.refresh_from_db()
+        self.assertEqual((spot.latitude, spot.longitude), (13.1662, 123.7103))
+
+        # Coordinates typed in along with the new link win.
+        spot.map_embed, spot.latitude, spot.longitude = self.EMBED, 13.0, 123.0
+        spot.save()
+        spot.refresh_from_db()
+        self.assertEqual((spot.latitude, spot.longitude), (13.0, 123.0))
+
+        # A link without coordinates leaves them alone.
+        spot.map_embed = "https://maps.google.com/maps?q=Cagsawa+Ruins&output=embed"
+        spot.save()
+        self.assertEqual((spot.latitude, spot.longitude), (13.0, 123.0))
+
+    def test_nearby(self):
+        url = '/api/spots/nearby/?lat=13.1391&lon=123.7438'
+        names = lambda response: [spot['name'] for spot in response.json()]
+        self.assertEqual(names(self.client.get(url)), ["Daraga Church", "Cagsawa Ruins"])
+        self.assertEqual(names(self.client.get(url + '&radius_km=100')), ["Daraga Church", "Cagsawa Ruins", "Mayon Volcano", "Caramoan"])
+        self.assertEqual(names(self.client.get(url + '&radius_km=100&category=nature')), ["Mayon Volcano", "Caramoan"])
+        self.assertEqual(names(self.client.get(url + f'&radius_km=100&category={self.nature.pk}&limit=1')), ["Mayon Volcano"])
+
+        spot = self.client.get(url + '&limit=1').json()[0]
+        self.assertEqual((spot['latitude'], spot['longitude']), (13.149, 123.712))
+        self.assertAlmostEqual(spot['distance_km'], 3.6, delta=0.2)
+        self.assertWithinQueryBudget(url + '&radius_km=100')
+
+        for query in ['', '?lat=x&lon=1', '?lat=0&lon=200', '?lat=0&lon=0&radius_km=0', '?lat=0&lon=0&limit=ten']:
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get('/api/spots/nearby/' + query).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sort_by_distance(self):
+        spots = TouristSpot.objects.order_by('name')
+        self.assertEqual(
+            [spot.name for spot in sort_by_distance(spots, 13.2575, 123.6856)],
+            ["Mayon Volcano", "Cagsawa Ruins", "Daraga Church", "Caramoan", "Unmapped"],
+        )
+
+
+class MapClustersTestCase(QueryBudgetTestMixin, TestCase):
+    URL = '/api/map/clusters/?bbox=123.0,12.5,124.5,14.5&zoom='
+
+    def setUp(self):
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        nature = Category.objects.create(name="Nature")
+        heritage = Category.objects.create(name="Heritage")
+        for name, lat, lon, category in [
+            ("Cagsawa Ruins", 13.1662, 123.7103, heritage),
+            ("Daraga Church", 13.1490, 123.7120, heritage),
+            ("Mayon Volcano", 13.2575, 123.6856, nature),
+            ("Caramoan", 13.7710, 123.8630, nature),
+        ]:
+            TouristSpot.objects.create(name=name, description="", location=location, category=category,
+                                       latitude=lat, longitude=lon)
+        TouristSpot.objects.create(name="Unmapped", description="", location=location, category=nature)
+        ARScene.objects.create(name="Cagsawa AR", latitude=13.1665, longitude=123.7100)
+
+    def test_clusters_by_zoom(self):
+        data = self.client.get(self.URL + '2').json()
+        self.assertEqual(data['points'], [])
+        [cluster] = data['clusters']
+        self.assertEqual((cluster['count'], cluster['spots'], cluster['ar_scenes']), (5, 4, 1))
+        self.assertEqual(cluster['categories'], {"Heritage": 2, "Nature": 2})
+
+        data = self.client.get(self.URL + '12').json()
+        self.assertEqual(sum(cluster['count'] for cluster in data['clusters']) + len(data['points']), 5)
+        self.assertIn("Caramoan", [point['name'] for point in data['points']])
+
+        data = self.client.get(self.URL + '20').json()
+        self.assertEqual(data['clusters'], [])
+        self.assertEqual(
+            sorted((point['type'], point['name']) for point in data['points']),
+            [("ar_scene", "Cagsawa AR"), ("spot", "Cagsawa Ruins"), ("spot", "Caramoan"),
+             ("spot", "Daraga Church"), ("spot", "Mayon Volcano")],
+        )
+
+    def test_viewport_and_antimeridian(self):
+        index = MapClusterIndex([
+            (SPOT, 1, "Fiji", -17.7, 179.9, "Beach"),
+            (SPOT, 2, "Samoa", -13.8, -171.8, "Beach"),
+            (SCENE, 3, "Legazpi", 13.14, 123.74, None),
+        ])
+        names = lambda result: sorted(point['name'] for point in result['points'])
+        self.assertEqual(names(index.query(170, -30, -160, 0, 20)), ["Fiji", "Samoa"])
+        self.assertEqual(names(index.query(120, 10, 130, 15, 20)), ["Legazpi"])
+        self.assertEqual(index.query(-10, -10, 10, 10, 3), {"clusters": [], "points": []})
+
+    def test_rebuilt_on_change_and_conditional_get(self):
+        response = self.assertWithinQueryBudget(self.URL + '20')
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get(self.URL + '20', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        ARScene.objects.create(name="Mayon AR", latitude=13.2570, longitude=123.6850)
+        response = self.client.get(self.URL + '20', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['points']), 6)
+
+    def test_invalid_parameters(self):
+        for query in ['', '?bbox=1,2,3&zoom=5', '?bbox=a,b,c,d&zoom=5', '?bbox=0,0,1,1', '?bbox=0,0,1,1&zoom=23',
+                      '?bbox=0,10,1,5&zoom=5', '?bbox=0,0,200,1&zoom=5']:
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get('/api/map/clusters/' + query).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HeatmapTileTestCase(QueryBudgetTestMixin, TestCase):
+    ZOOM = 10
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = self.settings(HEATMAP_TILE_DIR=self.tmp)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(username="traveler", password="pass")
+        location = Location.objects.create(name="Legazpi", province="Albay")
+        category = Category.objects.create(name="Nature")
+        self.mayon = TouristSpot.objects.create(name="Mayon", description="", location=location, category=category,
+                                                latitude=13.2575, longitude=123.6856)
+        SavedSpot.objects.create(user=self.user, spot=self.mayon)
+        Review.objects.create(user=self.user, tourist_spot=self.mayon, rating=5)
+        officer = get_user_model().objects.create_user(username="officer", password="pass", role="Tourism Officer")
+        self.client.force_login(officer)
+
+    def tile_of(self, lat, lon):
+        """``(url, column, row)`` of the tile holding (lat, lon) at ZOOM and the point's pixel in it."""
+        scale = 2 ** self.ZOOM * TILE_SIZE
+        sin_lat = math.sin(math.radians(lat))
+        px = (lon + 180) / 360 * scale
+        py = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+        x, y = int(px // TILE_SIZE), int(py // TILE_SIZE)
+        return f'/tiles/heatmap/{self.ZOOM}/{x}/{y}.png', int(px % TILE_SIZE), int(py % TILE_SIZE)
+
+    def test_render_and_cache(self):
+        url, column, row = self.tile_of(13.2575, 123.6856)
+        response = self.assertWithinQueryBudget(url)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        with Image.open(io.BytesIO(response.content)) as tile:
+            self.assertEqual((tile.mode, tile.size), ('RGBA', (TILE_SIZE, TILE_SIZE)))
+            self.assertGreater(tile.getpixel((column, row))[3], 200)
+        version = response['ETag'].strip('"')
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp, version, str(self.ZOOM), *url.split('/')[-2:])))
+
+        with self.assertNumQueries(2):  # the session and the user
+            cached = self.client.get(url)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # Far from any spot: transparent, and not written to disk
+        empty = self.client.get(f'/tiles/heatmap/{self.ZOOM}/0/0.png')
+        with Image.open(io.BytesIO(empty.content)) as tile:
+            self.assertEqual(tile.getextrema()[3], (0, 0))
+        self.assertEqual(os.listdir(os.path.join(self.tmp, version, str(self.ZOOM))), [url.split('/')[-2]])
+
+    def test_new_version_when_activity_changes(self):
+        url = self.tile_of(13.2575, 123.6856)[0]
+        etag = self.client.get(url)['ETag']
+
+        # A catalog change that leaves the heatmap as it was keeps the tiles.
+        self.mayon.description = "Perfect cone"
+        self.mayon.save()
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+
+        other = TouristSpot.objects.create(name="Cagsawa", description="", location=self.mayon.location,
+                                           category=self.mayon.category, latitude=13.1662, longitude=123.7103)
+        VisitedSpot.objects.create(user=self.user, spot=other)
+        response = self.client.get(url)
+        self.assertNotEqual(response['ETag'], etag)
+        # Another worker may still be writing old tiles, so they outlive the switch for a while.
+        old, new = etag.strip('"'), response['ETag'].strip('"')
+        self.assertEqual(sorted(os.listdir(self.tmp)), sorted([old, new]))
+
+        retired = time.time() - TILE_PRUNE_GRACE - 1
+        os.utime(os.path.join(self.tmp, old), (retired, retired))
+        VisitedSpot.objects.create(user=get_user_model().objects.create_user(username="hiker"), spot=other)
+        response = self.client.get(url)
+        self.assertNotIn(old, os.listdir(self.tmp))
+        self.assertIn(response['ETag'].strip('"'), os.listdir(self.tmp))
+
+    def test_officers_only(self):
+        url = self.tile_of(13.2575, 123.6856)[0]
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_out_of_range(self):
+        for url in ['/tiles/heatmap/2/4/0.png', '/tiles/heatmap/2/0/4.png', '/tiles/heatmap/19/0/0.png']:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,111 @@
+# apps/tourism/versioning.py
+"""
+Version stamps, kept in the default Django cache, and the per-worker values
+built from them.
+
+Signals bump a stamp whenever the data behind it changes (the catalog, AR
+scenes, saved/visited activity). The spots stamp moves only with spots,
+categories and locations, for what is built from those alone; every bump of
+it bumps the catalog stamp too, which reviews and galleries also move. Per-worker caches such as the autocomplete
+index are VersionedValues that compare the stamp against the version they
+were built from, and the spot API turns the catalog stamp into ETag /
+Last-Modified headers. Every worker only sees a bump if the cache is shared
+between processes, which is why settings.CACHES is Redis or a file cache and
+never the per-process LocMemCache.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from bicoltravelguide.background import BackgroundJob
+
+CATALOG_VERSION_KEY = "tourism:catalog-version"
+CATALOG_MODIFIED_KEY = "tourism:catalog-modified"
+SPOTS_VERSION_KEY = "tourism:spots-version"
+
+
+class VersionStamp:
+    """A counter in the cache under ``key`` that changes whenever bump() is called."""
+
+    def __init__(self, key):
+        self.key = key
+
+    def get(self):
+        version = cache.get(self.key)
+        if version is None:
+            # Seed from the clock so a cache flush never hands out an old number.
+            cache.add(self.key, time.time_ns(), None)
+            version = cache.get(self.key)
+        return version
+
+    def bump(self):
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            version = time.time_ns()
+            cache.set(self.key, version, None)
+            return version
+
+
+class VersionedValue:
+    """
+    A per-worker value, built by ``build(version)`` on first use and rebuilt
+    whenever ``version()`` returns something else than it was built for.
+
+    With ``background`` (a job name) only the first build happens in the
+    caller; after that the stale value keeps being returned while a
+    BackgroundJob rebuilds it, for values read on latency-sensitive paths.
+    """
+
+    def __init__(self, version, build, background=None):
+        self.version = version
+        self.build = build
+        self._current = None  # (version, value), swapped as one
+        self._lock = threading.Lock()
+        self._job = BackgroundJob(background, self.refresh) if background else None
+
+    def get(self):
+        version = self.version()
+        current = self._current
+        if current is not None and current[0] == version:
+            return current[1]
+        if current is not None and self._job is not None:
+            self._job.schedule()
+            return current[1]
+        return self.refresh(version)
+
+    def refresh(self, version=None):
+        """Build the value for ``version`` (the current one by default) unless it is built already."""
+        if version is None:
+            version = self.version()
+        with self._lock:
+            if self._current is None or self._current[0] != version:
+                self._current = (version, self.build(version))
+            return self._current[1]
+
+
+catalog_version = VersionStamp(CATALOG_VERSION_KEY)
+get_catalog_version = catalog_version.get
+spots_version = VersionStamp(SPOTS_VERSION_KEY)
+get_spots_version = spots_version.get
+
+
+def get_catalog_modified():
+    """Unix time of the last catalog change (or of the first ask after a cache flush)."""
+    modified = cache.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        cache.add(CATALOG_MODIFIED_KEY, int(time.time()), None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    return modified
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_MODIFIED_KEY, int(time.time()), None)
+    return catalog_version.bump()
+
+
+def bump_spots_version():
+    """For a change to spots, categories or locations, which is a catalog change as well."""
+    bump_catalog_version()
+    return spots_version.bump()
@@ -1,18 +1,270 @@
 #apps/tourism/views/api_views.py
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
+from apps.tourism.autocomplete import get_prefix_index
+from apps.tourism.clusters import MAX_ZOOM, get_cluster_index, map_version
+from apps.tourism.conditional import CatalogConditionalGetMixin
+from apps.tourism.feed import (
+    BATCH_MAX_IDS, featured_spots, profile_and_counts, recently_saved_spots, spots_by_id,
+)
+from apps.tourism.fieldsets import SparseFieldsetQuerysetMixin, expanded_fields, selected_fields
+from apps.tourism.filters import TouristSpotFilter
+from apps.tourism.heatmap import get_tile, tile_in_range
 from apps.tourism.models import TouristSpot
-from apps.tourism.serializers import TouristSpotSerializer
+from apps.tourism.nearby import nearby_spots
+from apps.tourism.offline import BUNDLE_NAME, bundle_dir, read_latest
+from apps.tourism.pagination import KeysetPagination
+from apps.tourism.permissions import IsTourismOfficer
+from apps.tourism.renderers import ORJSONRenderer
+from apps.tourism.serializers import SPOT_LIST_VALUES, TouristSpotSerializer, spot_list_data
+from apps.tourism.snapshot import get_snapshot
+from apps.tourism.sync import SYNC_MODELS, changes_since, decode_cursor, decode_page
+from bicoltravelguide.query_budget import query_budget
+from bicoltravelguide.ranges import ranged_file_response
 
 
-class TouristSpotListAPIView(generics.ListAPIView):
+class TouristSpotListAPIView(CatalogConditionalGetMixin, SparseFieldsetQuerysetMixin, generics.ListAPIView):
     queryset = TouristSpot.objects.all()
     serializer_class = TouristSpotSerializer
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = TouristSpotFilter  # ?search= / ?fuzzy= results keep their ranked order when paged
+    pagination_class = KeysetPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    query_budget = 3
 
+    def list(self, request, *args, **kwargs):
+        meta = self.get_serializer_class().Meta
+        if selected_fields(request, meta) is not None or expanded_fields(request, meta):
+            return super().list(request, *args, **kwargs)
+
+        # Fast path for the default shape: dict rows, no serializer instances.
+        columns = dict.fromkeys([*SPOT_LIST_VALUES, *self.paginator.ordering])
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()).values(*columns))
+        return self.get_paginated_response(spot_list_data(page))
+
+@query_budget(3)
 @api_view(["GET"])
 def list_tourist_spots(request):
-    spots = TouristSpot.objects.all()
+    paginator = KeysetPagination()
+    spots = paginator.paginate_queryset(TouristSpot.objects.all(), request)
     serializer = TouristSpotSerializer(spots, many=True, context={"request": request})
-    return Response(serializer.data)
+    return paginator.get_paginated_response(serializer.data)
+
+@query_budget(3)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def autocomplete_spots(request):
+    """
+    Search-as-you-type suggestions from the in-memory prefix index.
+    Expects 'q' and an optional 'limit' (default 8, max 25).
+    """
+    try:
+        limit = min(max(int(request.query_params.get("limit", 8)), 1), 25)
+    except ValueError:
+        return Response({"error": "Invalid 'limit' parameter."}, status=400)
+
+    return Response(get_prefix_index().search(request.query_params.get("q", ""), limit=limit))
+
+@query_budget(3)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+def nearby_tourist_spots(request):
+    """
+    Active spots within a radius of a location, nearest first.
+    Expects 'lat' and 'lon', and optionally 'radius_km' (default 10, max
+    500), 'limit' (default 20, max 100) and 'category' (id or name).
+    """
+    try:
+        lat = float(request.query_params.get("lat"))
+        lon = float(request.query_params.get("lon"))
+    except (TypeError, ValueError):
+        return Response({"error": "Invalid or missing 'lat' and 'lon' parameters."}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return Response({"error": "'lat' and 'lon' are out of range."}, status=400)
+
+    try:
+        radius_km = float(request.query_params.get("radius_km", 10))
+        limit = int(request.query_params.get("limit", 20))
+    except ValueError:
+        return Response({"error": "Invalid 'radius_km' or 'limit' parameter."}, status=400)
+    if not 0 < radius_km <= 500:
+        return Response({"error": "'radius_km' must be greater than 0 and at most 500."}, status=400)
+    limit = min(max(limit, 1), 100)
+
+    category = request.query_params.get("category", "").strip()
+    return Response(nearby_spots(lat, lon, radius_km, limit, category=category or None))
+
+@query_budget(4)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+def map_clusters(request):
+    """
+    Map markers for a viewport: clusters of spots and AR scenes with their
+    counts and category breakdown, and the points that stand alone.
+    Expects 'bbox' as west,south,east,north (west > east crosses the
+    antimeridian) and 'zoom' (0 to 22).
+    """
+    try:
+        west, south, east, north = (float(value) for value in request.query_params.get("bbox", "").split(","))
+        zoom = int(request.query_params.get("zoom"))
+    except (TypeError, ValueError):
+        return Response({"error": "Invalid or missing 'bbox' and 'zoom' parameters."}, status=400)
+    if not (-180 <= west <= 180 and -180 <= east <= 180 and -90 <= south <= north <= 90):
+        return Response({"error": "'bbox' is out of range."}, status=400)
+    if not 0 <= zoom <= MAX_ZOOM:
+        return Response({"error": f"'zoom' must be between 0 and {MAX_ZOOM}."}, status=400)
+
+    etag = f'"{map_version()}-{request.accepted_renderer.format}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response({"zoom": zoom, **get_cluster_index().query(west, south, east, north, zoom)})
+    response.headers["ETag"] = etag
+    return response
+
+@query_budget(3)
+@api_view(["GET"])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+def batch_spots(request):
+    """
+    Several spots in one request, in the /api/tourism-spots/ row format.
+    Expects 'ids', a comma-separated list of up to 100 spot ids; results
+    follow its order and ids with no spot are listed under 'missing'.
+    """
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in request.query_params.get("ids", "").split(",") if pk.strip()))
+    except ValueError:
+        return Response({"error": "'ids' must be a comma-separated list of integers."}, status=400)
+    if not ids:
+        return Response({"error": "Missing 'ids' parameter."}, status=400)
+    if len(ids) > BATCH_MAX_IDS:
+        return Response({"error": f"At most {BATCH_MAX_IDS} ids per request."}, status=400)
+
+    results = spots_by_id(ids)
+    found = {spot["id"] for spot in results}
+    return Response({"results": results, "missing": [pk for pk in ids if pk not in found]})
+
+@query_budget(5)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+def home_feed(request):
+    """
+    Everything the mobile home screen shows on launch: the /api/auth/me/
+    profile, the dashboard counts, and the featured and recently saved spots.
+    """
+    profile, counts = profile_and_counts(request.user)
+    return Response({
+        "profile": profile,
+        "counts": counts,
+        "featured_spots": featured_spots(),
+        "recently_saved_spots": recently_saved_spots(request.user),
+    })
+
+@query_budget({"GET": 3 + len(SYNC_MODELS)})
+@api_view(["GET"])
+def sync_changes(request):
+    """
+    Catalog rows created, updated or deleted since 'since', the 'cursor'
+    returned by the previous sync. Without 'since' (or with one too old to
+    have tombstones for) every row is returned and 'full' is true. Rows come
+    in pages; 'next' links to the following page and is null on the last.
+    """
+    since = request.query_params.get("since")
+    if since:
+        try:
+            since = decode_cursor(since)
+        except (ValueError, OverflowError):
+            return Response({"error": "Invalid 'since' cursor."}, status=400)
+    page = request.query_params.get("page")
+    if page:
+        try:
+            page = decode_page(page)
+        except ValueError:
+            return Response({"error": "Invalid 'page' token."}, status=400)
+
+    cursor, full, changes, next_page = changes_since(since or None, page or None)
+    next_link = replace_query_param(request.build_absolute_uri(), "page", next_page) if next_page else None
+    return Response({"cursor": cursor, "full": full, "next": next_link, "changes": changes})
+
+@query_budget(1)
+@require_safe
+def catalog_snapshot(request):
+    """
+    Every spot, in the /api/tourism-spots/ row format, as pre-rendered bytes
+    (brotli, gzip or plain, per Accept-Encoding). Public and cacheable.
+    """
+    snapshot = get_snapshot()
+    encoding = snapshot.negotiate(request.headers.get("Accept-Encoding"))
+    etag = snapshot.etags[encoding]
+
+    response = get_conditional_response(request, etag=etag, last_modified=snapshot.modified)
+    if response is None:
+        response = HttpResponse(snapshot.variants[encoding], content_type="application/json")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(snapshot.modified)
+    patch_vary_headers(response, ["Accept-Encoding"])
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+@query_budget(0)
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def offline_bundle_manifest(request):
+    """
+    Manifest of the current offline bundle, with the URL to download it from.
+    Clients compare 'version' with the bundle they hold before downloading.
+    """
+    latest = read_latest()
+    if latest is None:
+        return Response({"error": "No offline bundle has been built yet."}, status=404)
+    url = request.build_absolute_uri(reverse("offline-bundle-download", args=[latest["version"]]))
+    return Response({**latest, "url": url}, headers={"Cache-Control": "no-cache"})
+
+@query_budget(0)
+@require_safe
+def offline_bundle_download(request, version):
+    """A bundle zip, by version. Supports Range so interrupted downloads can resume."""
+    name = BUNDLE_NAME.format(version=version)
+    path = bundle_dir() / name
+    if not path.is_file():
+        raise Http404("No such offline bundle.")
+    response = ranged_file_response(request, path, "application/zip", etag=f'"{version}"', filename=name)
+    # The content of a version never changes.
+    patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
+
+@query_budget(3)
+@api_view(["GET"])
+@permission_classes([IsTourismOfficer])
+def heatmap_tile(request, z, x, y):
+    """
+    A 256px popularity heatmap tile (saves, visits and reviews per spot),
+    rendered on first request and then served from the disk cache. Activity
+    per spot is for tourism officers and admins only.
+    """
+    if not tile_in_range(z, x, y):
+        raise Http404("No such tile.")
+    version, data = get_tile(z, x, y)
+    etag = f'"{version}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(data, content_type="image/png")
+    response["ETag"] = etag
+    # Not for shared caches, and the URL is not versioned, so only cache briefly.
+    patch_cache_control(response, private=True, max_age=300)
+    return response
@@ -1,8 +1,6 @@
-import os
-import csv
 from django.shortcuts import render, get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
-from django.conf import settings
 from django.http import JsonResponse, Http404
 from apps.tourism.models import (
     TouristSpot, Category, Location, Review, Gallery, OperatingHour, ReportedSpot, TourismReportedSpotAlbay
@@ -12,54 +10,73 @@ from apps.tourism.serializers import (
     ReviewSerializer, GallerySerializer, OperatingHourSerializer,
     TouristSpotDetailSerializer
 )
+from apps.tourism.catalog import get_catalog
+from apps.tourism.conditional import CatalogConditionalGetMixin
+from apps.tourism.fieldsets import SparseFieldsetQuerysetMixin
 from apps.tourism.filters import TouristSpotFilter
+from apps.tourism.mmap_catalog import get_mapped_catalog
+from apps.tourism.nearby import sort_by_distance
+from apps.tourism.pagination import IdKeysetPagination, KeysetPagination
+from apps.tourism.fuzzy import FUZZY_LIMIT, fuzzy_search_spots, search_with_fuzzy_fallback
+from apps.tourism.views.tourist_views import clean_map_src
+from bicoltravelguide.query_budget import query_budget
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from django.db.models import Q
 
 # ============================================================
 #                DRF GENERIC API VIEWS
 # ============================================================
 
-class TouristSpotListCreateView(generics.ListCreateAPIView):
+class TouristSpotListCreateView(SparseFieldsetQuerysetMixin, generics.ListCreateAPIView):
     queryset = TouristSpot.objects.all()
     serializer_class = TouristSpotSerializer
+    query_budget = {'GET': 3}
+    filter_backends = [DjangoFilterBackend]
     filterset_class = TouristSpotFilter
+    pagination_class = KeysetPagination
 
 
-class TouristSpotDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TouristSpotDetailView(CatalogConditionalGetMixin, SparseFieldsetQuerysetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = TouristSpot.objects.all()
     serializer_class = TouristSpotSerializer
+    query_budget = {'GET': 3, 'PATCH': 5}
 
 
-class TouristSpotFullDetailView(generics.RetrieveAPIView):
-    queryset = TouristSpot.objects.all()
+class TouristSpotFullDetailView(CatalogConditionalGetMixin, SparseFieldsetQuerysetMixin, generics.RetrieveAPIView):
+    queryset = TouristSpot.objects.prefetch_related('review_set', 'gallery_set', 'operatinghour_set')
     serializer_class = TouristSpotDetailSerializer
+    query_budget = 6
 
 
 class CategoryListCreateView(generics.ListCreateAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    query_budget = {'GET': 3, 'POST': 4}
 
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    query_budget = {'GET': 3, 'PATCH': 5, 'PUT': 5}
 
 
 class LocationListCreateView(generics.ListCreateAPIView):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
+    query_budget = {'GET': 3, 'POST': 4}
 
 
 class LocationDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
+    query_budget = {'GET': 3, 'PATCH': 5, 'PUT': 5}
 
 
-class ReviewListCreateView(generics.ListCreateAPIView):
+class ReviewListCreateView(SparseFieldsetQuerysetMixin, generics.ListCreateAPIView):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    query_budget = {'GET': 3, 'POST': 5}
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -68,32 +85,39 @@ class ReviewListCreateView(generics.ListCreateAPIView):
 class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    query_budget = {'GET': 3, 'PATCH': 4}
 
 
-class GalleryListCreateView(generics.ListCreateAPIView):
+class GalleryListCreateView(SparseFieldsetQuerysetMixin, generics.ListCreateAPIView):
     queryset = Gallery.objects.all()
     serializer_class = GallerySerializer
+    query_budget = {'GET': 3}
+    pagination_class = IdKeysetPagination
 
 
 class GalleryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Gallery.objects.all()
     serializer_class = GallerySerializer
+    query_budget = {'GET': 3}
 
 
 class OperatingHourListCreateView(generics.ListCreateAPIView):
     queryset = OperatingHour.objects.all()
     serializer_class = OperatingHourSerializer
+    query_budget = {'GET': 3, 'POST': 4}
 
 
 class OperatingHourDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = OperatingHour.objects.all()
     serializer_class = OperatingHourSerializer
+    query_budget = {'GET': 3, 'PATCH': 4, 'PUT': 5}
 
 
 # ============================================================
 #                FUNCTION-BASED PAGE VIEWS
 # ============================================================
 
+@query_budget(2)
 def public_home(request):
     featured_spots = TouristSpot.objects.filter(is_featured=True)
     return render(request, 'home/index.html', {
@@ -106,42 +130,45 @@ def tourist_dashboard(request):
     return render(request, 'dashboards/tourist_dashboard.html', {'spots': spots})
 
 
+@query_budget(5)
 def explore_spots(request):
     search_query = request.GET.get('search', '')
     if search_query:
         spots = (TouristSpot.objects.filter(name__icontains=search_query) |
                  TouristSpot.objects.filter(location__name__icontains=search_query))
+        if not spots.exists():
+            # Nothing literal matched; offer the closest names ("Mayyon" -> "Mayon")
+            spots = fuzzy_search_spots(TouristSpot.objects.all(), search_query, limit=FUZZY_LIMIT)
     else:
         spots = TouristSpot.objects.all()
     return render(request, 'tourism/explore_spots.html', {'spots': spots})
 
 
+@query_budget(3)
 def spot_detail_view(request, pk):
     spot = get_object_or_404(TouristSpot, pk=pk)
     return render(request, 'tourism/spot_detail.html', {'spot': spot})
 
 
+@query_budget(2)
 def saved_spots(request):
     return render(request, 'tourism/saved_spots.html', {})
 
 
+@query_budget(2)
 def review_spots(request):
     return render(request, 'tourism/review_spots.html', {})
 
 
+@query_budget(6)
 def reported_spots(request):
     query = request.GET.get('query', '')
-    spots = TouristSpot.objects.filter(is_active=True)
-    if query:
-        spots = (spots.filter(name__icontains=query) |
-                 spots.filter(description__icontains=query) |
-                 spots.filter(category__name__icontains=query) |
-                 spots.filter(location__name__icontains=query) |
-                 spots.filter(location__region__icontains=query) |
-                 spots.filter(location__province__icontains=query))
+    spots = search_with_fuzzy_fallback(
+        TouristSpot.objects.filter(is_active=True).select_related('category', 'location'), query
+    )
     categories = Category.objects.all().order_by("id")
     return render(request, 'tourism/reported_spots_albay.html', {
-        'spots': spots.distinct(),
+        'spots': spots,
         'query': query,
         'categories': categories,
     })
@@ -151,49 +178,6 @@ def reported_spots(request):
 #         REPORTED SPOTS BY PROVINCE (with CSV images)
 # ============================================================
 
-def _load_image_map():
-    image_map = {}
-    csv_path = os.path.join(settings.BASE_DIR, "shared", "static", "tourism_touristspot.csv")
-
-    def clean_image_path(raw):
-        if not raw:
-            return None
-        fixed = raw.replace("\\", "/")
-        marker = "shared/static/images/"
-        idx = fixed.find(marker)
-        if idx >= 0:
-            fixed = fixed[idx + len(marker):]
-        # ✅ Prevent double "images/" prefix
-        if fixed.startswith("images/"):
-            return fixed
-        return f"images/{fixed.lstrip('/')}"
-
-    try:
-        with open(csv_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                img_path = clean_image_path(row.get('image'))
-                try:
-                    image_map[int(row['id'])] = img_path
-                except (KeyError, ValueError):
-                    continue
-    except FileNotFoundError:
-        pass
-
-    return image_map
-
-
-def load_csv_dict(file_path, key_field):
-    """Helper to load a csv into a dict by key_field."""
-    result = {}
-    try:
-        with open(file_path, encoding='utf-8') as f:
-            for row in csv.DictReader(f):
-                result[row[key_field]] = row
-    except Exception:
-        pass
-    return result
-
 def build_spot(row, province, locations=None, categories=None):
     # Build a spot dict, resolving location/category if possible.
     location = locations.get(row.get("location_id")) if locations else {}
@@ -217,43 +201,31 @@ def build_spot(row, province, locations=None, categories=None):
     }
 
 def reported_spots_albay_map(request, name_url=None):
-    base = os.path.join(settings.BASE_DIR, "shared", "static")
-    spot_csv = os.path.join(base, "tourism_touristspot.csv")
-    cat_csv = os.path.join(base, "tourism_touristspot_category.csv")
-    loc_csv = os.path.join(base, "tourism_location.csv")
-
-    # Load categories
-    categories = {}
-    with open(cat_csv, newline='', encoding='utf-8') as cat_file:
-        for row in csv.DictReader(cat_file):
-            categories[row['id']] = row['name']
-
-    # Load locations
-    locations = {}
-    with open(loc_csv, newline='', encoding='utf-8') as loc_file:
-        for row in csv.DictReader(loc_file):
-            locations[row['id']] = row
+    catalog = get_catalog()
+
+    if name_url:
+        row = catalog.get_spot_by_name_url(name_url, province="albay")
+        rows = [row] if row else []
+    else:
+        rows = catalog.spots_in_province("albay")
 
     selected_spot = None
-    with open(spot_csv, newline='', encoding='utf-8') as spot_file:
-        for row in csv.DictReader(spot_file):
-            loc = locations.get(row['location_id'])
-            if not loc or loc['province'].strip().lower() != 'albay':
-                continue
-            if name_url and row.get('name_url') != name_url:
-                continue
-            # Found our spot or just the first one if no name_url
-            selected_spot = {
-                "name": row["name"],
-                "description": row["description"],
-                "image": row["image"],
-                "rating": row["rating"],
-                "category": categories.get(row["category_id"], ""),
-                "address": row.get("address") or f"{loc.get('name', '')}, {loc.get('province', '')}, {loc.get('region', '')}",
-                "website": row.get("website", ""),
-                "map_embed": clean_map_src(row.get("map_embed", "")),
-            }
-            break
+    for row in rows:
+        loc = catalog.locations.get(row['location_id'])
+        if not loc:
+            continue
+        # Found our spot or just the first one if no name_url
+        selected_spot = {
+            "name": row["name"],
+            "description": row["description"],
+            "image": row["image"],
+            "rating": row["rating"],
+            "category": catalog.categories.get(row["category_id"], {}).get("name", ""),
+            "address": row.get("address") or f"{loc.get('name', '')}, {loc.get('province', '')}, {loc.get('region', '')}",
+            "website": row.get("website", ""),
+            "map_embed": clean_map_src(row.get("map_embed", "")),
+        }
+        break
 
     return render(request, "tourism/reported_spots_albay_map.html", {
         "spot": selected_spot
@@ -263,102 +235,100 @@ def reported_spots_albay_map(request, name_url=None):
 #   REPORTED SPOTS CAROUSEL + DETAIL (Albay, Camsur, Sorsogon)
 # ============================================================
 
-def reported_spots_albay_carousel(request):
-    spots = []
-    base = os.path.join(settings.BASE_DIR, "shared", "static")
-    spot_csv = os.path.join(base, "tourism_touristspot.csv")
-    loc_csv = os.path.join(base, "tourism_location.csv")
-    cat_csv = os.path.join(base, "tourism_touristspot_category.csv")
-
-    # Load relational data
-    locations = load_csv_dict(loc_csv, "id")
-    categories = load_csv_dict(cat_csv, "id")
-
-    with open(spot_csv, newline='', encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            # Find province via location
-            loc = locations.get(row.get("location_id"))
-            province = loc.get("province", "").strip().lower() if loc else row.get("province", "").strip().lower()
-            if province != "albay":
-                continue
-            if not row.get("id", "").strip() or not row.get("name", "").strip():
-                continue
-            spots.append(build_spot(row, "albay", locations, categories))
+def _albay_spots(catalog):
+    """
+    Albay spots from the CSV catalog, built once per load of the CSVs.
+
+    Returns ``(spots, positions)`` where ``positions`` maps name_url to the
+    spot's index in ``spots``.
+    """
+    def build():
+        rows = catalog.spots_in_province("albay")
+        spots = [build_spot(row, "albay", catalog.locations, catalog.categories) for row in rows]
+        positions = {}
+        for index, row in enumerate(rows):
+            positions.setdefault(row.get("name_url"), index)
+        return spots, positions
+
+    return catalog.memo("main_views.albay_spots", build)
 
+
+def reported_spots_albay_carousel(request):
+    spots = [
+        spot for spot in _albay_spots(get_catalog())[0]
+        if (spot["id"] or "").strip() and (spot["name"] or "").strip()
+    ]
     return render(request, "tourism/reported_spots_albay_carousel.html", {"spots": spots})
 
-def reported_spots_albay_detail(request, name_url):
-    spot_data = None
-    more_spots = []
-    try:
-        # Try database
-        spot = TouristSpot.objects.select_related("category", "location").get(
-            is_active=True,
-            location__province__iexact="Albay",
-            name_url=name_url
-        )
-        image_map = _load_image_map()
-        spot.image = image_map.get(spot.id) or spot.image
-
-        spot_data = {
-            "name": spot.name,
-            "description": spot.description,
-            "image": spot.image,
-            "name_url": spot.name_url,
-            "category": spot.category.name if hasattr(spot.category, "name") else spot.category_id,
-            "rating": getattr(spot, "rating", None),
-            "map_embed": getattr(spot, "map_embed", None),
-            "address": f"{spot.location.name}, {spot.location.province}, {spot.location.region}",
-            "social_media_link": spot.website,
-        }
+def _mapped_albay_detail(name_url):
+    """Serve the detail page from the memory-mapped catalog, if one was built."""
+    mapped = get_mapped_catalog()
+    if mapped is None:
+        return None, []
+    record = mapped.get_by_name_url(name_url)
+    if not record or not record["is_active"] or (record["province"] or "").strip().lower() != "albay":
+        return None, []
+
+    spot_data = {
+        "name": record["name"],
+        "description": record["description"],
+        "image": record["image"],
+        "name_url": record["name_url"],
+        "category": record["category"],
+        "rating": record["rating"],
+        "map_embed": record["map_embed"],
+        "address": f"{record['location']}, {record['province']}, {record['region']}",
+        "social_media_link": record["website"],
+    }
+    # Closest first, like the database path; decoded only if the page reads them
+    more_spots = mapped.nearest_in_province("albay", record.get("latitude"), record.get("longitude"),
+                                            exclude_id=record["id"])
+    return spot_data, more_spots
 
-        more_spots = TouristSpot.objects.filter(
-            is_active=True,
-            location__province__iexact="Albay"
-        ).exclude(id=spot.id)
-    except Exception:
-        # Fallback: search CSV
-        base = os.path.join(settings.BASE_DIR, "shared", "static")
-        spot_csv = os.path.join(base, "tourism_touristspot.csv")
-        loc_csv = os.path.join(base, "tourism_location.csv")
-        cat_csv = os.path.join(base, "tourism_touristspot_category.csv")
-
-        locations = load_csv_dict(loc_csv, "id")
-        categories = load_csv_dict(cat_csv, "id")
-        spot_data = None
 
+@query_budget(3)
+def reported_spots_albay_detail(request, name_url):
+    # Fast path: the prebuilt memory-mapped catalog skips the database entirely
+    spot_data, more_spots = _mapped_albay_detail(name_url)
+    if spot_data is None:
         try:
-            with open(spot_csv, encoding="utf-8") as spotfile:
-                for row in csv.DictReader(spotfile):
-                    if row.get("name_url") == name_url:
-                        loc = locations.get(row.get("location_id"))
-                        province = loc.get("province", "").strip().lower() if loc else row.get("province", "").strip().lower()
-                        if province != "albay":
-                            continue
-                        cat_name = categories.get(row.get("category_id"), {}).get("name", "")
-                        spot_data = build_spot(row, "albay", locations, categories)
-                        break
+            # Try database
+            spot = TouristSpot.objects.select_related("category", "location").get(
+                is_active=True,
+                location__province__iexact="Albay",
+                name_url=name_url
+            )
+            spot.image = get_catalog().image_map.get(spot.id) or spot.image
+
+            spot_data = {
+                "name": spot.name,
+                "description": spot.description,
+                "image": spot.image,
+                "name_url": spot.name_url,
+                "category": spot.category.name if hasattr(spot.category, "name") else spot.category_id,
+                "rating": getattr(spot, "rating", None),
+                "map_embed": getattr(spot, "map_embed", None),
+                "address": f"{spot.location.name}, {spot.location.province}, {spot.location.region}",
+                "social_media_link": spot.website,
+            }
+
+            more_spots = TouristSpot.objects.filter(
+                is_active=True,
+                location__province__iexact="Albay"
+            ).exclude(id=spot.id)
+            if spot.latitude is not None and spot.longitude is not None:
+                # Closest first
+                more_spots = sort_by_distance(more_spots, spot.latitude, spot.longitude)
         except Exception:
-            spot_data = None
-
-        # Get more spots for sidebar/carousel (from CSV)
-        more_spots = []
-        if spot_data:
-            try:
-                with open(spot_csv, encoding="utf-8") as spotfile:
-                    for row in csv.DictReader(spotfile):
-                        loc = locations.get(row.get("location_id"))
-                        province = loc.get("province", "").strip().lower() if loc else row.get("province", "").strip().lower()
-                        if province != "albay":
-                            continue
-                        if row.get("name_url") != name_url:
-                            more_spots.append(build_spot(row, "albay", locations, categories))
-            except Exception:
-                more_spots = []
-
-        if not spot_data:
-            raise Http404("No TouristSpot matches the given query.")
+            # Fallback: indexed lookup in the cached CSV catalog
+            spots, positions = _albay_spots(get_catalog())
+            index = positions.get(name_url)
+            if index is not None:
+                spot_data = spots[index]
+                more_spots = spots[:index] + spots[index + 1:]
+
+            if not spot_data:
+                raise Http404("No TouristSpot matches the given query.")
 
     # Render or return JSON
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -369,72 +339,66 @@ def reported_spots_albay_detail(request, name_url):
             "more_spots": more_spots,
         })
 
+@query_budget(7)
 def reported_spots_camsur(request):
     query = request.GET.get('query', '')
-    spots = TouristSpot.objects.filter(is_active=True)
-    if query:
-        spots = (spots.filter(name__icontains=query) |
-                 spots.filter(description__icontains=query) |
-                 spots.filter(category__name__icontains=query) |
-                 spots.filter(location__name__icontains=query) |
-                 spots.filter(location__region__icontains=query) |
-                 spots.filter(location__province__iexact='Camarines Sur'))
+    spots = search_with_fuzzy_fallback(
+        TouristSpot.objects.filter(is_active=True).select_related('category', 'location'), query
+    )
     categories = Category.objects.values_list('name', flat=True).distinct()
-    camsur_spots = TouristSpot.objects.filter(location__province__iexact='Camarines Sur', is_active=True)
-    image_map = _load_image_map()
+    camsur_spots = TouristSpot.objects.filter(
+        location__province__iexact='Camarines Sur', is_active=True
+    ).select_related('category', 'location')
+    image_map = get_catalog().image_map
     for s in spots: s.image = image_map.get(s.id)
     for s in camsur_spots: s.image = image_map.get(s.id)
     return render(request, 'tourism/reported_spots_camsur.html', {
-        'spots': spots.distinct(),
+        'spots': spots,
         'query': query,
         'categories': categories,
         'camsur_spots': camsur_spots,
     })
 
 
+@query_budget(7)
 def reported_spots_sorsogon(request):
     query = request.GET.get('query', '')
-    spots = TouristSpot.objects.filter(is_active=True)
-    if query:
-        spots = (spots.filter(name__icontains=query) |
-                 spots.filter(description__icontains=query) |
-                 spots.filter(category__name__icontains=query) |
-                 spots.filter(location__name__icontains=query) |
-                 spots.filter(location__region__icontains=query) |
-                 spots.filter(location__province__iexact='Sorsogon'))
+    spots = search_with_fuzzy_fallback(
+        TouristSpot.objects.filter(is_active=True).select_related('category', 'location'), query
+    )
     categories = Category.objects.values_list('name', flat=True).distinct()
-    sorsogon_spots = TouristSpot.objects.filter(location__province__iexact='Sorsogon', is_active=True)
-    image_map = _load_image_map()
+    sorsogon_spots = TouristSpot.objects.filter(
+        location__province__iexact='Sorsogon', is_active=True
+    ).select_related('category', 'location')
+    image_map = get_catalog().image_map
     for s in spots: s.image = image_map.get(s.id)
     for s in sorsogon_spots: s.image = image_map.get(s.id)
     return render(request, 'tourism/reported_spots_sorsogon.html', {
-        'spots': spots.distinct(),
+        'spots': spots,
         'query': query,
         'categories': categories,
         'sorsogon_spots': sorsogon_spots,
     })
 
 
+@query_budget(6)
 def reported_spots_albay(request):
     query = request.GET.get('query', '')
-    spots = TouristSpot.objects.filter(is_active=True, location__province__iexact='Albay')
+    spots = TouristSpot.objects.filter(
+        is_active=True, location__province__iexact='Albay'
+    ).select_related('category', 'location')
 
     if query and query.lower() != "all":
-        spots = spots.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(location__name__icontains=query) |
-            Q(category__name__icontains=query)  # ✅ category join
-        )
+        spots = search_with_fuzzy_fallback(spots, query)
 
     categories = Category.objects.all().order_by("id")
 
-    image_map = _load_image_map()
+    image_map = get_catalog().image_map
     for s in spots:
         s.image = image_map.get(s.id) or s.image
 
     return render(request, 'tourism/reported_spots_albay.html', {
-        'spots': spots.distinct(),
+        'spots': spots,
         'query': query,
         'categories': categories,
     })
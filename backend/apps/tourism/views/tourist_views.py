@@ -1,10 +1,9 @@
-import csv
-import os
 import re
-from django.conf import settings
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 
+from apps.tourism.catalog import get_catalog
+
 
 def clean_map_src(raw_value):
     """
@@ -53,100 +52,47 @@ def saved_spots(request):
     return render(request, 'tourism/saved_spots.html')
 
 
-def reported_spots_albay_carousel(request):
-    spots = []
-    base = os.path.join(settings.BASE_DIR, "shared", "static")
-    spot_csv = os.path.join(base, "tourism_touristspot.csv")
-    loc_csv = os.path.join(base, "tourism_location.csv")
-    cat_csv = os.path.join(base, "tourism_touristspot_category.csv")
-
-    # Load relational data
-    locations = load_csv_dict(loc_csv, "id")
-    categories = load_csv_dict(cat_csv, "id")
-
-    with open(spot_csv, newline='', encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            # Find province via location
-            loc = locations.get(row.get("location_id"))
-            province = loc.get("province", "").strip().lower() if loc else row.get("province", "").strip().lower()
-            if province != "albay":
-                continue
-            if not row.get("id", "").strip() or not row.get("name", "").strip():
-                continue
-            spots.append(build_spot(row, "albay", locations, categories))
+def _province_carousel(province_keys, province):
+    catalog = get_catalog()
+
+    def build():
+        spots = []
+        for key in province_keys:
+            for row in catalog.spots_in_province(key):
+                if not row.get("id", "").strip() or not row.get("name", "").strip():
+                    continue
+                spots.append(build_spot(row, province, catalog.locations, catalog.categories))
+        return spots
 
+    return catalog.memo(f"tourist_views.carousel.{province}", build)
+
+
+def reported_spots_albay_carousel(request):
+    spots = _province_carousel(["albay"], "albay")
     return render(request, "tourism/reported_spots_albay_carousel.html", {"spots": spots})
 
 
 def reported_spots_camsur_carousel(request):
-    spots = []
-    csv_path = os.path.join(settings.BASE_DIR, "shared", "static", "tourism_reported_spots_camsur.csv")
-
-    with open(csv_path, newline='', encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if row.get("province", "").strip().lower() not in ["camarines sur", "camsur"]:
-                continue
-            if not row.get("id", "").strip() or not row.get("name", "").strip():
-                continue
-            spots.append(build_spot(row, "camsur"))
-
+    spots = _province_carousel(["camarines sur", "camsur"], "camsur")
     return render(request, "tourism/reported_spots_camsur_carousel.html", {"spots": spots})
 
 
 def reported_spots_sorsogon_carousel(request):
-    spots = []
-    csv_path = os.path.join(settings.BASE_DIR, "shared", "static", "tourism_reported_spots_sorsogon.csv")
-
-    with open(csv_path, newline='', encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if row.get("province", "").strip().lower() != "sorsogon":
-                continue
-            if not row.get("id", "").strip() or not row.get("name", "").strip():
-                continue
-            spots.append(build_spot(row, "sorsogon"))
-
+    spots = _province_carousel(["sorsogon"], "sorsogon")
     return render(request, "tourism/reported_spots_sorsogon_carousel.html", {"spots": spots})
 
 def reported_spots_albay_map(request, spot_id):
     """
     Expanded view for a single Albay tourist spot with map included.
     """
-    base = os.path.join(settings.BASE_DIR, "shared", "static")
-    spot_csv = os.path.join(base, "tourism_touristspot.csv")
-    loc_csv = os.path.join(base, "tourism_location.csv")
-    cat_csv = os.path.join(base, "tourism_touristspot_category.csv")
-
-    locations = load_csv_dict(loc_csv, "id")
-    categories = load_csv_dict(cat_csv, "id")
+    catalog = get_catalog()
     spot = None
 
-    with open(spot_csv, newline='', encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            loc = locations.get(row.get("location_id"))
-            province = loc.get("province", "").strip().lower() if loc else row.get("province", "").strip().lower()
-            if province != "albay":
-                continue
-
-            if row.get("id", "").strip() == str(spot_id):
-                spot = build_spot(row, "albay", locations, categories)
-                break
+    row = catalog.get_spot(spot_id)
+    if row and catalog.province_of(row) == "albay":
+        spot = build_spot(row, "albay", catalog.locations, catalog.categories)
 
     if not spot:
         return render(request, "404.html", status=404)
 
     return render(request, "tourism/reported_spots_albay_map.html", {"spot": spot})
-
-def load_csv_dict(file_path, key_field):
-    """Helper to load a csv into a dict by key_field."""
-    result = {}
-    try:
-        with open(file_path, encoding='utf-8') as f:
-            for row in csv.DictReader(f):
-                result[row[key_field]] = row
-    except Exception:
-        pass
-    return result
\ No newline at end of file
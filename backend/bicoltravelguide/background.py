@@ -0,0 +1,45 @@
+# bicoltravelguide/background.py
+"""
+Rebuild jobs run off the request path.
+
+A BackgroundJob runs its function on a thread of its own, one run at a
+time. Scheduling it while a run is already queued does nothing, so a burst
+of commits costs one rebuild after the burst rather than one per commit.
+Jobs that work on one object at a time (an AR scene's pattern, say) are
+scheduled with the object's key as arguments; runs are coalesced per key.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundJob:
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._queued = set()  # argument tuples with a run waiting
+        self._lock = threading.Lock()
+
+    def _run(self, args):
+        # Dropped first: a change committed during the run schedules another.
+        with self._lock:
+            self._queued.discard(args)
+        try:
+            self.func(*args)
+        except Exception:
+            logger.exception("Background job %s%s failed", self.name, f" {args}" if args else "")
+        finally:
+            connection.close()
+
+    def schedule(self, *args):
+        """Queue ``func(*args)`` unless that run is queued already; returns its future, or None."""
+        with self._lock:
+            if args in self._queued:
+                return None
+            self._queued.add(args)
+        return self._executor.submit(self._run, args)
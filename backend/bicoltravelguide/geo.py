@@ -0,0 +1,152 @@
+# bicoltravelguide/geo.py
+"""
+Great-circle distances for many points at once.
+
+PointIndex keeps a set of coordinates (AR scenes, tourist spots) in
+contiguous NumPy arrays, in radians with the latitude cosines precomputed,
+and answers one-to-many distance, radius and k-nearest queries with a
+single vectorized haversine over the whole set (or over candidate positions
+picked by a coarser index such as apps/ar/spatial.py's grid).
+haversine_km() and haversine_matrix_km() are the same formula for ad hoc
+one-to-many and many-to-many arrays of degrees, and bounding_box() gives
+the latitude/longitude ranges to prefilter candidates with in SQL.
+"""
+import math
+
+import numpy as np
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Calculate the distance between two points in kilometers."""
+    dLat = math.radians(lat2 - lat1)
+    dLon = math.radians(lon2 - lon1)
+    a = (math.sin(dLat / 2) * math.sin(dLat / 2) +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) *
+         math.sin(dLon / 2) * math.sin(dLon / 2))
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def _haversine(lat1, cos_lat1, lon1, lat2, cos_lat2, lon2):
+    """Haversine on radians (broadcasting), with the latitude cosines supplied."""
+    a = np.sin((lat2 - lat1) * 0.5) ** 2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) * 0.5) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Distances in km from one point to each of ``lats``/``lons`` (degrees)."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lons, dtype=np.float64))
+    return _haversine(lat, math.cos(lat), lon, lats, np.cos(lats), lons)
+
+
+def haversine_matrix_km(lats1, lons1, lats2, lons2):
+    """``len(lats1) x len(lats2)`` matrix of distances in km between two sets of points (degrees)."""
+    lats1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, np.newaxis]
+    lons1 = np.radians(np.asarray(lons1, dtype=np.float64))[:, np.newaxis]
+    lats2, lons2 = np.radians(np.asarray(lats2, dtype=np.float64)), np.radians(np.asarray(lons2, dtype=np.float64))
+    return _haversine(lats1, np.cos(lats1), lons1, lats2, np.cos(lats2), lons2)
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    ``(min_lat, max_lat, lon_ranges)`` enclosing the circle. ``lon_ranges``
+    is a list of (min_lon, max_lon) pairs (two when the box crosses the
+    antimeridian), or None when every longitude is in range (near a pole).
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), None
+    # Longitude offset of the meridians tangent to the circle.
+    dlon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180), (-180, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180), (-180, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def bounding_box_filter(lat, lon, radius_km, lat_field="latitude", lon_field="longitude"):
+    """Q object selecting the rows whose coordinates fall in bounding_box()."""
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius_km)
+    condition = Q(**{f"{lat_field}__range": (min_lat, max_lat)})
+    if lon_ranges is not None:
+        lon_condition = Q()
+        for lon_range in lon_ranges:
+            lon_condition |= Q(**{f"{lon_field}__range": lon_range})
+        condition &= lon_condition
+    return condition
+
+
+def _pairs(distances, ids):
+    return [(float(distance), int(pk)) for distance, pk in zip(distances, ids)]
+
+
+class PointIndex:
+    """Ids and coordinates of a set of points, for vectorized distance queries."""
+
+    def __init__(self, ids, lats, lons):
+        self.ids = np.ascontiguousarray(ids, dtype=np.int64)
+        self.lat = np.radians(np.ascontiguousarray(lats, dtype=np.float64))
+        self.lon = np.radians(np.ascontiguousarray(lons, dtype=np.float64))
+        self.cos_lat = np.cos(self.lat)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Index of ``(id, latitude, longitude)`` rows, e.g. from values_list()."""
+        rows = list(rows)
+        if not rows:
+            return cls([], [], [])
+        ids, lats, lons = zip(*rows)
+        return cls(ids, lats, lons)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def distances(self, lat, lon, positions=None):
+        """Distances in km from (lat, lon) to every point, or to those at ``positions``."""
+        lat, lon = math.radians(lat), math.radians(lon)
+        if positions is None:
+            return _haversine(lat, math.cos(lat), lon, self.lat, self.cos_lat, self.lon)
+        return _haversine(lat, math.cos(lat), lon, self.lat[positions], self.cos_lat[positions], self.lon[positions])
+
+    def within(self, lat, lon, radius_km, limit=None, positions=None):
+        """``[(distance_km, id)]`` of the points within ``radius_km``, nearest first."""
+        if positions is None:
+            positions = np.arange(len(self))
+        distances = self.distances(lat, lon, positions)
+        inside = distances <= radius_km
+        distances, positions = distances[inside], positions[inside]
+        order = self._smallest(distances, limit)
+        return _pairs(distances[order], self.ids[positions[order]])
+
+    def nearest(self, lat, lon, k, positions=None):
+        """``[(distance_km, id)]`` of the ``k`` points nearest (lat, lon), nearest first."""
+        if positions is None:
+            positions = np.arange(len(self))
+        distances = self.distances(lat, lon, positions)
+        order = self._smallest(distances, k)
+        return _pairs(distances[order], self.ids[positions[order]])
+
+    def distance_matrix(self, other):
+        """``len(self) x len(other)`` matrix of distances in km to another PointIndex."""
+        return _haversine(
+            self.lat[:, np.newaxis], self.cos_lat[:, np.newaxis], self.lon[:, np.newaxis],
+            other.lat, other.cos_lat, other.lon,
+        )
+
+    @staticmethod
+    def _smallest(distances, k):
+        """Positions of the ``k`` smallest ``distances`` (all if k is None), sorted; ties keep input order."""
+        if k is not None and k < len(distances):
+            if k <= 0:
+                return np.arange(0)
+            candidates = np.argpartition(distances, k - 1)[:k]
+            return candidates[np.lexsort((candidates, distances[candidates]))]
+        return np.argsort(distances, kind="stable")
@@ -0,0 +1,53 @@
+# bicoltravelguide/queries.py
+"""
+ORM expressions shared between apps.
+
+count_subquery() counts related rows as a scalar subquery in the outer
+SELECT, so a list of rows and a count per row come back in one statement
+instead of a join with GROUP BY (which multiplies rows when several counts
+are taken) or a query per row.
+
+TouchingQuerySet keeps an auto_now ``updated_at`` current through bulk
+writes, which skip the field's pre_save().
+"""
+from django.db import models
+from django.db.models import Count, IntegerField, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def count_subquery(queryset, group_by):
+    """
+    Scalar subquery counting ``queryset``'s rows (0 for none). ``queryset``
+    is usually filtered on an OuterRef; ``group_by`` is the field it is
+    filtered on, so the rows collapse into one count.
+    """
+    counted = queryset.order_by().values(group_by).annotate(n=Count("pk")).values("n")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+class TouchingQuerySet(models.QuerySet):
+    """
+    QuerySet whose update() and bulk_update() also set ``updated_at``,
+    unless it is written explicitly or only ``untouched_fields`` change.
+    """
+
+    touch_field = "updated_at"
+    untouched_fields = frozenset()
+
+    def _touches(self, fields):
+        return self.touch_field not in fields and not set(fields) <= self.untouched_fields
+
+    def update(self, **kwargs):
+        if self._touches(kwargs):
+            kwargs[self.touch_field] = timezone.now()
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if self._touches(fields):
+            objs = list(objs)
+            now = timezone.now()
+            for obj in objs:
+                setattr(obj, self.touch_field, now)
+            fields = [*fields, self.touch_field]
+        return super().bulk_update(objs, fields, batch_size=batch_size)
@@ -0,0 +1,124 @@
+# bicoltravelguide/query_budget.py
+"""
+Per-request SQL query budgets and N+1 detection for development and tests.
+
+Views declare the most queries a request may run, either with the
+``@query_budget(n)`` decorator (function views; put it above ``@api_view``)
+or a ``query_budget = n`` attribute (class-based views). A budget may also be
+a dict keyed by HTTP method; methods left out are not checked. While
+``QUERY_BUDGET_ENABLED`` is on, QueryBudgetMiddleware records every query of
+a request, reports the count in ``X-Query-Count`` and logs query shapes that
+repeat ``N_PLUS_ONE_THRESHOLD`` or more times -- the signature of a lazy
+relation loaded once per row. A request over its view's budget is logged, or
+raises QueryBudgetExceeded when ``QUERY_BUDGET_RAISE`` is set, which is how
+the query-count regression tests fail.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+N_PLUS_ONE_THRESHOLD = 3
+
+_IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the most SQL queries one request to the view may run (int or {method: int})."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_query_budget(view_func, method):
+    # Class-based views hang the class off the view function: Django as
+    # ``view_class``, DRF (including @api_view) as ``cls``.
+    for target in (view_func, getattr(view_func, "view_class", None), getattr(view_func, "cls", None)):
+        budget = getattr(target, "query_budget", None)
+        if budget is not None:
+            return budget.get(method) if isinstance(budget, dict) else budget
+    return None
+
+
+def query_shape(sql):
+    """``sql`` with whitespace and ``IN (%s, %s, ...)`` lists collapsed."""
+    return _IN_LIST.sub("IN (...)", _WHITESPACE.sub(" ", sql.strip()))
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that keeps the SQL of every query it sees."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """``[(shape, count), ...]`` for query shapes run ``threshold``+ times."""
+        shapes = Counter(query_shape(sql) for sql in self.queries)
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "QUERY_BUDGET_ENABLED", settings.DEBUG):
+            return self.get_response(request)
+
+        request.query_budget = None
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        response["X-Query-Count"] = str(len(recorder))
+        for shape, count in recorder.repeated():
+            logger.warning("Possible N+1 on %s: %d x %s", request.path, count, shape)
+
+        budget = request.query_budget
+        if budget is not None and len(recorder) > budget:
+            message = f"{request.method} {request.path} ran {len(recorder)} queries (budget {budget})"
+            if getattr(settings, "QUERY_BUDGET_RAISE", False):
+                raise QueryBudgetExceeded(message + ":\n" + "\n".join(recorder.queries))
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
+
+
+class QueryBudgetTestMixin:
+    """
+    ``assertWithinQueryBudget(url)`` for TestCase subclasses: the view behind
+    ``url`` must declare a budget and the request must stay within it.
+    """
+
+    def assertWithinQueryBudget(self, url, method="get", **kwargs):
+        match = resolve(url.split("?")[0])
+        self.assertIsNotNone(
+            get_query_budget(match.func, method.upper()), f"{url} declares no query budget"
+        )
+        with self.settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_RAISE=True):
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, f"{url} returned {response.status_code}")
+        return response
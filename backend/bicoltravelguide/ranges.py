@@ -0,0 +1,126 @@
+# bicoltravelguide/ranges.py
+"""
+File responses that honour HTTP Range requests.
+
+Django's FileResponse always sends the whole file. Large downloads to phones
+on patchy connections need to resume, so ranged_file_response() answers a
+single ``Range: bytes=...`` with 206 Partial Content (or 416 when nothing of
+the file is in range), respects If-Range, and otherwise falls back to a
+normal FileResponse. Multi-range requests get the whole file, which RFC 9110
+allows.
+
+offloaded_file_response() hands the transfer (Range included) to the web
+server instead, per settings.FILE_OFFLOAD: ``"x-accel-redirect"`` for nginx,
+``"x-sendfile"`` for Apache mod_xsendfile or lighttpd.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+OFFLOAD_MODES = {"x-accel-redirect", "x-sendfile"}
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single-range ``Range`` header, None
+    when the header is absent, malformed or asks for several ranges (serve
+    the whole file), or ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match((header or "").replace(" ", ""))
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request, path, content_type, etag=None, last_modified=None, filename=None):
+    """
+    Serve ``path`` with Range, ETag and Last-Modified support. ``etag`` must
+    be a quoted strong validator; ``last_modified`` is a Unix timestamp and
+    defaults to the file's mtime.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    last_modified = int(stat.st_mtime if last_modified is None else last_modified)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        if_range = request.headers.get("If-Range")
+        if request.method in ("GET", "HEAD") and (not if_range or (etag and if_range == etag)):
+            try:
+                byte_range = parse_range(request.headers.get("Range"), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+
+        if response is None and byte_range is not None:
+            start, end = byte_range
+            response = StreamingHttpResponse(_read_range(path, start, end - start + 1), status=206,
+                                             content_type=content_type)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+        elif response is None:
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+            response["Content-Length"] = str(size)
+
+        if filename and response.status_code != 416:
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    response["Accept-Ranges"] = "bytes"
+    if etag:
+        response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def offloaded_file_response(request, path, accel_url, content_type, etag=None):
+    """
+    An empty response telling the web server to send ``path`` (nginx gets
+    ``accel_url``, an ``internal`` location), or None when
+    settings.FILE_OFFLOAD is off and Django should serve the file itself.
+    Conditional requests are still answered here.
+    """
+    mode = settings.FILE_OFFLOAD
+    if not mode:
+        return None
+    if mode not in OFFLOAD_MODES:
+        raise ValueError(f"Unknown FILE_OFFLOAD {mode!r}; expected one of {sorted(OFFLOAD_MODES)}")
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content_type=content_type)
+        if mode == "x-accel-redirect":
+            response["X-Accel-Redirect"] = accel_url
+        else:
+            response["X-Sendfile"] = os.fspath(path)
+    if etag:
+        response["ETag"] = etag
+    return response
@@ -34,6 +34,7 @@ INSTALLED_APPS = [
 
     # 3rd-party apps
     "corsheaders",
+    "django_filters",
     "rest_framework",
     "rest_framework.authtoken",
     "rest_framework_simplejwt.token_blacklist",
@@ -51,12 +52,14 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 SITE_ID = 1
 
 # Middleware
 MIDDLEWARE = [
+    "bicoltravelguide.query_budget.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -68,6 +71,10 @@ MIDDLEWARE = [
     "allauth.account.middleware.AccountMiddleware",
 ]
 
+# Per-view SQL query budgets (bicoltravelguide/query_budget.py)
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_BUDGET_RAISE = os.getenv("QUERY_BUDGET_RAISE", "False").lower() in ["true", "1", "yes"]
+
 ROOT_URLCONF = "bicoltravelguide.urls"
 WSGI_APPLICATION = "bicoltravelguide.wsgi.application"
 
@@ -103,6 +110,28 @@ DATABASES = {
     }
 }
 
+# Cache
+# Version stamps (apps/tourism/versioning.py) and the catalog snapshot live
+# here and must be shared by every worker process: Redis when REDIS_URL is
+# set (needs the `redis` package; required once there is more than one
+# host), otherwise files under CACHE_DIR, which all workers on one host see.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_DIR", str(BASE_DIR / "cache")),
+            # Culling could drop a version stamp; keep it rare.
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    }
+
 # Authentication
 AUTH_USER_MODEL = "users.CustomUser"
 LOGIN_REDIRECT_URL = "/dashboards/"
@@ -138,6 +167,24 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Memory-mapped spot catalog (built by `manage.py build_spot_catalog`)
+SPOT_CATALOG_PATH = os.getenv("SPOT_CATALOG_PATH", str(BASE_DIR / "catalog" / "spots.tgcat"))
+
+# Offline bundles for the mobile app (built by `manage.py build_offline_bundle`)
+OFFLINE_BUNDLE_DIR = os.getenv("OFFLINE_BUNDLE_DIR", str(BASE_DIR / "catalog" / "offline"))
+
+# Packed AR scene bundles, built on first download
+AR_BUNDLE_DIR = os.getenv("AR_BUNDLE_DIR", str(BASE_DIR / "catalog" / "ar-bundles"))
+
+# Who sends media downloads such as AR models: "" for Django itself (with Range
+# support), "x-accel-redirect" for nginx or "x-sendfile" for Apache/lighttpd.
+# With nginx, MEDIA_ACCEL_PREFIX must be an `internal` location aliasing MEDIA_ROOT.
+FILE_OFFLOAD = os.getenv("FILE_OFFLOAD", "")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+
+# Rendered popularity heatmap tiles, one subdirectory per heatmap version
+HEATMAP_TILE_DIR = os.getenv("HEATMAP_TILE_DIR", str(BASE_DIR / "catalog" / "heatmap"))
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:19006",  # Expo
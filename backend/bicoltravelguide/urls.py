@@ -2,9 +2,12 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 
-from apps.tourism.views.api_views import TouristSpotListAPIView
+from apps.tourism.views.api_views import (
+    TouristSpotListAPIView, autocomplete_spots, batch_spots, catalog_snapshot, heatmap_tile, home_feed,
+    map_clusters, nearby_tourist_spots, offline_bundle_download, offline_bundle_manifest, sync_changes,
+)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -17,6 +20,17 @@ urlpatterns = [
 
     # API routes
     path('api/tourism-spots/', TouristSpotListAPIView.as_view(), name='tourism-spot-list'),
+    path('api/tourism-spots/snapshot/', catalog_snapshot, name='tourism-spot-snapshot'),
+    path('api/spots/autocomplete/', autocomplete_spots, name='spot-autocomplete'),
+    path('api/spots/batch/', batch_spots, name='spot-batch'),
+    path('api/spots/nearby/', nearby_tourist_spots, name='spot-nearby'),
+    path('api/feed/', home_feed, name='home-feed'),
+    path('api/map/clusters/', map_clusters, name='map-clusters'),
+    path('api/sync/', sync_changes, name='sync'),
+    path('api/offline/', offline_bundle_manifest, name='offline-bundle'),
+    re_path(r'^api/offline/offline-(?P<version>[0-9a-f]{16})\.zip$', offline_bundle_download,
+            name='offline-bundle-download'),
+    path('tiles/heatmap/<int:z>/<int:x>/<int:y>.png', heatmap_tile, name='heatmap-tile'),
 
     # Business app routes with namespace
     path("business/", include(("apps.business.urls", "businesses"), namespace="businesses")),
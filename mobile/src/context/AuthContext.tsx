@@ -13,6 +13,26 @@ interface User {
   // Add other user properties here as they are defined in your backend
 }
 
+// Home feed from /api/feed/, fetched with the profile on launch
+interface FeedSpot {
+  id: number;
+  name: string;
+  description: string;
+  image: string | null;
+  rating: number;
+  location: number;
+}
+
+interface Feed {
+  counts: {
+    approved_spots_count: number;
+    saved_spots_count: number;
+    visited_spots_count: number;
+  };
+  featured_spots: FeedSpot[];
+  recently_saved_spots: FeedSpot[];
+}
+
 // Define params for the register function for clarity
 interface RegisterParams {
   username: string;
@@ -25,6 +45,7 @@ interface RegisterParams {
 // Define the shape of the context data
 interface AuthContextData {
   user: User | null;
+  feed: Feed | null;
   userToken: string | null;
   isLoading: boolean;
   login: (username: string, password: string) => Promise<void>;
@@ -42,6 +63,7 @@ export const AuthContext = createContext<AuthContextData>({} as AuthContextData)
 export const AuthProvider: FC<AuthProviderProps> = ({ children }) => {
   const [userToken, setUserToken] = useState<string | null>(null);
   const [user, setUser] = useState<User | null>(null);
+  const [feed, setFeed] = useState<Feed | null>(null);
   const [isLoading, setIsLoading] = useState(true);
 
   // 🔐 Login Function
@@ -66,15 +88,17 @@ export const AuthProvider: FC<AuthProviderProps> = ({ children }) => {
     }
   };
 
-  // 👤 Fetch Profile
+  // 👤 Fetch Profile (and the home feed, in the same round trip)
   const fetchUserProfile = async (token: string) => {
     try {
-      const profile = await axios.get<User>(`${API_BASE_URL}/api/auth/me/`, { // Corrected generic type
+      const response = await axios.get<Feed & { profile: User }>(`${API_BASE_URL}/api/feed/`, {
         headers: {
           Authorization: `Bearer ${token}`,
         },
       });
-      setUser(profile.data); // Corrected setUser call
+      const { profile, ...homeFeed } = response.data;
+      setUser(profile);
+      setFeed(homeFeed);
     } catch (error: any) { // Fixed error type
       console.error("Fetching profile failed. Trying to refresh token...");
       await tryTokenRefresh(); // Retry with refresh token
@@ -108,6 +132,7 @@ export const AuthProvider: FC<AuthProviderProps> = ({ children }) => {
     await SecureStore.deleteItemAsync("refreshToken");
     setUserToken(null);
     setUser(null);
+    setFeed(null);
   };
 
   // 🧠 Check Login on App Load
@@ -157,6 +182,7 @@ export const AuthProvider: FC<AuthProviderProps> = ({ children }) => {
         logout,
         register, // ✅ Include register here so screens can use it
         user,
+        feed,
         userToken,
         isLoading,
       }}
@@ -33,11 +33,21 @@ interface TouristSpot {
   image?: string; // Optional, as it might be null or undefined
 }
 
+interface SpotPage {
+  next: string | null;
+  results: TouristSpot[];
+}
+
+// Last first page and its ETag; replayed when the server answers 304 Not Modified.
+let spotsCache: { etag: string; page: SpotPage } | null = null;
+
 const TouristDashboard: FC = () => {
   const navigation = useNavigation<any>(); // Cast to any for now
   const { userToken: accessToken } = useContext(AuthContext);
   const [spots, setSpots] = useState<TouristSpot[]>([]);
+  const [next, setNext] = useState<string | null>(null); // cursor URL of the following page
   const [loading, setLoading] = useState<boolean>(true);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
@@ -46,12 +56,22 @@ const TouristDashboard: FC = () => {
 
   const fetchTouristSpots = async () => {
     try {
-      const response = await axios.get<TouristSpot[]>(`${API_BASE_URL}/api/tourism-spots/`, {
+      const response = await axios.get<SpotPage>(`${API_BASE_URL}/api/tourism-spots/?expand=location`, {
         headers: {
           Authorization: `Bearer ${accessToken}`,
+          ...(spotsCache ? { 'If-None-Match': spotsCache.etag } : {}),
         },
+        validateStatus: (status) => status === 200 || status === 304,
       });
-      setSpots(response.data);
+      let page = response.data;
+      if (response.status === 304 && spotsCache) {
+        page = spotsCache.page;
+      } else {
+        const etag = response.headers['etag'];
+        spotsCache = etag ? { etag, page } : null;
+      }
+      setSpots(page.results);
+      setNext(page.next);
     } catch (error: any) { // Explicitly type error as any
       console.error('Failed to load tourism spots:', error.message);
       setError('Failed to load tourist spots. Please try again later.');
@@ -61,6 +81,23 @@ const TouristDashboard: FC = () => {
     }
   };
 
+  const fetchMoreSpots = async () => {
+    if (!next || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get<SpotPage>(next, {
+        headers: { Authorization: `Bearer ${accessToken}` },
+      });
+      setSpots((current) => [...current, ...response.data.results]);
+      setNext(response.data.next);
+    } catch (error: any) {
+      console.error('Failed to load more tourism spots:', error.message);
+      Alert.alert('Error', 'Failed to load more tourist spots. Please try again later.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const renderSpot = ({ item }: { item: TouristSpot }) => (
     <View style={styles.card}>
       <Image
@@ -116,6 +153,15 @@ const TouristDashboard: FC = () => {
         contentContainerStyle={styles.list}
         scrollEnabled={false}
       />
+      {next && (
+        loadingMore
+          ? <ActivityIndicator size="small" color="#007AFF" style={styles.loadMore} />
+          : (
+            <TouchableOpacity style={styles.loadMore} onPress={fetchMoreSpots}>
+              <Text style={styles.loadMoreText}>Load more</Text>
+            </TouchableOpacity>
+          )
+      )}
     </ScrollView>
   );
 };
@@ -138,6 +184,15 @@ const styles = StyleSheet.create({
   list: {
     paddingBottom: 20,
   },
+  loadMore: {
+    marginBottom: 30,
+    padding: 12,
+  },
+  loadMoreText: {
+    color: '#007AFF',
+    textAlign: 'center',
+    fontWeight: 'bold',
+  },
   card: {
     backgroundColor: '#fff',
     borderRadius: 10,
@@ -1,5 +1,5 @@
 //mobile/src/screens/tourist/ExploreScreen.tsx
-import React, { useContext, useEffect, useState, useCallback, FC } from 'react';
+import React, { useContext, useEffect, useRef, useState, useCallback, FC } from 'react';
 import {
   View,
   Text,
@@ -33,6 +33,11 @@ interface TouristSpot {
   image?: string; // Optional, as it might be null or undefined
 }
 
+interface SpotPage {
+  next: string | null;
+  results: TouristSpot[];
+}
+
 // Removed ExploreScreenNavigationProp type definition
 
 const ExploreScreen: FC = () => {
@@ -40,17 +45,23 @@ const ExploreScreen: FC = () => {
   const [spots, setSpots] = useState<TouristSpot[]>([]);
   const [search, setSearch] = useState<string>('');
   const [loading, setLoading] = useState<boolean>(false);
+  const [next, setNext] = useState<string | null>(null); // cursor URL of the following page
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
+  const searchId = useRef(0); // pages of an older search are dropped
   const navigation = useNavigation<any>(); // Cast to any for now
 
   const fetchTouristSpots = async (searchTerm: string) => {
+    const id = ++searchId.current;
     setLoading(true);
     try {
-      const response = await axios.get<TouristSpot[]>(`${API_BASE_URL}/api/tourism-spots/?search=${searchTerm}`, {
+      const response = await axios.get<SpotPage>(`${API_BASE_URL}/api/tourism-spots/?search=${encodeURIComponent(searchTerm)}&fields=id,name,image,location&expand=location`, {
         headers: {
           Authorization: `Bearer ${accessToken}`,
         },
       });
-      setSpots(response.data);
+      if (id !== searchId.current) return;
+      setSpots(response.data.results);
+      setNext(response.data.next);
     } catch (err: any) { // Explicitly type error as any
       console.error('Failed to load spots:', err);
       Alert.alert('Error', 'Failed to load tourist spots. Please try again later.'); // Use Alert.alert
@@ -59,6 +70,24 @@ const ExploreScreen: FC = () => {
     }
   };
 
+  const fetchMoreSpots = async () => {
+    if (!next || loading || loadingMore) return;
+    const id = searchId.current;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get<SpotPage>(next, {
+        headers: { Authorization: `Bearer ${accessToken}` },
+      });
+      if (id !== searchId.current) return;
+      setSpots((current) => [...current, ...response.data.results]);
+      setNext(response.data.next);
+    } catch (err: any) {
+      console.error('Failed to load more spots:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const debouncedFetch = useCallback(debounce(fetchTouristSpots, 500), [accessToken]);
 
   useEffect(() => {
@@ -89,6 +118,9 @@ const ExploreScreen: FC = () => {
             </View>
           </TouchableOpacity>
         )}
+        onEndReached={fetchMoreSpots}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={loadingMore ? <ActivityIndicator size="small" color="#007AFF" /> : null}
       />
     );
   };